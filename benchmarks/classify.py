@@ -0,0 +1,249 @@
+"""CPU time spent parsing the errors of one response.
+
+Compares the error handling of probe_valid_fields and probe_valid_args before
+and after error messages were classified in a single pass. The legacy
+functions below are the previous implementation, kept here as the reference.
+
+    python -m benchmarks.classify [--bucketsize 4096] [--repeat 5]
+"""
+import re
+import time
+import logging
+import argparse
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Set
+
+from clairvoyancex import messages
+
+
+def legacy_get_valid_fields(error_message: str) -> Set:
+    valid_fields = set()
+
+    multiple_suggestions_re = 'Cannot query field "([_A-Za-z][_0-9A-Za-z]*)" on type "[_A-Za-z][_0-9A-Za-z]*". Did you mean (?P<multi>("[_A-Za-z][_0-9A-Za-z]*", )+)(or "(?P<last>[_A-Za-z][_0-9A-Za-z]*)")?\\?'
+    or_suggestion_re = 'Cannot query field "[_A-Za-z][_0-9A-Za-z]*" on type "[_A-Za-z][_0-9A-Za-z]*". Did you mean "(?P<one>[_A-Za-z][_0-9A-Za-z]*)" or "(?P<two>[_A-Za-z][_0-9A-Za-z]*)"\\?'
+    single_suggestion_re = 'Cannot query field "([_A-Za-z][_0-9A-Za-z]*)" on type "[_A-Za-z][_0-9A-Za-z]*". Did you mean "(?P<field>[_A-Za-z][_0-9A-Za-z]*)"\\?'
+    invalid_field_re = 'Cannot query field "[_A-Za-z][_0-9A-Za-z]*" on type "[_A-Za-z][_0-9A-Za-z]*".'
+    valid_field_re = 'Field "(?P<field>[_A-Za-z][_0-9A-Za-z]*)" of type "(?P<typeref>[_A-Za-z\\[\\]!][_0-9a-zA-Z\\[\\]!]*)" must have a selection of subfields. Did you mean "[_A-Za-z][_0-9A-Za-z]* \\{ ... \\}"\\?'
+    no_fields_regex = 'Field "[_A-Za-z][_0-9A-Za-z]*" must not have a selection since type "[0-9a-zA-Z\\[\\]!]+" has no subfields.'
+
+    if re.fullmatch(no_fields_regex, error_message):
+        return valid_fields
+
+    if re.fullmatch(multiple_suggestions_re, error_message):
+        match = re.fullmatch(multiple_suggestions_re, error_message)
+        for m in match.group("multi").split(", "):
+            if m:
+                valid_fields.add(m.strip('"'))
+        if match.group("last"):
+            valid_fields.add(match.group("last"))
+    elif re.fullmatch(or_suggestion_re, error_message):
+        match = re.fullmatch(or_suggestion_re, error_message)
+        valid_fields.add(match.group("one"))
+        valid_fields.add(match.group("two"))
+    elif re.fullmatch(single_suggestion_re, error_message):
+        match = re.fullmatch(single_suggestion_re, error_message)
+        valid_fields.add(match.group("field"))
+    elif re.fullmatch(invalid_field_re, error_message):
+        pass
+    elif re.fullmatch(valid_field_re, error_message):
+        match = re.fullmatch(valid_field_re, error_message)
+        valid_fields.add(match.group("field"))
+    else:
+        logging.warning(f"Unknown error message: '{error_message}'")
+
+    return valid_fields
+
+
+def legacy_valid_fields(wordlist: List[str], errors: List[Dict]) -> Set[str]:
+    valid_fields = set(wordlist)
+
+    for error in errors:
+        error_message = error["message"]
+
+        if (
+            "must not have a selection since type" in error_message
+            and "has no subfields" in error_message
+        ):
+            return set()
+
+        match = re.search(
+            'Cannot query field "(?P<invalid_field>[_A-Za-z][_0-9A-Za-z]*)"',
+            error_message,
+        )
+        if match:
+            valid_fields.discard(match.group("invalid_field"))
+
+        valid_fields |= legacy_get_valid_fields(error_message)
+
+    return valid_fields
+
+
+def legacy_get_valid_args(error_message: str) -> Set[str]:
+    valid_args = set()
+
+    skip_regexes = [
+        'Unknown argument "[_A-Za-z][_0-9A-Za-z]*" on field "[_A-Za-z][_0-9A-Za-z]*" of type "[_A-Za-z][_0-9A-Za-z]*".',
+        'Field "[_A-Za-z][_0-9A-Za-z]*" of type "[_A-Za-z\\[\\]!][a-zA-Z\\[\\]!]*" must have a selection of subfields. Did you mean "[_A-Za-z][_0-9A-Za-z]* \\{ ... \\}"\\?',
+        'Field "[_A-Za-z][_0-9A-Za-z]*" argument "[_A-Za-z][_0-9A-Za-z]*" of type "[_A-Za-z\\[\\]!][_0-9a-zA-Z\\[\\]!]*" is required, but it was not provided.',
+        'Unknown argument "[_A-Za-z][_0-9A-Za-z]*" on field "[_A-Za-z][_0-9A-Za-z.]*"\\.',
+    ]
+    single_suggestion_re = 'Unknown argument "[_0-9a-zA-Z\\[\\]!]*" on field "[_0-9a-zA-Z\\[\\]!]*" of type "[_0-9a-zA-Z\\[\\]!]*". Did you mean "(?P<arg>[_0-9a-zA-Z\\[\\]!]*)"\\?'
+    double_suggestion_re = 'Unknown argument "[_0-9a-zA-Z\\[\\]!]*" on field "[_0-9a-zA-Z\\[\\]!]*" of type "[_A-Za-z\\[\\]!][_0-9a-zA-Z\\[\\]!]*". Did you mean "(?P<first>[_0-9a-zA-Z\\[\\]!]*)" or "(?P<second>[_0-9a-zA-Z\\[\\]!]*)"\\?'
+
+    for regex in skip_regexes:
+        if re.fullmatch(regex, error_message):
+            return set()
+
+    if re.fullmatch(single_suggestion_re, error_message):
+        match = re.fullmatch(single_suggestion_re, error_message)
+        valid_args.add(match.group("arg"))
+
+    match = re.fullmatch(double_suggestion_re, error_message)
+    if match:
+        valid_args.add(match.group("first"))
+        valid_args.add(match.group("second"))
+
+    if not valid_args:
+        logging.warning(f"Unknown error message: {error_message}")
+
+    return valid_args
+
+
+def legacy_valid_args(field: str, wordlist: List[str], errors: List[Dict]) -> Set[str]:
+    valid_args = set(wordlist)
+
+    for error in errors:
+        error_message = error["message"]
+
+        if (
+            "must not have a selection since type" in error_message
+            and "has no subfields" in error_message
+        ):
+            return set()
+
+        match = re.search(
+            'Unknown argument "(?P<invalid_arg>[_A-Za-z][_0-9A-Za-z]*)" on field "(?P<field>[_A-Za-z][_0-9A-Za-z.]*)"',
+            error_message,
+        )
+        if match and match.group("field").split(".")[-1] == field:
+            valid_args.discard(match.group("invalid_arg"))
+
+        valid_args |= legacy_get_valid_args(error_message)
+
+    return valid_args
+
+
+def classified_valid_fields(wordlist: List[str], errors: List[Dict]) -> Set[str]:
+    # Same loop as oracle.async_probe_valid_fields
+    valid_fields = set(wordlist)
+
+    for error in errors:
+        message = messages.classify(error["message"])
+
+        if message.kind == messages.NO_SUBFIELDS:
+            return set()
+
+        if message.kind == messages.INVALID_FIELD:
+            valid_fields.discard(message.field)
+            valid_fields.update(message.suggestions)
+        elif message.kind == messages.SUBFIELDS_REQUIRED:
+            valid_fields.add(message.field)
+
+    return valid_fields
+
+
+def classified_valid_args(field: str, wordlist: List[str], errors: List[Dict]) -> Set[str]:
+    # Same loop as oracle.async_probe_packed_args for a single field
+    valid_args = set(wordlist)
+
+    for error in errors:
+        message = messages.classify(error["message"])
+
+        if message.kind == messages.NO_SUBFIELDS:
+            return set()
+
+        if message.kind == messages.UNKNOWN_ARGUMENT and message.field == field:
+            valid_args.discard(message.argument)
+            valid_args.update(message.suggestions)
+
+    return valid_args
+
+
+def fields_response(wordlist: List[str]) -> List[Dict]:
+    errors = []
+    for i, word in enumerate(wordlist):
+        if i % 100 == 0:
+            message = f'Field "{word}" of type "Node" must have a selection of subfields. Did you mean "{word} {{ ... }}"?'
+        elif i % 10 == 0:
+            message = f'Cannot query field "{word}" on type "Query". Did you mean "{word}s" or "my{word}"?'
+        else:
+            message = f'Cannot query field "{word}" on type "Query".'
+        errors.append({"message": message})
+
+    return errors
+
+
+def args_response(field: str, wordlist: List[str]) -> List[Dict]:
+    errors = []
+    for i, word in enumerate(wordlist):
+        if i % 10 == 0:
+            message = f'Unknown argument "{word}" on field "{field}" of type "Query". Did you mean "{word}Id"?'
+        else:
+            message = f'Unknown argument "{word}" on field "{field}" of type "Query".'
+        errors.append({"message": message})
+
+    return errors
+
+
+def measure(functions: List[Callable], repeat: int, *args) -> List[float]:
+    # Runs are interleaved so that both sides see the same machine load
+    best = [float("inf")] * len(functions)
+    for _ in range(repeat):
+        for i, function in enumerate(functions):
+            start = time.process_time()
+            function(*args)
+            best[i] = min(best[i], time.process_time() - start)
+
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bucketsize", type=int, default=4096)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    wordlist = [f"word{i}" for i in range(args.bucketsize)]
+    field = "search"
+
+    cases = [
+        (
+            "probe_valid_fields",
+            (legacy_valid_fields, classified_valid_fields),
+            (wordlist, fields_response(wordlist)),
+        ),
+        (
+            "probe_valid_args",
+            (legacy_valid_args, classified_valid_args),
+            (field, wordlist, args_response(field, wordlist)),
+        ),
+    ]
+
+    print(f"{len(wordlist)} errors per response, best of {args.repeat}")
+    for name, (legacy, classified), case in cases:
+        if legacy(*case) != classified(*case):
+            raise Exception(f"{name}: legacy and classified results differ")
+
+        before, after = measure([legacy, classified], args.repeat, *case)
+        print(
+            f"{name:<20} legacy {before * 1000:8.2f} ms"
+            + f"  classified {after * 1000:8.2f} ms"
+            + f"  saved {(before - after) * 1000:8.2f} ms per response"
+            + f" ({before / after:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
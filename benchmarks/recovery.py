@@ -0,0 +1,258 @@
+"""Cost of recovering whole schemas from local stand-in targets.
+
+Each target is a schema served by tests/server/emulator.py, in this process,
+while clairvoyancex runs against it in a child process with a wordlist of
+every name in the schema mixed with as many names it doesn't have:
+
+    small   the Apollo fullstack schema of tests/system.py
+    mid     a generated schema of 150 object types
+    large   a generated schema of 1200 object types
+
+For each run the requests the emulator received, wall-clock time, CPU time
+and peak memory of clairvoyancex, and the share of the fields and arguments
+(with their types) it recovered are compared with a stored baseline. The
+exit status is 1 when any of them got worse by more than the tolerance.
+
+    python -m benchmarks.recovery [--targets small,mid] [--latency 0.01] \\
+        [--save] [--baseline benchmarks/baseline.json] [-- <clairvoyancex options>]
+
+Times and memory depend on the machine, so the baseline is recorded with
+--save on the machine the comparisons are made on.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import http.server
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Set
+
+from tests.server import emulator
+
+SYLLABLES = [
+    "ka", "lo", "mi", "ne", "po", "ru", "sa", "ti", "vo", "ze",
+    "bar", "cor", "del", "fin", "gar", "hol", "jun", "kel", "lan", "mor",
+]
+SCALARS = ["String", "Int", "Float", "Boolean", "ID"]
+
+
+def words(rng: random.Random, count: int, taken: Set[str] = frozenset()) -> List[str]:
+    # Distinct made up lowerCamel names, none of them in taken
+    found = []
+    seen = set(taken)
+    while len(found) < count:
+        parts = [rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))]
+        word = parts[0] + "".join(p.capitalize() for p in parts[1:])
+        if word not in seen:
+            seen.add(word)
+            found.append(word)
+    return found
+
+
+def generate(objects: int, seed: int = 0) -> str:
+    """SDL of a schema with this many object types, all reachable from Query."""
+    rng = random.Random(seed)
+    names = [w[0].upper() + w[1:] for w in words(rng, objects + objects // 10 * 2)]
+    types, enums, inputs = names[:objects], names[objects : objects + objects // 10], names[objects + objects // 10 :]
+    vocabulary = words(rng, max(50, objects // 2))
+
+    def leaf() -> str:
+        return rng.choice(SCALARS + enums) if enums else rng.choice(SCALARS)
+
+    def wrap(typeref: str) -> str:
+        roll = rng.random()
+        if roll < 0.15:
+            return f"[{typeref}]"
+        if roll < 0.3:
+            return f"{typeref}!"
+        if roll < 0.35:
+            return f"[{typeref}!]!"
+        return typeref
+
+    def args() -> str:
+        count = rng.choice([0, 0, 0, 1, 1, 2, 3])
+        chosen = rng.sample(vocabulary, count)
+        if not chosen:
+            return ""
+        return "(" + ", ".join(f"{a}: {wrap(rng.choice([leaf()] * 3 + inputs))}" for a in chosen) + ")"
+
+    # Every type but Query is returned by a field of a type before it
+    children = {name: [] for name in types}
+    for i, name in enumerate(types[1:], 1):
+        children[types[rng.randrange(i)]].append(name)
+
+    sdl = []
+    for i, name in enumerate(types):
+        keyword = "Query" if i == 0 else name
+        fields = rng.sample(vocabulary, rng.randint(2, 8) + len(children[name]))
+        lines = []
+        for field, child in zip(fields, children[name] + [None] * len(fields)):
+            if child is None:
+                # Mostly leaves, now and then a link back to a type seen before
+                child = rng.choice(types[1:i]) if i > 1 and rng.random() < 0.1 else leaf()
+            lines.append(f"  {field}{args()}: {wrap(child)}")
+        sdl.append(f"type {keyword} {{\n" + "\n".join(lines) + "\n}")
+
+    for name in enums:
+        values = [v.upper() for v in rng.sample(vocabulary, rng.randint(2, 6))]
+        sdl.append(f"enum {name} {{\n  " + "\n  ".join(values) + "\n}")
+    for name in inputs:
+        fields = rng.sample(vocabulary, rng.randint(1, 4))
+        sdl.append(f"input {name} {{\n" + "\n".join(f"  {f}: {wrap(leaf())}" for f in fields) + "\n}")
+
+    return "\n\n".join(sdl) + "\n"
+
+
+TARGETS = {
+    "small": lambda: emulator.Schema.load("tests/data/apollo.graphql"),
+    "mid": lambda: emulator.Schema.from_sdl(generate(150)),
+    "large": lambda: emulator.Schema.from_sdl(generate(1200)),
+}
+
+
+def reachable(schema: emulator.Schema) -> List[emulator.Type]:
+    seen = {}
+    pending = list(schema.roots.values())
+    while pending:
+        typ = pending.pop()
+        if typ.name in seen:
+            continue
+        seen[typ.name] = typ
+        for field in typ.fields.values():
+            child = schema.composite(field.type)
+            if child is not None:
+                pending.append(child)
+    return list(seen.values())
+
+
+def wordlist(schema: emulator.Schema) -> List[str]:
+    names = set()
+    for typ in schema.types.values():
+        for field in typ.fields.values():
+            names.add(field.name)
+            names.update(field.args)
+    # As many names the target doesn't have, so that most guesses miss
+    decoys = words(random.Random(1), len(names), names)
+    return sorted(names) + decoys
+
+
+def expected(schema: emulator.Schema) -> Set[str]:
+    entries = set()
+    for typ in reachable(schema):
+        for field in typ.fields.values():
+            entries.add(f"{typ.name}.{field.name}: {field.type}")
+            for arg in field.args.values():
+                entries.add(f"{typ.name}.{field.name}({arg.name}: {arg.type})")
+    return entries
+
+
+def recovered(jso: Dict[str, Any]) -> Set[str]:
+    entries = set()
+    for t in jso["data"]["__schema"]["types"]:
+        for f in t.get("fields") or []:
+            entries.add(f"{t['name']}.{f['name']}: {emulator.typeref_from_json(f['type'])}")
+            for a in f.get("args") or []:
+                entries.add(
+                    f"{t['name']}.{f['name']}({a['name']}: {emulator.typeref_from_json(a['type'])})"
+                )
+    return entries
+
+
+def run(schema: emulator.Schema, options: List[str], latency: float) -> Dict[str, float]:
+    with http.server.ThreadingHTTPServer(("localhost", 0), emulator.EmulatorHTTPRequestHandler) as httpd:
+        httpd.emulator = emulator.Emulator(schema, latency=latency)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+        with tempfile.TemporaryDirectory() as directory:
+            words_file = os.path.join(directory, "wordlist.txt")
+            output = os.path.join(directory, "schema.json")
+            with open(words_file, "w") as f:
+                f.write("\n".join(wordlist(schema)) + "\n")
+
+            command = [sys.executable, "-m", "clairvoyancex", "-o", output, "-w", words_file]
+            command += options + [f"http://localhost:{httpd.server_address[1]}"]
+
+            # wait4 gives the CPU time and peak memory of this child alone
+            start = time.perf_counter()
+            pid = os.spawnv(os.P_NOWAIT, sys.executable, command)
+            _, status, usage = os.wait4(pid, 0)
+            wall = time.perf_counter() - start
+            httpd.shutdown()
+
+            if status:
+                raise Exception(f"clairvoyancex exited with status {status}")
+            with open(output) as f:
+                got = recovered(json.load(f))
+
+        want = expected(schema)
+        return {
+            "requests": httpd.emulator.stats["received"],
+            "wall": round(wall, 3),
+            "cpu": round(usage.ru_utime + usage.ru_stime, 3),
+            "memory": round(usage.ru_maxrss / 1024, 1),
+            "completeness": round(len(want & got) / len(want), 4),
+        }
+
+
+# Higher is worse for all measures but completeness
+UNITS = {"requests": "", "wall": "s", "cpu": "s", "memory": "MiB", "completeness": ""}
+
+
+def compare(name: str, result: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> bool:
+    worse = False
+    for measure, unit in UNITS.items():
+        value = result[measure]
+        line = f"  {measure:<13} {value:>10}{unit}"
+        if measure in baseline:
+            before = baseline[measure]
+            change = (value - before) / before if before else 0
+            if measure == "completeness":
+                regressed = value < before
+            else:
+                regressed = change > tolerance
+            worse = worse or regressed
+            line += f"  baseline {before:>10}{unit}  {change:+7.1%}" + ("  WORSE" if regressed else "")
+        print(line)
+    return worse
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--targets", default=",".join(TARGETS), help="Comma separated, of %(default)s")
+    parser.add_argument("--latency", type=float, default=0, help="Seconds the emulator takes per answer")
+    parser.add_argument("--baseline", default="benchmarks/baseline.json")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Share a measure may grow by")
+    parser.add_argument("--save", action="store_true", help="Store the results as the baseline")
+    parser.add_argument("options", nargs="*", help="Passed on to clairvoyancex, after --")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("latency", 0) != args.latency or baseline.get("options", []) != args.options:
+            print(f"warning: {args.baseline} was recorded with other settings", file=sys.stderr)
+
+    results = {"latency": args.latency, "options": args.options, "targets": {}}
+    worse = False
+    for name in args.targets.split(","):
+        schema = TARGETS[name]()
+        print(f"{name}: {len(reachable(schema))} types")
+        result = results["targets"][name] = run(schema, args.options, args.latency)
+        worse = compare(name, result, baseline.get("targets", {}).get(name, {}), args.tolerance) or worse
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+    sys.exit(1 if worse and not args.save else 0)
+
+
+if __name__ == "__main__":
+    main()
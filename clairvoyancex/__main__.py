@@ -1,12 +1,16 @@
+import sys
 import json
+import asyncio
 import logging
 import argparse
 import re
 from httpx import Timeout
+from typing import Any
 from typing import Dict
 
 from clairvoyancex import graphql
-from clairvoyancex import oracle
+from clairvoyancex.explorer import Explorer
+from clairvoyancex.wordlist import Wordlist
 
 
 def parse_args():
@@ -15,6 +19,12 @@ def parse_args():
     defaults = {"document": "query { FUZZ }",
                 "command": "POST",
                 "bucket_size": 4096,
+                "concurrency": 8,
+                "pack_fields": 4,
+                "parallel_types": 4,
+                "discover_words": 1000,
+                "cache_size": 512,
+                "retries": 3,
                 "timeout": 5}
 
     parser.add_argument("-v", default=0, action="count")
@@ -58,7 +68,7 @@ def parse_args():
         "--wordlist",
         metavar="<file>",
         required=True,
-        type=argparse.FileType("r"),
+        type=argparse.FileType("rb"),
         help="This wordlist will be used for all brute force effots"
                 + " (i.e. fields, arguments and so on)",
     )
@@ -111,13 +121,229 @@ def parse_args():
         help="Max number of items to query per request"
                 + " (default: %(default)s)",
     )
+    parser.add_argument(
+        "--adaptive-buckets",
+        action="store_true",
+        help="Start with --bucketsize items per request, then grow or shrink"
+                + " the buckets based on how the server copes with them",
+    )
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        metavar="<requests>",
+        type=int,
+        default=defaults["concurrency"],
+        help="Max number of requests in flight at the same time"
+                + " (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--rate",
+        metavar="<requests/s>",
+        type=float,
+        help="Never send more than this many requests per second",
+    )
+    parser.add_argument(
+        "--host-rate",
+        metavar="<requests/s>",
+        type=float,
+        help="Start at and never go above this many requests per second to"
+                + " the target. The rate is lowered whenever the target"
+                + " throttles (default: unlimited until throttled)",
+    )
+    parser.add_argument(
+        "--retries",
+        metavar="<retries>",
+        type=int,
+        default=defaults["retries"],
+        help="Send a request again this many times when it times out or the"
+                + " server fails, waiting longer each time (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--hedge",
+        metavar="<percentile>",
+        type=float,
+        help="Send a second copy of any request still running after this"
+                + " percentile of recent response times (e.g. 95), and use"
+                + " whichever answers first",
+    )
+    parser.add_argument(
+        "--pack-fields",
+        metavar="<fields>",
+        type=int,
+        default=defaults["pack_fields"],
+        help="Max number of fields probed for arguments in the same request"
+                + " (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--parallel-types",
+        metavar="<types>",
+        type=int,
+        default=defaults["parallel_types"],
+        help="Max number of types explored at the same time, sharing the"
+                + " concurrency limit (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--reuse-args",
+        action="store_true",
+        help="Check first whether a field takes exactly the same arguments as"
+                + " several fields seen before, and only sweep the wordlist for"
+                + " its arguments if it doesn't. Much faster on APIs with many"
+                + " alike fields, but misses extra arguments of such fields"
+                + " that no other field took",
+    )
+    parser.add_argument(
+        "--discover",
+        action="store_true",
+        help="Instead of the whole wordlist, try names found on other types and"
+                + " variants of the names found so far (other case styles,"
+                + " plurals, common prefixes and suffixes, near spellings)."
+                + " Needs a server that suggests names, and may miss names"
+                + " nothing points to",
+    )
+    parser.add_argument(
+        "--discover-words",
+        metavar="<words>",
+        type=int,
+        default=defaults["discover_words"],
+        help="With --discover, also try this many words from the top of the"
+                + " wordlist (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        metavar="<dir>",
+        help="Keep server responses in this directory and reuse them in"
+                + " later runs against the same target",
+    )
+    parser.add_argument(
+        "--cache-size",
+        metavar="<MiB>",
+        type=int,
+        default=defaults["cache_size"],
+        help="Max size of the response cache, least recently used entries"
+                + " are evicted first (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        metavar="<dir>",
+        help="Journal the progress of the run in this directory so that it"
+                + " can be continued with --resume",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the run journaled in the --checkpoint directory"
+                + " instead of starting over",
+    )
+    parser.add_argument(
+        "--no-bulk-types",
+        dest="bulk_types",
+        action="store_false",
+        help="Infer the type of each field and argument with its own requests"
+                + " instead of resolving many of them per document",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="<file>",
+        help="Write a JSON report of requests, bytes and latencies by probe to"
+                + " this file, after each pass and at the end of the run",
+    )
+    parser.add_argument(
+        "--prometheus",
+        metavar="<file>",
+        help="Write the same metrics in Prometheus text format to this file",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="<file>",
+        help="Write a JSON report of the time spent in each phase (root"
+                + " typenames, field sweep, type inference, argument sweep,"
+                + " argument typing, serialization) to this file, after each"
+                + " pass and at the end of the run",
+    )
+    parser.add_argument(
+        "--profile-cpu",
+        metavar="<file>",
+        help="Profile the run with cProfile and write its stats to this file,"
+                + " to be read with pstats",
+    )
+    parser.add_argument(
+        "--profile-memory",
+        metavar="<file>",
+        help="Trace allocations with tracemalloc and write a snapshot of them"
+                + " to this file at the end of the run",
+    )
     parser.add_argument("url")
 
     return parser.parse_args()
 
 
+def write_schema(output: str, schema: str) -> None:
+    if output:
+        with open(output, "w") as f:
+            f.write(schema)
+    else:
+        print(schema)
+
+
+async def explore(
+    args: argparse.Namespace,
+    config: graphql.Config,
+    wordlist: Wordlist,
+    input_schema: Dict[str, Any],
+    input_document: str,
+) -> None:
+    # One connection pool is shared by the version check and every pass
+    async with graphql.Session(config) as session:
+        # check HTTP version used by server
+        response = await session.send("{__schema{types{name}}}", "version")
+        if response:
+            logging.info(f"Target server is using {response.http_version}")
+        else:
+            logging.warning(f"Could not retrieve HTTP version from server")
+
+        state = session.checkpoint.load_state() if session.checkpoint else None
+        if state:
+            logging.info(f"Resuming from pass {state['pass']}")
+            explorer = Explorer.from_state(state, wordlist, config, session)
+            if explorer.done:
+                logging.info("Journaled run had already finished")
+        else:
+            schema = graphql.Schema(schema=input_schema) if input_schema else None
+            explorer = Explorer(wordlist, config, session, schema, input_document)
+
+        # The schema lives in memory for the whole run and is written out once
+        # it ends, even when it is interrupted
+        def save_metrics() -> None:
+            if explorer.schema:
+                session.metrics.fields = sum(
+                    len(t.fields) for t in explorer.schema.types.values()
+                )
+            session.metrics.write(args.metrics, args.prometheus)
+            session.profiler.write(args.profile)
+
+        def save_state() -> None:
+            if session.checkpoint:
+                with session.profiler.span("serialization"):
+                    state = explorer.state()
+                session.checkpoint.save_state(state)
+            save_metrics()
+
+        session.profiler.start(args.profile_cpu, args.profile_memory)
+        try:
+            await explorer.run(save_state)
+        finally:
+            if explorer.schema:
+                with session.profiler.span("serialization"):
+                    schema = explorer.schema.to_json()
+                write_schema(args.output, schema)
+            session.profiler.stop()
+            save_metrics()
+
+
 if __name__ == "__main__":
     args = parse_args()
+    if args.resume and not args.checkpoint:
+        sys.exit("--resume requires --checkpoint")
 
     format = "[%(levelname)s][%(asctime)s %(filename)s:%(lineno)d]\t%(message)s"
     datefmt = "%Y-%m-%d %H:%M:%S"
@@ -137,6 +363,22 @@ if __name__ == "__main__":
     config.proxy = args.proxy
     config.command = args.command
     config.bucket_size = args.bucketsize
+    config.adaptive_buckets = args.adaptive_buckets
+    config.concurrency = args.concurrency
+    config.rate_limit = args.rate
+    config.host_rate_limit = args.host_rate
+    config.retries = args.retries
+    config.hedge_percentile = args.hedge
+    config.bulk_types = args.bulk_types
+    config.pack_fields = args.pack_fields
+    config.parallel_types = args.parallel_types
+    config.reuse_args = args.reuse_args
+    config.discover = args.discover
+    config.discover_words = args.discover_words
+    config.cache_dir = args.cache_dir
+    config.cache_size = args.cache_size * 2**20
+    config.checkpoint_dir = args.checkpoint
+    config.resume = args.resume
     config.timeout = timeouts
     for h in args.headers:
         key, value = re.split(": ?", h, 1)
@@ -146,7 +388,7 @@ if __name__ == "__main__":
         config.params[key] = value
 
     with args.wordlist as f:
-        wordlist = [w.strip() for w in f.readlines() if w.strip()]
+        wordlist = Wordlist.load(f)
 
     input_schema = None
     if args.input:
@@ -155,42 +397,4 @@ if __name__ == "__main__":
 
     input_document = args.document if args.document else None
 
-    # check HTTP version used by server
-    with graphql.new_client(
-            verify=config.verify,
-            proxies=config.proxy,
-            http2=config.http2,
-            timeout=config.timeout
-            ) as client:
-        response = graphql.request(
-                client=client,
-                command=config.command,
-                url=config.url,
-                params=config.params,
-                json={"query": "{__schema{types{name}}}"}
-                )
-        if response:
-            logging.info(f"Target server is using {response.http_version}")
-        else:
-            logging.warning(f"Could not retrieve HTTP version from server")
-
-    ignore = {"Int", "Float", "String", "Boolean", "ID"}
-    while True:
-        schema = oracle.clairvoyance(
-            wordlist, config, input_schema=input_schema, input_document=input_document
-        )
-
-        if args.output:
-            with open(args.output, "w") as f:
-                f.write(schema)
-        else:
-            print(schema)
-
-        input_schema = json.loads(schema)
-        s = graphql.Schema(schema=input_schema)
-        next = s.get_type_without_fields(ignore)
-        ignore.add(next)
-        if next:
-            input_document = s.convert_path_to_document(s.get_path_from_root(next))
-        else:
-            break
+    asyncio.run(explore(args, config, wordlist, input_schema, input_document))
@@ -0,0 +1,195 @@
+import logging
+from typing import Any
+from typing import Set
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import httpx
+
+
+class BucketSizer:
+    """Number of words sent per document to one target, tuned from its answers.
+
+    The size doubles while the server answers quickly with small bodies. It is
+    halved when answers get slow or big, and the bucket is sent again in
+    smaller pieces when the server times out, fails, rejects the document as
+    too large or drops errors. A size rejected as too large or truncated is
+    never tried again for the rest of the run.
+    """
+
+    # Statuses meaning the document itself was too big for the server
+    too_large = [413, 414, 431]
+
+    def __init__(
+        self,
+        name: str,
+        size: int,
+        minimum: int = 16,
+        maximum: int = 65536,
+        target_latency: float = 1.0,
+        max_response_size: int = 8 * 2**20,
+    ):
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum
+        self.size = max(minimum, min(size, maximum))
+        self.ceiling = None
+        self.error_cap = None
+        self.target_latency = target_latency
+        self.max_response_size = max_response_size
+
+    def truncated(
+        self, sent: List[Any], answered: Set[Any], errors: int, capped: bool = False
+    ) -> bool:
+        """Tells whether the server dropped errors of a document.
+
+        Errors come in document order, so a server that caps how many it
+        reports leaves a run of items at the end of the document without any.
+        Once such a cap is seen, answers reaching it are not trusted either.
+        ``capped`` is set when the server said itself that it stopped early.
+        Buckets are kept to the size of the cap from then on.
+        """
+        if capped:
+            self.cap(errors)
+            return True
+
+        if errors >= len(sent) and errors != self.error_cap:
+            return False
+
+        unanswered = 0
+        for item in reversed(sent):
+            if item in answered:
+                break
+            unanswered += 1
+
+        if unanswered >= 32 or (unanswered and errors == self.error_cap):
+            self.cap(errors)
+            return True
+
+        return False
+
+    def cap(self, errors: int) -> None:
+        # A server reporting no errors at all would tell nothing about anything
+        errors = max(1, errors)
+        if self.error_cap != errors:
+            logging.debug(f"Server seems to report at most {errors} errors")
+        self.error_cap = errors
+        self.size = max(self.minimum, min(self.size, errors))
+
+    def unsettled(self, sent: List[Any], answered: Set[Any]) -> List[Any]:
+        # Errors come in document order, so a truncated answer still settles
+        # every item up to the last one it has an error for
+        last = max([i + 1 for i, item in enumerate(sent) if item in answered] or [0])
+        return sent[last:]
+
+    def pieces(self, items: List[Any]) -> List[List[Any]]:
+        # Items to send again, as many per document as the server reports
+        # errors for, or in halves while that is not known
+        size = self.error_cap or (len(items) + 1) // 2
+        return [items[i : i + size] for i in range(0, len(items), size)]
+
+    def shrink(self, words: int) -> None:
+        # Buckets sent before a change come back later, so several answers
+        # about the same size only count once
+        size = max(self.minimum, min(self.size, words // 2))
+        if size != self.size:
+            logging.debug(f"Bucket size for {self.name}: {self.size} -> {size}")
+        self.size = size
+
+    def grow(self, words: int) -> None:
+        if words < self.size:
+            return
+
+        size = min(self.size * 2, self.maximum)
+        if self.ceiling:
+            size = min(size, self.ceiling - 1)
+        if self.error_cap:
+            size = min(size, max(self.minimum, self.error_cap))
+        if size > self.size:
+            logging.debug(f"Bucket size for {self.name}: {self.size} -> {size}")
+            self.size = size
+
+    def record(
+        self, words: int, response: Optional[httpx.Response], truncated: bool = False
+    ) -> bool:
+        """Adjusts the size after an answer to a bucket of ``words`` words.
+
+        Returns False when the bucket has to be sent again in smaller pieces.
+        ``response`` is None when the request timed out.
+        """
+        if response is None or response.status_code >= 500:
+            self.shrink(words)
+            return False
+
+        if response.status_code in self.too_large or truncated:
+            self.ceiling = min(self.ceiling or words, words)
+            self.shrink(words)
+            return False
+
+        latency = response.elapsed.total_seconds()
+        body = len(response.content)
+        if latency > self.target_latency or body > self.max_response_size:
+            self.shrink(words)
+        elif latency < self.target_latency / 2 and body < self.max_response_size / 2:
+            self.grow(words)
+
+        return True
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"size": self.size, "ceiling": self.ceiling, "error_cap": self.error_cap}
+
+    def load(self, jso: Dict[str, Any]) -> None:
+        self.size = jso["size"]
+        self.ceiling = jso["ceiling"]
+        # Checkpoints from before caps were kept above 0 may hold a cap of 0
+        self.error_cap = jso["error_cap"] or None
+
+
+class ByteBudget:
+    """Largest request, in bytes, a target accepts with one method.
+
+    What is measured is what servers and proxies put limits on: the URL for
+    GET and the body for POST. Nothing is assumed until a request is rejected
+    as too large, then the budget is bisected between the largest size
+    accepted and the smallest rejected until they are close.
+    """
+
+    def __init__(self, method: str):
+        self.method = method
+        self.accepted = 0
+        self.rejected = None
+
+    @property
+    def limit(self) -> Optional[int]:
+        if self.rejected is None:
+            return None
+        if self.rejected - self.accepted <= self.rejected // 8:
+            return self.accepted
+        return (self.accepted + self.rejected) // 2
+
+    def record(self, size: int, response: Optional[httpx.Response]) -> bool:
+        """Learns from the answer to a request of ``size`` bytes.
+
+        Returns False when the request was rejected as too large.
+        """
+        if response is None:
+            return True
+
+        if response.status_code in BucketSizer.too_large:
+            if self.rejected is None or size < self.rejected:
+                logging.debug(f"{self.method} requests of {size} bytes are too large")
+                self.rejected = size
+            self.accepted = min(self.accepted, size - 1)
+            return False
+
+        if size > self.accepted and (self.rejected is None or size < self.rejected):
+            self.accepted = size
+        return True
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"accepted": self.accepted, "rejected": self.rejected}
+
+    def load(self, jso: Dict[str, Any]) -> None:
+        self.accepted = jso["accepted"]
+        self.rejected = jso["rejected"]
@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import datetime
+from typing import Any
+from typing import Dict
+from typing import Optional
+
+import httpx
+
+from clairvoyancex.buckets import BucketSizer
+
+
+def payload(response: httpx.Response) -> Optional[Dict[str, Any]]:
+    """What of ``response`` the cache and the checkpoint keep.
+
+    None when the request has to be sent again instead: throttling and server
+    failures say nothing about the schema. A document rejected as too large
+    is kept whatever its body, so that replaying it teaches the byte budget
+    as much as the answer did.
+    """
+    if response.status_code == 429 or response.status_code >= 500:
+        return None
+
+    try:
+        j = response.json()
+    except json.JSONDecodeError:
+        j = None
+    if not isinstance(j, dict):
+        return {} if response.status_code in BucketSizer.too_large else None
+
+    return {k: j[k] for k in ["data", "errors"] if k in j}
+
+
+class ResponseCache:
+    """On-disk cache of GraphQL response payloads.
+
+    Only the ``data`` and ``errors`` members of a response are kept, keyed by
+    everything that can change the answer of the server. Entries are evicted
+    least recently used first once the stored payloads exceed ``max_size``
+    bytes.
+    """
+
+    def __init__(self, directory: str, max_size: int):
+        os.makedirs(directory, exist_ok=True)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+        self.connection = sqlite3.connect(os.path.join(directory, "responses.sqlite3"))
+        # Every entry is committed right away so that an interrupted run keeps
+        # its answers; WAL keeps those commits cheap
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " status INTEGER NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " used REAL NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS responses_used ON responses (used)"
+        )
+        self.connection.commit()
+
+        (size,) = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        self.size = size
+
+    @staticmethod
+    def key(
+        command: str,
+        url: str,
+        headers: Dict[str, str],
+        params: Dict[str, str],
+        document: str,
+    ) -> str:
+        target = json.dumps(
+            [
+                command,
+                url,
+                sorted((k.lower(), v) for k, v in headers.items()),
+                sorted(params.items()),
+            ]
+        )
+        digest = hashlib.sha256(target.encode())
+        digest.update(hashlib.sha256(document.encode()).digest())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[httpx.Response]:
+        row = self.connection.execute(
+            "SELECT status, payload FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if not row:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.connection.execute(
+            "UPDATE responses SET used = ? WHERE key = ?", (time.time(), key)
+        )
+        self.connection.commit()
+
+        status, content = row
+        response = httpx.Response(status, content=content.encode())
+        response.elapsed = datetime.timedelta(0)
+        return response
+
+    def put(self, key: str, response: httpx.Response) -> None:
+        kept = payload(response)
+        if kept is None:
+            return
+        content = json.dumps(kept)
+
+        old = self.connection.execute(
+            "SELECT size FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if old:
+            self.size -= old[0]
+
+        self.connection.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+            (key, response.status_code, content, len(content), time.time()),
+        )
+        self.size += len(content)
+        self.evict()
+        self.connection.commit()
+
+    def evict(self) -> None:
+        while self.size > self.max_size:
+            rows = self.connection.execute(
+                "SELECT key, size FROM responses ORDER BY used LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self.size = 0
+                break
+
+            for key, size in rows:
+                if self.size <= self.max_size:
+                    break
+                self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.size -= size
+
+    def close(self) -> None:
+        logging.info(f"Response cache: {self.hits} hits, {self.misses} misses")
+        self.connection.close()
@@ -0,0 +1,82 @@
+import re
+from typing import Iterable
+from typing import List
+
+NAME = re.compile("[_A-Za-z][_0-9A-Za-z]*")
+WORDS = re.compile("[A-Z]?[a-z0-9]+|[A-Z]+(?![a-z])")
+
+PREFIXES = ["get", "set", "create", "update", "delete", "remove", "add", "is", "has", "all"]
+SUFFIXES = ["Id", "Ids", "Count", "At", "By", "List", "Connection"]
+
+
+def split(name: str) -> List[str]:
+    # camelCase, PascalCase and snake_case names into lower case words
+    return [w.lower() for part in name.split("_") for w in WORDS.findall(part)]
+
+
+def camel(words: List[str]) -> str:
+    return words[0] + "".join(w.capitalize() for w in words[1:])
+
+
+def variants(name: str) -> List[str]:
+    """Names a schema with a field or argument ``name`` likely has too.
+
+    Wrong guesses are not wasted: a server suggesting names answers them with
+    the real names close to them.
+    """
+    words = split(name)
+    if not words:
+        return []
+
+    out = []
+    snake = "_".join(words)
+    # Each naming style in the other one, in case the schema mixes them
+    out.append(snake if "_" not in name else camel(words))
+
+    last = words[-1]
+    if last.endswith("ies"):
+        out.append(camel(words[:-1] + [last[:-3] + "y"]))
+    elif last.endswith("s"):
+        out.append(camel(words[:-1] + [last[:-1]]))
+    elif last.endswith("y"):
+        out.append(camel(words[:-1] + [last[:-1] + "ies"]))
+    else:
+        out.append(camel(words[:-1] + [last + "s"]))
+
+    if words[0] in PREFIXES:
+        rest = words[1:]
+        if rest:
+            out.append(camel(rest))
+            out.extend(camel([p] + rest) for p in PREFIXES if p != words[0])
+    else:
+        out.extend(camel([p] + words) for p in PREFIXES)
+
+    if len(words) > 1 and last.capitalize() in SUFFIXES:
+        out.append(camel(words[:-1]))
+    else:
+        out.extend(name + s for s in SUFFIXES)
+
+    # Names are often made of the names of other fields
+    if len(words) > 1:
+        out.extend(words)
+
+    # One edit away from the name, so that the server suggests everything
+    # spelled like it
+    if len(name) > 3:
+        out.append(name[:-1])
+
+    return [n for n in dict.fromkeys(out) if n != name and NAME.fullmatch(n)]
+
+
+def generate(names: Iterable[str], exclude: Iterable[str] = ()) -> List[str]:
+    # Variants of every name not in exclude, without repeats and in a stable
+    # order so that runs are reproducible
+    seen = set(exclude)
+    out = []
+    for name in sorted(names):
+        for candidate in variants(name):
+            if candidate not in seen:
+                seen.add(candidate)
+                out.append(candidate)
+
+    return out
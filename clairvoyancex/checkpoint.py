@@ -0,0 +1,102 @@
+import os
+import json
+import logging
+import datetime
+from typing import Any
+from typing import Dict
+from typing import Optional
+
+import httpx
+
+from clairvoyancex.cache import payload
+
+
+class Checkpoint:
+    """Journal of a run that allows resuming it after an interruption.
+
+    Every answered request is appended to ``journal.jsonl`` as soon as it
+    completes, so a resumed run replays them instead of sending them again.
+    The exploration state between passes (schema, ignored types and documents
+    still being explored) is kept in ``state.json``, which is replaced
+    atomically.
+    """
+
+    def __init__(self, directory: str, resume: bool = False):
+        os.makedirs(directory, exist_ok=True)
+        self.journal_path = os.path.join(directory, "journal.jsonl")
+        self.state_path = os.path.join(directory, "state.json")
+        self.replayed = 0
+
+        if not resume:
+            for path in [self.journal_path, self.state_path]:
+                if os.path.exists(path):
+                    os.remove(path)
+
+        # Only offsets are kept in memory, payloads are read back on demand
+        self.offsets = {}
+        end = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "rb") as f:
+                for line in iter(f.readline, b""):
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        self.offsets[json.loads(line)["key"]] = end
+                    except (ValueError, KeyError):
+                        pass
+                    end += len(line)
+            logging.info(f"Loaded {len(self.offsets)} responses from {self.journal_path}")
+
+        self.journal = open(self.journal_path, "ab")
+        # A line cut short by the interruption is dropped, so that new entries
+        # start on a line of their own
+        self.journal.truncate(end)
+        self.reader = open(self.journal_path, "rb")
+
+    def get(self, key: str) -> Optional[httpx.Response]:
+        if key not in self.offsets:
+            return None
+
+        self.reader.seek(self.offsets[key])
+        entry = json.loads(self.reader.readline())
+        self.replayed += 1
+
+        response = httpx.Response(
+            entry["status"], content=json.dumps(entry["payload"]).encode()
+        )
+        response.elapsed = datetime.timedelta(0)
+        return response
+
+    def put(self, key: str, response: httpx.Response) -> None:
+        # Throttled or failed requests have to be sent again on resume
+        kept = payload(response)
+        if kept is None:
+            return
+
+        entry = {"key": key, "status": response.status_code, "payload": kept}
+        line = json.dumps(entry).encode() + b"\n"
+
+        self.journal.seek(0, os.SEEK_END)
+        self.offsets[key] = self.journal.tell()
+        self.journal.write(line)
+        self.journal.flush()
+
+    def load_state(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.state_path):
+            return None
+
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def save_state(self, state: Dict[str, Any]) -> None:
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.state_path)
+
+    def close(self) -> None:
+        logging.info(f"Replayed {self.replayed} responses from {self.journal_path}")
+        self.journal.close()
+        self.reader.close()
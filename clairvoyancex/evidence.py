@@ -0,0 +1,54 @@
+import logging
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Optional
+
+from clairvoyancex import messages
+
+
+class Evidence:
+    """Facts the server gave away while answering other probes.
+
+    Error messages often say more than the probe that triggered them looks
+    for, like the name of the type being probed or the full type of a field.
+    They are kept per document, since names only mean something under the
+    type the document selects, so that later probes can skip their requests.
+    """
+
+    def __init__(self):
+        self.typenames = {}  # type: Dict[str, str]
+        self.fields = {}  # type: Dict[Tuple[str, str], str]
+        self.args = {}  # type: Dict[Tuple[str, str, str], str]
+        self.saved = 0
+
+    def add_fields(self, document: str, classified: List[messages.ErrorMessage]) -> None:
+        # Messages about the fields selected in place of FUZZ
+        for message in classified:
+            if message.kind == messages.INVALID_FIELD:
+                self.typenames.setdefault(document, message.type)
+            elif message.kind == messages.SUBFIELDS_REQUIRED:
+                self.fields[(document, message.field)] = message.typeref
+
+    def add_args(self, document: str, classified: List[messages.ErrorMessage]) -> None:
+        # Messages about the arguments of fields selected in place of FUZZ
+        for message in classified:
+            if message.kind == messages.UNKNOWN_ARGUMENT:
+                self.typenames.setdefault(document, message.type)
+            elif message.kind == messages.REQUIRED_ARGUMENT:
+                self.args[(document, message.field, message.argument)] = message.typeref
+
+    def typename(self, document: str) -> Optional[str]:
+        return self.typenames.get(document)
+
+    def field_typeref(self, document: str, field: str) -> Optional[str]:
+        return self.fields.get((document, field))
+
+    def arg_typeref(self, document: str, field: str, arg: str) -> Optional[str]:
+        return self.args.get((document, field, arg))
+
+    def save(self, requests: int = 1) -> None:
+        self.saved += requests
+
+    def close(self) -> None:
+        logging.info(f"Answered probes from earlier responses, saving {self.saved} requests")
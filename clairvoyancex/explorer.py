@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import collections
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Callable
+from typing import Iterable
+from typing import Optional
+
+from clairvoyancex import graphql
+from clairvoyancex import oracle
+
+
+class Explorer:
+    """Explores a schema type by type, keeping it in memory between passes.
+
+    Types without known fields wait in a worklist, in the order they were
+    found. Each pass probes one of them through the document reaching it from
+    a root and queues the types its fields return. Up to
+    ``config.parallel_types`` passes run at once and share the concurrency of
+    the session. Their results are added in the order the passes started, so
+    the schema comes out the same as when exploring one type at a time. The
+    schema is only serialized when the state is saved or the run ends.
+    """
+
+    def __init__(
+        self,
+        wordlist: List[str],
+        config: graphql.Config,
+        session: graphql.Session,
+        schema: graphql.Schema = None,
+        document: str = None,
+        ignore: Iterable[str] = None,
+    ):
+        self.wordlist = wordlist
+        self.config = config
+        self.session = session
+        self.schema = schema
+        # Documents of the passes started but not added to the schema yet
+        self.documents = collections.deque([document] if document else [])
+        if ignore is None:
+            ignore = ["Int", "Float", "String", "Boolean", "ID"]
+        self.ignore = set(ignore)
+        self.pending = collections.deque()
+        self.queued = set()
+        self.passes = 0
+        self.done = False
+
+        if self.schema:
+            self.enqueue(self.schema.types)
+
+    @classmethod
+    def from_state(
+        cls,
+        state: Dict[str, Any],
+        wordlist: List[str],
+        config: graphql.Config,
+        session: graphql.Session,
+    ) -> "Explorer":
+        schema = graphql.Schema(schema=state["schema"])
+        explorer = cls(wordlist, config, session, schema, ignore=state["ignore"])
+        explorer.documents.extend(state["documents"])
+        explorer.passes = state["pass"]
+        explorer.done = state["done"]
+        for name, sizer in state.get("buckets", {}).items():
+            session.sizer(name).load(sizer)
+        if "budget" in state:
+            session.budget.load(state["budget"])
+        for key in ["field_args", "type_args"]:
+            for name, args in state.get(key, {}).items():
+                getattr(session, key)[name] = frozenset(args)
+        for args, count in state.get("signatures", []):
+            session.signatures[frozenset(args)] = count
+
+        return explorer
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "pass": self.passes,
+            "schema": self.schema.to_dict(),
+            "documents": list(self.documents),
+            "ignore": sorted(self.ignore),
+            "done": self.done,
+            "buckets": {
+                name: sizer.to_json() for name, sizer in self.session.sizers.items()
+            },
+            "budget": self.session.budget.to_json(),
+            "field_args": {
+                name: sorted(args) for name, args in self.session.field_args.items()
+            },
+            "type_args": {
+                name: sorted(args) for name, args in self.session.type_args.items()
+            },
+            "signatures": [
+                [sorted(args), count] for args, count in self.session.signatures.items()
+            ],
+        }
+
+    def enqueue(self, names: Iterable[str]) -> None:
+        for name in names:
+            typ = self.schema.types[name]
+            if (
+                typ.fields
+                or typ.kind == "INPUT_OBJECT"
+                or name in self.ignore
+                or name in self.queued
+            ):
+                continue
+
+            self.pending.append(name)
+            self.queued.add(name)
+
+    def next_document(self) -> Optional[str]:
+        while self.pending:
+            name = self.pending.popleft()
+            if self.schema.types[name].fields or name in self.ignore:
+                continue
+
+            self.ignore.add(name)
+            try:
+                path = self.schema.get_path_from_root(name)
+            except Exception as e:
+                logging.warning(f"Skipping type: {e}")
+                continue
+
+            return self.schema.convert_path_to_document(path)
+
+        return None
+
+    async def run(self, on_pass: Callable[[], None] = None) -> None:
+        if self.done:
+            return
+
+        if not self.schema:
+            self.schema = await oracle.async_new_schema(self.config, self.session)
+            self.enqueue(self.schema.types)
+
+        tasks = collections.deque()
+        try:
+            while True:
+                # The type of the first document is only known once it has
+                # been probed, so nothing runs alongside it
+                while len(self.documents) < self.config.parallel_types and (
+                    self.passes or not self.documents
+                ):
+                    document = self.next_document()
+                    if document is None:
+                        break
+                    self.documents.append(document)
+
+                while len(tasks) < len(self.documents):
+                    tasks.append(
+                        asyncio.create_task(
+                            oracle.async_probe_type(
+                                self.wordlist,
+                                self.config,
+                                self.documents[len(tasks)],
+                                self.session,
+                            )
+                        )
+                    )
+
+                if not tasks:
+                    break
+
+                typename, fields = await tasks[0]
+                tasks.popleft()
+                self.documents.popleft()
+                oracle.add_fields(self.schema, typename, fields)
+                self.enqueue(f.type.name for f in fields)
+
+                self.passes += 1
+                if on_pass:
+                    on_pass()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.done = True
+        if on_pass:
+            on_pass()
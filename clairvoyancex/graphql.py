@@ -1,18 +1,44 @@
 import httpx
 
 import json
+import time
+import asyncio
 import logging
+import collections
 from httpcore import ConnectError
 from httpx import ProxyError
 from typing import List
 from typing import Dict
 from typing import Any
 from typing import Set
-
-
-def new_client(**kwargs):
-    transport = httpx.HTTPTransport(retries=5)
-    client = httpx.Client(transport=transport, **kwargs)
+from typing import FrozenSet
+from typing import Tuple
+from typing import Optional
+from typing import Callable
+from typing import Sequence
+
+from clairvoyancex.cache import ResponseCache
+from clairvoyancex.buckets import ByteBudget
+from clairvoyancex.buckets import BucketSizer
+from clairvoyancex.metrics import Metrics
+from clairvoyancex.profiling import Profiler
+from clairvoyancex.evidence import Evidence
+from clairvoyancex.ratelimit import RateLimiter
+from clairvoyancex.ratelimit import Throttled
+from clairvoyancex.retry import RetryPolicy
+from clairvoyancex.retry import LatencyTracker
+from clairvoyancex.checkpoint import Checkpoint
+
+
+# Transport options have to be given to the transport itself, as a custom
+# transport ignores the ones passed to the client
+def new_client(verify=True, http2=False, limits=httpx.Limits(), **kwargs):
+    transport = httpx.HTTPTransport(
+        retries=5, verify=verify, http2=http2, limits=limits
+    )
+    client = httpx.Client(
+        transport=transport, verify=verify, http2=http2, limits=limits, **kwargs
+    )
     return client
 
 
@@ -49,6 +75,53 @@ def request(command, client, url, params=None, data=None, json=None, **kwargs):
         return get(client, url, params={**params, **json}, **kwargs)
 
 
+def new_async_client(verify=True, http2=False, limits=httpx.Limits(), **kwargs):
+    transport = httpx.AsyncHTTPTransport(
+        retries=5, verify=verify, http2=http2, limits=limits
+    )
+    client = httpx.AsyncClient(
+        transport=transport, verify=verify, http2=http2, limits=limits, **kwargs
+    )
+    return client
+
+
+async def async_post(client, url, data=None, json=None, **kwargs):
+    try:
+        response = await client.post(url, data=data, json=json, **kwargs)
+    except ConnectError as err:
+        logging.error(f'Connection error: {err}')
+        raise
+    except ProxyError as err:
+        logging.error(f'Proxy error: {err}')
+        raise
+    else:
+        return response
+
+
+async def async_get(client, url, params=None, **kwargs):
+    try:
+        response = await client.get(url, params=params, **kwargs)
+    except ConnectError as err:
+        logging.error(f'Connection error: {err}')
+        raise
+    except ProxyError as err:
+        logging.error(f'Proxy error: {err}')
+        raise
+    else:
+        return response
+
+
+async def async_request(
+    command, client, url, params=None, data=None, json=None, **kwargs
+):
+    if command == "POST":
+        return await async_post(
+            client, url, params=params, data=data, json=json, **kwargs
+        )
+    elif command == "GET":
+        return await async_get(client, url, params={**params, **json}, **kwargs)
+
+
 class Schema:
     def __init__(
         self,
@@ -93,28 +166,46 @@ class Schema:
             if self.subscriptionType:
                 self.add_type(subscriptionType, "OBJECT")
 
+        # Reverse edges of the type graph: type name -> (parent type, field)
+        # for every field returning it, and the root paths found through them
+        self.referrers: Dict[str, List[Tuple[str, str]]] = {}
+        self.paths: Dict[str, List[str]] = {}
+        for t in self.types.values():
+            for f in t.fields:
+                self.index_field(t, f)
+
+    def index_field(self, typ: "Type", field: "Field") -> None:
+        # Fields of input objects can't be selected, so they lead nowhere
+        if typ.kind == "INPUT_OBJECT":
+            return
+
+        self.referrers.setdefault(field.type.name, []).append((typ.name, field.name))
+        self.paths = {}
+
+    # Fields must be added through here to keep root paths up to date
+    def add_field(self, name: str, field: "Field") -> None:
+        self.types[name].fields.append(field)
+        self.index_field(self.types[name], field)
+
     # Adds type to schema if it's not exists already
     def add_type(self, name: str, kind: str) -> None:
         if name not in self.types:
             typ = Type(name=name, kind=kind)
             self.types[name] = typ
 
-    def to_json(self):
-        schema = {"data": {"__schema": self._schema}}
+    def to_dict(self) -> Dict[str, Any]:
+        schema = {"data": {"__schema": {**self._schema, "types": []}}}
 
         for t in self.types.values():
             schema["data"]["__schema"]["types"].append(t.to_json())
 
-        output = json.dumps(schema, indent=4, sort_keys=True)
-        return output
+        return schema
 
-    def get_path_from_root(self, name: str) -> List[str]:
-        logging.debug(f"Entered get_path_from_root({name})")
-        path_from_root = []
-
-        if name not in self.types:
-            raise Exception(f"Type '{name}' not in schema!")
+    def to_json(self):
+        output = json.dumps(self.to_dict(), indent=4, sort_keys=True)
+        return output
 
+    def get_roots(self) -> List[str]:
         roots = [
             self._schema["queryType"]["name"] if self._schema["queryType"] else "",
             self._schema["mutationType"]["name"]
@@ -124,19 +215,43 @@ class Schema:
             if self._schema["subscriptionType"]
             else "",
         ]
-        roots = [r for r in roots if r]
+        return [r for r in roots if r]
+
+    def get_path_from_root(self, name: str) -> List[str]:
+        logging.debug(f"Entered get_path_from_root({name})")
+
+        if name not in self.types:
+            raise Exception(f"Type '{name}' not in schema!")
+
+        if name not in self.paths:
+            self.paths[name] = self.find_path_from_root(name)
 
-        while name not in roots:
-            for t in self.types.values():
-                for f in t.fields:
-                    if f.type.name == name:
-                        path_from_root.insert(0, f.name)
-                        name = t.name
+        # Callers consume the path, so they get their own copy
+        return list(self.paths[name])
 
-        # Prepend queryType or mutationType
-        path_from_root.insert(0, name)
+    def find_path_from_root(self, name: str) -> List[str]:
+        # Breadth-first search over the reverse edges, from the type up to the
+        # closest root, so the shortest path is found and cycles end the walk
+        roots = self.get_roots()
+        towards: Dict[str, Optional[Tuple[str, str]]] = {name: None}
+        queue = collections.deque([name])
 
-        return path_from_root
+        while queue:
+            current = queue.popleft()
+
+            if current in roots:
+                path_from_root = [current]
+                while towards[current]:
+                    field, current = towards[current]
+                    path_from_root.append(field)
+                return path_from_root
+
+            for parent, field in self.referrers.get(current, []):
+                if parent not in towards:
+                    towards[parent] = (field, current)
+                    queue.append(parent)
+
+        raise Exception(f"Type '{name}' can't be reached from any root!")
 
     def get_type_without_fields(self, ignore: Set[str] = []) -> str:
         for t in self.types.values():
@@ -167,13 +282,281 @@ class Schema:
 class Config:
     def __init__(self):
         self.url = ""
-        self.command = ""
+        self.command = "POST"
         self.bucket_size = 4096
+        self.adaptive_buckets = False
+        self.max_bucket_size = 65536
+        self.concurrency = 8
+        self.bulk_types = True
+        self.pack_fields = 4
+        self.parallel_types = 4
+        self.reuse_args = False
+        # Times a set of arguments has to be found before fields are checked
+        # against it
+        self.reuse_args_min = 2
+        self.discover = False
+        self.discover_words = 1000
+        self.timeout = httpx.Timeout(5)
         self.verify = True
         self.http2 = False
         self.headers = dict()
         self.params = dict()
         self.proxy = None
+        self.keepalive_expiry = 30.0
+        self.rate_limit = None
+        self.host_rate_limit = None
+        self.throttle_retries = 5
+        self.retries = 3
+        self.retry_backoff = 0.5
+        self.retry_max_backoff = 10.0
+        self.hedge_percentile = None
+        self.cache_dir = None
+        self.cache_size = 512 * 2**20
+        self.checkpoint_dir = None
+        self.resume = False
+
+
+class Session:
+    """Long-lived connection pool shared by all probes of a run.
+
+    Must be entered with ``async with`` from inside the event loop that will
+    use it.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.client = None
+        self.semaphore = None
+        self.cache = None
+        self.checkpoint = None
+        self.limiter = None
+        self.retry = RetryPolicy(
+            config.retries, config.retry_backoff, config.retry_max_backoff
+        )
+        self.latencies = LatencyTracker()
+        self.metrics = Metrics()
+        self.profiler = Profiler()
+        self.sizers = {}
+        self.budget = ByteBudget(config.command)
+        self.evidence = Evidence()
+        # Names of fields and arguments found so far, to try first on others
+        self.names: Dict[str, Set[str]] = {}
+        # Arguments of the fields probed so far by field name and by the type
+        # they return, shared by every pass
+        self.field_args: Dict[str, FrozenSet[str]] = {}
+        self.type_args: Dict[str, FrozenSet[str]] = {}
+        # Number of fields found to take each set of arguments
+        self.signatures = collections.Counter()
+
+    @property
+    def limits(self) -> httpx.Limits:
+        # Keep one warm connection per concurrent request so a burst of
+        # buckets never has to wait for a new TCP+TLS handshake
+        return httpx.Limits(
+            max_connections=self.config.concurrency,
+            max_keepalive_connections=self.config.concurrency,
+            keepalive_expiry=self.config.keepalive_expiry,
+        )
+
+    def sizer(self, name: str) -> BucketSizer:
+        # One sizer per kind of bucket, kept for the whole run since a session
+        # only ever talks to one target
+        if name not in self.sizers:
+            read_timeout = self.config.timeout.read or 60
+            self.sizers[name] = BucketSizer(
+                name,
+                self.config.bucket_size,
+                maximum=self.config.max_bucket_size,
+                target_latency=read_timeout / 4,
+            )
+        return self.sizers[name]
+
+    def request_size(self, document: str) -> int:
+        if self.config.command == "GET":
+            url = httpx.URL(
+                self.config.url, params={**self.config.params, "query": document}
+            )
+            return len(str(url))
+        return len(json.dumps({"query": document}).encode("utf-8"))
+
+    def fit(self, words: Sequence[Any], render: Callable[[Sequence[Any]], str]) -> int:
+        # Number of leading words whose document stays within the byte budget
+        limit = self.budget.limit
+        if limit is None or self.request_size(render(words)) <= limit:
+            return len(words)
+
+        fits, too_large = 0, len(words)
+        while too_large - fits > 1:
+            middle = (fits + too_large) // 2
+            if self.request_size(render(words[:middle])) <= limit:
+                fits = middle
+            else:
+                too_large = middle
+
+        return max(fits, 1)
+
+    async def __aenter__(self) -> "Session":
+        self.client = new_async_client(
+            verify=self.config.verify,
+            http2=self.config.http2,
+            limits=self.limits,
+            proxies=self.config.proxy,
+            timeout=self.config.timeout,
+        )
+        await self.client.__aenter__()
+        # The semaphore bounds the number of in-flight requests for the whole run
+        self.semaphore = asyncio.Semaphore(self.config.concurrency)
+        self.limiter = RateLimiter(
+            self.config.rate_limit,
+            self.config.host_rate_limit,
+            burst=self.config.concurrency,
+        )
+        if self.config.cache_dir:
+            self.cache = ResponseCache(self.config.cache_dir, self.config.cache_size)
+        if self.config.checkpoint_dir:
+            self.checkpoint = Checkpoint(self.config.checkpoint_dir, self.config.resume)
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.client.__aexit__(*args)
+        self.evidence.close()
+        if self.cache:
+            self.cache.close()
+        if self.checkpoint:
+            self.checkpoint.close()
+
+    async def attempt(
+        self, document: str, probe: str = "other", sent: asyncio.Event = None
+    ) -> httpx.Response:
+        # sent is set once the request has made it through the semaphore and
+        # the rate limiter
+        async with self.semaphore:
+            for _ in range(self.config.throttle_retries + 1):
+                await self.limiter.acquire(self.config.url)
+                if sent:
+                    sent.set()
+                start = time.monotonic()
+                response = await async_request(
+                    client=self.client,
+                    command=self.config.command,
+                    url=self.config.url,
+                    headers=self.config.headers,
+                    params=self.config.params,
+                    json={"query": document},
+                )
+                seconds = time.monotonic() - start
+                self.latencies.add(seconds)
+                self.metrics.request(
+                    probe, self.request_size(document), len(response.content), seconds
+                )
+                if not self.limiter.record(self.config.url, response):
+                    break
+                self.metrics.count(probe, "throttled")
+            else:
+                # A throttling answer says nothing about the document, and
+                # probes would take every word of it for valid
+                raise Throttled(
+                    f"Still throttled after {self.config.throttle_retries} retries,"
+                    + " try again later or with a lower --host-rate"
+                )
+
+        return response
+
+    async def hedged(self, document: str, probe: str = "other") -> httpx.Response:
+        # A second copy of a request running later than most others is sent
+        # alongside it, and whichever answers first is used
+        threshold = None
+        if self.config.hedge_percentile:
+            threshold = self.latencies.percentile(self.config.hedge_percentile)
+
+        if threshold is None:
+            return await self.attempt(document, probe)
+
+        sent = asyncio.Event()
+        first = asyncio.ensure_future(self.attempt(document, probe, sent))
+        tasks = {first}
+        try:
+            # Time spent queued for the semaphore or the rate limiter says
+            # nothing about the target, so the clock starts once it is sent
+            waiting = asyncio.ensure_future(sent.wait())
+            await asyncio.wait({first, waiting}, return_when=asyncio.FIRST_COMPLETED)
+            waiting.cancel()
+
+            done, _ = await asyncio.wait(tasks, timeout=threshold)
+            if done:
+                return first.result()
+
+            logging.debug(f"Hedging request after {threshold:.3f} seconds")
+            tasks.add(asyncio.ensure_future(self.attempt(document, probe)))
+            pending = set(tasks)
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                # Prefer an answer over an error when both are in
+                for task in sorted(done, key=lambda t: t.exception() is not None):
+                    if task.exception() is None or not pending:
+                        return task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def fetch(self, document: str, probe: str = "other") -> httpx.Response:
+        for attempt in range(self.retry.retries + 1):
+            last = attempt == self.retry.retries
+            try:
+                response = await self.hedged(document, probe)
+            except httpx.TimeoutException as err:
+                self.metrics.count(probe, "timeouts")
+                if last:
+                    raise
+                logging.debug(f"Retrying after {type(err).__name__}")
+            else:
+                if response.status_code < 500 or last:
+                    return response
+                logging.debug(f"Retrying after status {response.status_code}")
+
+            self.metrics.count(probe, "retries")
+            await asyncio.sleep(self.retry.delay(attempt))
+
+    async def send(self, document: str, probe: str = "other") -> httpx.Response:
+        key = None
+        if self.cache or self.checkpoint:
+            key = ResponseCache.key(
+                self.config.command,
+                self.config.url,
+                self.config.headers,
+                self.config.params,
+                document,
+            )
+
+        # Answers already journaled by an interrupted run come first, then
+        # the ones cached by earlier runs
+        response = None
+        if self.checkpoint:
+            response = self.checkpoint.get(key)
+            if response:
+                self.metrics.count(probe, "cached")
+
+        if not response and self.cache:
+            response = self.cache.get(key)
+            if response:
+                self.metrics.count(probe, "cached")
+                if self.checkpoint:
+                    self.checkpoint.put(key, response)
+
+        if not response:
+            response = await self.fetch(document, probe)
+
+            if self.cache and response is not None:
+                self.cache.put(key, response)
+            if self.checkpoint and response is not None:
+                self.checkpoint.put(key, response)
+
+        # Replayed answers count too, a journaled 413 has to lower the budget
+        # as much as a fresh one
+        self.budget.record(self.request_size(document), response)
+        return response
 
 
 class TypeRef:
@@ -332,10 +715,10 @@ class Type:
 
     def to_json(self):
         # dirty hack
-        if not self.fields:
+        fields = self.fields
+        if not fields:
             field_typeref = TypeRef(name="String", kind="SCALAR")
-            dummy = Field("dummy", field_typeref)
-            self.fields.append(dummy)
+            fields = [Field("dummy", field_typeref)]
 
         output = {
             "description": None,
@@ -347,11 +730,11 @@ class Type:
         }
 
         if self.kind in ["OBJECT", "INTERFACE"]:
-            output["fields"] = [f.to_json() for f in self.fields]
+            output["fields"] = [f.to_json() for f in fields]
             output["inputFields"] = None
         elif self.kind == "INPUT_OBJECT":
             output["fields"] = None
-            output["inputFields"] = [f.to_json() for f in self.fields]
+            output["inputFields"] = [f.to_json() for f in fields]
 
         return output
 
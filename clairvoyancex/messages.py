@@ -0,0 +1,147 @@
+import re
+from typing import Dict
+from typing import List
+
+INVALID_FIELD = "INVALID_FIELD"
+SUBFIELDS_REQUIRED = "SUBFIELDS_REQUIRED"
+NO_SUBFIELDS = "NO_SUBFIELDS"
+UNKNOWN_ARGUMENT = "UNKNOWN_ARGUMENT"
+REQUIRED_ARGUMENT = "REQUIRED_ARGUMENT"
+EXPECTED_TYPE = "EXPECTED_TYPE"
+UNDEFINED_INPUT_FIELD = "UNDEFINED_INPUT_FIELD"
+REQUIRED_INPUT_FIELD = "REQUIRED_INPUT_FIELD"
+TOO_MANY_ERRORS = "TOO_MANY_ERRORS"
+UNKNOWN = "UNKNOWN"
+
+NAME = "[_A-Za-z][_0-9A-Za-z]*"
+TYPEREF = r"[_A-Za-z\[\]!][_0-9A-Za-z\[\]!]*"
+QUOTED_NAMES = rf'"{NAME}"(?:, "{NAME}")*,?(?: or "{NAME}")?'
+SUGGESTIONS = rf"(?: Did you mean (?P<suggested>{QUOTED_NAMES})\?)?"
+
+# Patterns are grouped by the first word of the message, so that a message is
+# only ever matched against the few patterns that can possibly fit it
+PATTERNS = {
+    "Cannot": [
+        (
+            INVALID_FIELD,
+            re.compile(
+                rf'Cannot query field "(?P<field>{NAME})" on type "(?P<type>{NAME})"\.'
+                + SUGGESTIONS
+            ),
+        ),
+        (
+            # On an abstract type, graphql-js suggests the types to spread
+            # instead of fields, and these are no fields of the type
+            INVALID_FIELD,
+            re.compile(
+                rf'Cannot query field "(?P<field>{NAME})" on type "(?P<type>{NAME})"\.'
+                + rf" Did you mean to use an inline fragment on {QUOTED_NAMES}\?"
+            ),
+        ),
+    ],
+    "Field": [
+        (
+            SUBFIELDS_REQUIRED,
+            re.compile(
+                rf'Field "(?P<field>{NAME})" of type "(?P<typeref>{TYPEREF})" must have a'
+                + rf' selection of subfields\. Did you mean "{NAME} \{{ \.\.\. \}}"\?'
+            ),
+        ),
+        (
+            NO_SUBFIELDS,
+            re.compile(
+                rf'Field "(?P<field>{NAME})" must not have a selection since type'
+                + rf' "(?P<typeref>{TYPEREF})" has no subfields\.'
+            ),
+        ),
+        (
+            REQUIRED_ARGUMENT,
+            re.compile(
+                rf'Field "(?P<field>{NAME})" argument "(?P<argument>{NAME})" of type'
+                + rf' "(?P<typeref>{TYPEREF})" is required, but it was not provided\.'
+            ),
+        ),
+        (
+            UNDEFINED_INPUT_FIELD,
+            re.compile(
+                rf'Field "(?P<field>{NAME})" is not defined by type (?P<type>{NAME})\.'
+                + SUGGESTIONS
+            ),
+        ),
+        (
+            REQUIRED_INPUT_FIELD,
+            re.compile(
+                rf"Field (?P<type>{NAME})\.(?P<field>{NAME}) of required type"
+                + rf" (?P<typeref>{TYPEREF}) was not provided\."
+            ),
+        ),
+    ],
+    "Unknown": [
+        (
+            UNKNOWN_ARGUMENT,
+            re.compile(
+                rf'Unknown argument "(?P<argument>{NAME})" on field "(?P<field>{NAME})"'
+                + rf' of type "(?P<type>{NAME})"\.'
+                + SUGGESTIONS
+            ),
+        ),
+        (
+            UNKNOWN_ARGUMENT,
+            re.compile(
+                rf'Unknown argument "(?P<argument>{NAME})" on field'
+                + rf' "(?P<type>{NAME})\.(?P<field>{NAME})"\.'
+                + SUGGESTIONS
+            ),
+        ),
+    ],
+    "Too": [
+        (
+            TOO_MANY_ERRORS,
+            re.compile(r"Too many validation errors, error limit reached\. Validation aborted\."),
+        ),
+    ],
+    "Expected": [
+        (
+            EXPECTED_TYPE,
+            re.compile(
+                rf"Expected type (?P<typeref>{TYPEREF}), found (?P<value>.+?)(?:; .*)?\."
+            ),
+        ),
+    ],
+}
+
+QUOTED = re.compile('"([^"]*)"')
+
+
+class ErrorMessage:
+    # Classifying is on the hot path of every probe, so the parts a message
+    # doesn't mention are left to these class defaults instead of being set
+    # one by one, and suggestions are only split when asked for
+    field = None
+    type = None
+    typeref = None
+    argument = None
+    value = None
+    suggested = None
+
+    def __init__(self, kind: str, message: str, parts: Dict[str, str] = None):
+        self.kind = kind
+        self.message = message
+        if parts:
+            self.__dict__.update(parts)
+
+    @property
+    def suggestions(self) -> List[str]:
+        return QUOTED.findall(self.suggested) if self.suggested else []
+
+    def __repr__(self) -> str:
+        return f"ErrorMessage({self.kind}, {self.message!r})"
+
+
+def classify(message: str) -> ErrorMessage:
+    for kind, pattern in PATTERNS.get(message[: message.find(" ")], ()):
+        match = pattern.fullmatch(message)
+        if match:
+            return ErrorMessage(kind, message, match.groupdict())
+
+    return ErrorMessage(UNKNOWN, message)
@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import array
+import bisect
+import collections
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+# Upper bounds of the latency histogram, in seconds
+BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+COUNTERS = {
+    "requests": "Requests sent to the target",
+    "cached": "Answers replayed from the cache or the checkpoint journal",
+    "bytes_sent": "Bytes of URL or body sent",
+    "bytes_received": "Bytes of response body received",
+    "timeouts": "Requests that timed out",
+    "retries": "Requests sent again after a timeout or a server error",
+    "throttled": "Requests sent again after the server asked to slow down",
+    "errors": "Validation errors parsed from responses",
+    "confirmed": "Fields found to take the arguments of an earlier field",
+    "unconfirmed": "Fields checked against the arguments of an earlier field in vain",
+}
+
+
+class Metrics:
+    """Counters and latencies of a run, by kind of probe.
+
+    Each request is counted under the probe that sent it, so that the report
+    tells where requests and time go. Latencies are kept whole for the
+    percentiles of the JSON report, and bucketed for Prometheus.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.counters = collections.defaultdict(collections.Counter)
+        self.latencies = collections.defaultdict(lambda: array.array("d"))
+        self.fields = 0
+
+    def request(self, probe: str, sent: int, received: int, seconds: float) -> None:
+        counters = self.counters[probe]
+        counters["requests"] += 1
+        counters["bytes_sent"] += sent
+        counters["bytes_received"] += received
+        self.latencies[probe].append(seconds)
+
+    def count(self, probe: str, name: str, n: int = 1) -> None:
+        self.counters[probe][name] += n
+
+    def total(self, name: str) -> int:
+        return sum(counters[name] for counters in self.counters.values())
+
+    def report(self) -> Dict[str, Any]:
+        probes = {}
+        for probe in sorted(self.counters):
+            probes[probe] = {name: self.counters[probe][name] for name in COUNTERS}
+            probes[probe]["latency"] = summary(self.latencies[probe])
+
+        requests = self.total("requests")
+        return {
+            "elapsed": round(time.monotonic() - self.started, 3),
+            **{name: self.total(name) for name in COUNTERS},
+            "latency": summary(
+                array.array("d", [s for samples in self.latencies.values() for s in samples])
+            ),
+            "fields": self.fields,
+            "requests_per_field": round(requests / self.fields, 2) if self.fields else None,
+            "probes": probes,
+        }
+
+    def prometheus(self) -> str:
+        lines = []
+        for name, description in COUNTERS.items():
+            metric = f"clairvoyance_{name}_total"
+            lines += [f"# HELP {metric} {description}", f"# TYPE {metric} counter"]
+            for probe in sorted(self.counters):
+                lines.append(f'{metric}{{probe="{probe}"}} {self.counters[probe][name]}')
+
+        metric = "clairvoyance_request_duration_seconds"
+        lines += [
+            f"# HELP {metric} Latency of requests to the target",
+            f"# TYPE {metric} histogram",
+        ]
+        for probe in sorted(self.latencies):
+            samples = sorted(self.latencies[probe])
+            for bound in BUCKETS:
+                count = bisect.bisect_right(samples, bound)
+                lines.append(f'{metric}_bucket{{probe="{probe}",le="{bound}"}} {count}')
+            lines.append(f'{metric}_bucket{{probe="{probe}",le="+Inf"}} {len(samples)}')
+            lines.append(f'{metric}_sum{{probe="{probe}"}} {sum(samples)}')
+            lines.append(f'{metric}_count{{probe="{probe}"}} {len(samples)}')
+
+        lines += [
+            "# HELP clairvoyance_fields Fields found so far",
+            "# TYPE clairvoyance_fields gauge",
+            f"clairvoyance_fields {self.fields}",
+            "# HELP clairvoyance_elapsed_seconds Time since the run started",
+            "# TYPE clairvoyance_elapsed_seconds gauge",
+            f"clairvoyance_elapsed_seconds {time.monotonic() - self.started:.3f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Optional[str], prometheus_path: Optional[str] = None) -> None:
+        # Written whole and then renamed, so a reader never sees half a file
+        for target, text in [
+            (path, lambda: json.dumps(self.report(), indent=4)),
+            (prometheus_path, self.prometheus),
+        ]:
+            if target:
+                with open(target + ".tmp", "w") as f:
+                    f.write(text())
+                os.replace(target + ".tmp", target)
+
+
+def summary(samples: List[float]) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+
+    ordered = sorted(samples)
+
+    def percentile(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))], 6)
+
+    return {
+        "p50": percentile(50),
+        "p95": percentile(95),
+        "p99": percentile(99),
+        "max": round(ordered[-1], 6),
+    }
@@ -1,389 +1,769 @@
-import re
+import asyncio
 import logging
+import itertools
 from typing import Any
 from typing import Set
 from typing import List
 from typing import Dict
+from typing import Tuple
 from typing import Optional
+from typing import Callable
+from typing import Iterable
+from typing import Awaitable
+from httpx import Response
 from httpx import ReadTimeout
 from json.decoder import JSONDecodeError
 
 from clairvoyancex import graphql
+from clairvoyancex import messages
+from clairvoyancex import candidates
+from clairvoyancex.buckets import BucketSizer
 
 
 def get_valid_fields(error_message: str) -> Set:
-    valid_fields = set()
+    message = messages.classify(error_message)
 
-    multiple_suggestions_re = 'Cannot query field "([_A-Za-z][_0-9A-Za-z]*)" on type "[_A-Za-z][_0-9A-Za-z]*". Did you mean (?P<multi>("[_A-Za-z][_0-9A-Za-z]*", )+)(or "(?P<last>[_A-Za-z][_0-9A-Za-z]*)")?\?'
-    or_suggestion_re = 'Cannot query field "[_A-Za-z][_0-9A-Za-z]*" on type "[_A-Za-z][_0-9A-Za-z]*". Did you mean "(?P<one>[_A-Za-z][_0-9A-Za-z]*)" or "(?P<two>[_A-Za-z][_0-9A-Za-z]*)"\?'
-    single_suggestion_re = 'Cannot query field "([_A-Za-z][_0-9A-Za-z]*)" on type "[_A-Za-z][_0-9A-Za-z]*". Did you mean "(?P<field>[_A-Za-z][_0-9A-Za-z]*)"\?'
-    invalid_field_re = (
-        'Cannot query field "[_A-Za-z][_0-9A-Za-z]*" on type "[_A-Za-z][_0-9A-Za-z]*".'
-    )
-    # TODO: this regex here more than one time, make it shared?
-    valid_field_regexes = [
-        'Field "(?P<field>[_A-Za-z][_0-9A-Za-z]*)" of type "(?P<typeref>[_A-Za-z\[\]!][_0-9a-zA-Z\[\]!]*)" must have a selection of subfields. Did you mean "[_A-Za-z][_0-9A-Za-z]* \{ ... \}"\?',
-    ]
+    if message.kind == messages.INVALID_FIELD:
+        return set(message.suggestions)
+    if message.kind == messages.SUBFIELDS_REQUIRED:
+        return {message.field}
+    if message.kind != messages.NO_SUBFIELDS:
+        logging.warning(f"Unknown error message: '{error_message}'")
 
-    no_fields_regex = 'Field "[_A-Za-z][_0-9A-Za-z]*" must not have a selection since type "[0-9a-zA-Z\[\]!]+" has no subfields.'
+    return set()
 
-    if re.fullmatch(no_fields_regex, error_message):
-        return valid_fields
 
-    if re.fullmatch(multiple_suggestions_re, error_message):
-        match = re.fullmatch(multiple_suggestions_re, error_message)
+def run_sync(probe: Callable[..., Awaitable[Any]], config: graphql.Config, *args) -> Any:
+    async def runner():
+        async with graphql.Session(config) as session:
+            return await probe(*args, session=session)
 
-        for m in match.group("multi").split(", "):
-            if m:
-                valid_fields.add(m.strip('"'))
+    return asyncio.run(runner())
 
-        if match.group("last"):
-            valid_fields.add(match.group("last"))
-    elif re.fullmatch(or_suggestion_re, error_message):
-        match = re.fullmatch(or_suggestion_re, error_message)
 
-        valid_fields.add(match.group("one"))
-        valid_fields.add(match.group("two"))
-    elif re.fullmatch(single_suggestion_re, error_message):
-        match = re.fullmatch(single_suggestion_re, error_message)
+async def async_probe_buckets(
+    wordlist: List[str],
+    sizer: BucketSizer,
+    probe: Callable[[List[str]], Awaitable[Tuple[Optional[Response], Any, bool]]],
+    concurrency: int,
+) -> List[Any]:
+    # Cuts the wordlist into buckets of the size the sizer settles on while
+    # the answers come in. probe returns the response (None on timeout), its
+    # result and whether the answer looked truncated. Rejected buckets are
+    # sent again in smaller pieces. Results come back in wordlist order
+    results = {}
+    retries = []
+    position = 0
+
+    async def worker() -> None:
+        nonlocal position
+
+        while retries or position < len(wordlist):
+            if retries:
+                start, bucket = retries.pop()
+            else:
+                start = position
+                bucket = wordlist[start : start + sizer.size]
+                position += len(bucket)
+
+            response, result, truncated = await probe(bucket)
+            if sizer.record(len(bucket), response, truncated):
+                results[start] = result
+            elif len(bucket) <= sizer.minimum:
+                logging.warning(f"Giving up on {len(bucket)} words at {start} for {sizer.name}")
+                results[start] = result
+            else:
+                for i in reversed(range(0, len(bucket), sizer.size)):
+                    retries.append((start + i, bucket[i : i + sizer.size]))
 
-        valid_fields.add(match.group("field"))
-    elif re.fullmatch(invalid_field_re, error_message):
-        pass
-    elif re.fullmatch(valid_field_regexes[0], error_message):
-        match = re.fullmatch(valid_field_regexes[0], error_message)
-        valid_fields.add(match.group("field"))
-    else:
-        logging.warning(f"Unknown error message: '{error_message}'")
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
 
-    return valid_fields
+    return [results[start] for start in sorted(results)]
 
 
-def probe_valid_fields(
-    wordlist: Set, config: graphql.Config, input_document: str
-) -> Set[str]:
-    # We're assuming all fields from wordlist are valid,
-    # then remove fields that produce an error message
-    valid_fields = set(wordlist)
-
-    with graphql.new_client(
-            http2=config.http2,
-            verify=config.verify,
-            proxies=config.proxy,
-            timeout=config.timeout,
-            ) as client:
-        for i in range(0, len(wordlist), config.bucket_size):
-            bucket = wordlist[i : i + config.bucket_size]
-    
-            document = input_document.replace("FUZZ", " ".join(bucket))
-    
-            # TODO: implement retries in case of failure
-            try:
-                response = graphql.request(
-                    client=client,
-                    command=config.command,
-                    url=config.url,
-                    headers=config.headers,
-                    params=config.params,
-                    json={"query": document},
-                )
-            except ReadTimeout:
-                logging.warning('Timeout on function probe_valid_fields with value '
-                    + f'{document=}. Try increasing timeout with option "-t". Skipping request')
-                continue
+async def async_probe_each(
+    items: Iterable[Any],
+    probe: Callable[[Any], Awaitable[Any]],
+    concurrency: int,
+) -> List[Any]:
+    # The fixed size counterpart of async_probe_buckets: workers take items
+    # one at a time, so only as many are sliced and rendered as are in flight.
+    # Results come back in items order
+    results = {}
+    items = enumerate(items)
 
-            try:
-                errors = response.json().get("errors", [])
-            except JSONDecodeError:
-                logging.warning(f'Invalid response for request with {document=}')
-                continue 
-            else:
-                logging.debug(
-                    f"Sent {len(bucket)} fields, recieved {len(errors)} errors in {response.elapsed.total_seconds()} seconds"
-                )
-    
-            for error in errors:
-                error_message = error["message"]
-    
-                if (
-                    "must not have a selection since type" in error_message
-                    and "has no subfields" in error_message
-                ):
-                    return set()
-    
-                # First remove field if it produced an "Cannot query field" error
-                match = re.search(
-                    'Cannot query field "(?P<invalid_field>[_A-Za-z][_0-9A-Za-z]*)"',
-                    error_message,
-                )
-                if match:
-                    valid_fields.discard(match.group("invalid_field"))
-    
-                # Second obtain field suggestions from error message
-                valid_fields |= get_valid_fields(error_message)
+    async def worker() -> None:
+        for i, item in items:
+            results[i] = await probe(item)
 
-    return valid_fields
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
 
+    return [results[i] for i in sorted(results)]
 
-def probe_valid_args(
-    field: str, wordlist: Set, config: graphql.Config, input_document: str
+
+async def async_probe_valid_fields(
+    wordlist: List[str],
+    config: graphql.Config,
+    input_document: str,
+    session: graphql.Session,
 ) -> Set[str]:
-    valid_args = set(wordlist)
+    def render(bucket: List[str]) -> str:
+        return input_document.replace("FUZZ", " ".join(bucket))
 
-    document = input_document.replace(
-        "FUZZ", f"{field}({', '.join([w + ': 7' for w in wordlist])})"
-    )
+    async def send_bucket(
+        bucket: List[str],
+    ) -> Tuple[Optional[Response], List[messages.ErrorMessage]]:
+        document = render(bucket)
 
-    with graphql.new_client(
-            http2=config.http2,
-            verify=config.verify,
-            proxies=config.proxy,
-            timeout=config.timeout,
-            ) as client:
         try:
-            response = graphql.request(
-                client=client,
-                command=config.command,
-                url=config.url,
-                headers=config.headers,
-                params=config.params,
-                json={"query": document},
-            )
+            response = await session.send(document, "fields")
         except ReadTimeout:
-            logging.warning('Timeout on function probe_valid_args with value '
-                + f'{document=}. Try increasing timeout with option "-t". Skipping request')
-            return set()
-        else:
-            errors = response.json().get("errors", [])
+            logging.warning('Timeout on function probe_valid_fields with value '
+                + f'{document=}. Try increasing timeout with option "-t" or retries with "--retries". Skipping request')
+            return None, []
 
-    for error in errors:
-        error_message = error["message"]
+        if response.status_code in BucketSizer.too_large:
+            return response, []
 
+        try:
+            errors = response.json().get("errors", [])
+        except JSONDecodeError:
+            logging.warning(f'Invalid response for request with {document=}')
+            return response, []
+        else:
+            logging.debug(
+                f"Sent {len(bucket)} fields, recieved {len(errors)} errors in {response.elapsed.total_seconds()} seconds"
+            )
+        session.metrics.count("fields", "errors", len(errors))
+
+        classified = [messages.classify(error["message"]) for error in errors]
+        session.evidence.add_fields(input_document, classified)
+        return response, classified
+
+    async def probe_pieces(
+        pieces: List[List[str]],
+    ) -> Tuple[Optional[Response], List[messages.ErrorMessage], bool]:
+        response, classified, truncated = None, [], False
+        for more_response, more, rest in await asyncio.gather(
+            *[probe_bucket(piece) for piece in pieces]
+        ):
+            if response is None:
+                response = more_response
+            classified.extend(more)
+            truncated = truncated or rest
+
+        return response, classified, truncated
+
+    async def probe_bucket(
+        bucket: List[str],
+    ) -> Tuple[Optional[Response], List[messages.ErrorMessage], bool]:
+        # Buckets too large for the server are sent as several documents
+        size = session.fit(bucket, render)
+        if size < len(bucket):
+            return await probe_pieces(
+                [bucket[i : i + size] for i in range(0, len(bucket), size)]
+            )
+
+        response, classified = await send_bucket(bucket)
+        if response is not None and response.status_code in BucketSizer.too_large:
+            # Halving always gets down to single words, whatever the budget
+            # learned from the answer
+            if len(bucket) > 1:
+                half = len(bucket) // 2
+                return await probe_pieces([bucket[:half], bucket[half:]])
+            logging.warning(f"Server rejects documents with the single field {bucket[0]}")
+
+        # An answer without errors, or that isn't JSON, tells nothing about
+        # how many errors the server reports
         if (
-            "must not have a selection since type" in error_message
-            and "has no subfields" in error_message
+            response is None
+            or not classified
+            or any(message.kind == messages.NO_SUBFIELDS for message in classified)
         ):
-            return set()
+            return response, classified, False
+
+        capped = any(message.kind == messages.TOO_MANY_ERRORS for message in classified)
+        classified = [m for m in classified if m.kind != messages.TOO_MANY_ERRORS]
+        answered = {message.field for message in classified}
+        sizer = session.sizer("fields")
+        if not sizer.truncated(bucket, answered, len(classified), capped):
+            return response, classified, False
+
+        # Only the words the errors did not get to are sent again
+        tail = sizer.unsettled(bucket, answered)
+        if len(tail) == len(bucket):
+            return response, classified, True
+
+        _, more, truncated = await probe_pieces(sizer.pieces(tail))
+        return response, classified + more, truncated
+
+    async def probe(
+        bucket: List[str],
+    ) -> Tuple[Optional[Response], Tuple[List[str], List[messages.ErrorMessage]], bool]:
+        response, classified, truncated = await probe_bucket(bucket)
+        return response, (bucket, classified), truncated
+
+    if config.adaptive_buckets:
+        responses = await async_probe_buckets(
+            wordlist, session.sizer("fields"), probe, config.concurrency
+        )
+    else:
+        buckets = (
+            wordlist[i : i + config.bucket_size]
+            for i in range(0, len(wordlist), config.bucket_size)
+        )
+        responses = await async_probe_each(buckets, probe, config.concurrency)
+        responses = [result for _, result, _ in responses]
+
+    # We're assuming all fields from a bucket are valid,
+    # then remove fields that produce an error message.
+    # Errors are replayed in bucket order so the result matches a sequential run
+    valid_fields = set()
 
-        # First remove arg if it produced an "Unknown argument" error
-        match = re.search(
-            'Unknown argument "(?P<invalid_arg>[_A-Za-z][_0-9A-Za-z]*)" on field "[_A-Za-z][_0-9A-Za-z.]*"',
-            error_message,
+    for bucket, classified in responses:
+        invalid = set()
+        for message in classified:
+            if message.kind == messages.NO_SUBFIELDS:
+                return set()
+
+            if message.kind == messages.INVALID_FIELD:
+                # First remove field if it produced an "Cannot query field" error
+                invalid.add(message.field)
+                # Second obtain field suggestions from error message
+                valid_fields.update(message.suggestions)
+            elif message.kind == messages.SUBFIELDS_REQUIRED:
+                valid_fields.add(message.field)
+            elif message.kind != messages.REQUIRED_ARGUMENT:
+                logging.warning(f"Unknown error message: '{message.message}'")
+
+        valid_fields.update(w for w in bucket if w not in invalid)
+
+    return valid_fields
+
+
+def probe_valid_fields(
+    wordlist: List[str], config: graphql.Config, input_document: str
+) -> Set[str]:
+    return run_sync(async_probe_valid_fields, config, wordlist, config, input_document)
+
+
+def pack_units(pairs: List[Tuple[str, str]]) -> List[Tuple[str, List[str]]]:
+    # Consecutive (field, argument) pairs back into units of one field
+    return [
+        (field, [w for _, w in group])
+        for field, group in itertools.groupby(pairs, key=lambda pair: pair[0])
+    ]
+
+
+def render_pack(units: List[Tuple[str, List[str]]], input_document: str) -> str:
+    if len(units) == 1:
+        field, wordlist = units[0]
+        selections = f"{field}({', '.join([w + ': 7' for w in wordlist])})"
+    else:
+        selections = " ".join(
+            [
+                f"a{i}: {field}({', '.join([w + ': 7' for w in wordlist])})"
+                for i, (field, wordlist) in enumerate(units)
+            ]
         )
-        if match:
-            valid_args.discard(match.group("invalid_arg"))
+    return input_document.replace("FUZZ", selections)
 
-        # Second obtain args suggestions from error message
-        valid_args |= get_valid_args(error_message)
 
+async def async_probe_pack_pieces(
+    pieces: List[List[Tuple[str, str]]],
+    config: graphql.Config,
+    input_document: str,
+    session: graphql.Session,
+) -> Tuple[Optional[Response], Dict[str, Set[str]], bool]:
+    response, valid_args, truncated = None, {}, False
+    for more_response, more, rest in await asyncio.gather(
+        *[
+            async_probe_pack(pack_units(piece), config, input_document, session)
+            for piece in pieces
+        ]
+    ):
+        if response is None:
+            response = more_response
+        for field, args in more.items():
+            valid_args.setdefault(field, set()).update(args)
+        truncated = truncated or rest
+
+    return response, valid_args, truncated
+
+
+async def async_probe_pack(
+    units: List[Tuple[str, List[str]]],
+    config: graphql.Config,
+    input_document: str,
+    session: graphql.Session,
+) -> Tuple[Optional[Response], Dict[str, Set[str]], bool]:
+    # Each unit is a field with a bucket of candidate arguments. Aliases keep
+    # several units in one document without merge conflicts, and errors are
+    # split back per field since they name the field rather than the alias
+    valid_args = {}
+    for field, wordlist in units:
+        valid_args.setdefault(field, set()).update(wordlist)
+
+    # Packs too large for the server are sent as several documents
+    sent = [(field, w) for field, wordlist in units for w in wordlist]
+    size = session.fit(sent, lambda pairs: render_pack(pack_units(pairs), input_document))
+    if size < len(sent):
+        return await async_probe_pack_pieces(
+            [sent[i : i + size] for i in range(0, len(sent), size)],
+            config,
+            input_document,
+            session,
+        )
+
+    document = render_pack(units, input_document)
+
+    try:
+        response = await session.send(document, "args")
+    except ReadTimeout:
+        logging.warning('Timeout on function probe_valid_args with value '
+            + f'{document=}. Try increasing timeout with option "-t" or retries with "--retries". Skipping request')
+        return None, {field: set() for field in valid_args}, False
+
+    if response.status_code in BucketSizer.too_large and len(sent) > 1:
+        half = len(sent) // 2
+        return await async_probe_pack_pieces(
+            [sent[:half], sent[half:]], config, input_document, session
+        )
+
+    try:
+        errors = response.json().get("errors", [])
+    except JSONDecodeError:
+        logging.warning(f'Invalid response for request with {document=}')
+        return response, {field: set() for field in valid_args}, False
+    session.metrics.count("args", "errors", len(errors))
+
+    classified = [messages.classify(error["message"]) for error in errors]
+    session.evidence.add_args(input_document, classified)
+    capped = any(message.kind == messages.TOO_MANY_ERRORS for message in classified)
+    classified = [m for m in classified if m.kind != messages.TOO_MANY_ERRORS]
+    answered = {(message.field, message.argument) for message in classified}
+    sizer = session.sizer("args")
+    truncated = bool(errors) and sizer.truncated(sent, answered, len(classified), capped)
+
+    for message in classified:
+        if message.kind == messages.NO_SUBFIELDS:
+            if message.field in valid_args:
+                valid_args[message.field] = set()
+                continue
+            return response, {field: set() for field in valid_args}, False
+
+        if message.kind == messages.UNKNOWN_ARGUMENT:
+            if message.field in valid_args:
+                # First remove arg if it produced an "Unknown argument" error
+                valid_args[message.field].discard(message.argument)
+                # Second obtain args suggestions from error message
+                valid_args[message.field].update(message.suggestions)
+        elif message.kind not in [
+            messages.SUBFIELDS_REQUIRED,
+            messages.REQUIRED_ARGUMENT,
+        ]:
+            logging.warning(f"Unknown error message: {message.message}")
+
+    tail = sizer.unsettled(sent, answered) if truncated else sent
+    if len(tail) == len(sent):
+        return response, valid_args, truncated
+
+    # Arguments the errors did not get to are sent again, still packed
+    for field, w in tail:
+        valid_args[field].discard(w)
+    _, more, truncated = await async_probe_pack_pieces(
+        sizer.pieces(tail), config, input_document, session
+    )
+    for field, args in more.items():
+        valid_args[field] |= args
+
+    return response, valid_args, truncated
+
+
+async def async_probe_packed_args(
+    units: List[Tuple[str, List[str]]],
+    config: graphql.Config,
+    input_document: str,
+    session: graphql.Session,
+) -> Dict[str, Set[str]]:
+    _, valid_args, _ = await async_probe_pack(units, config, input_document, session)
     return valid_args
 
 
-def probe_args(
-    field: str, wordlist: Set, config: graphql.Config, input_document: str
+async def async_probe_valid_args(
+    field: str,
+    wordlist: List[str],
+    config: graphql.Config,
+    input_document: str,
+    session: graphql.Session,
+) -> Set[str]:
+    valid_args = await async_probe_packed_args(
+        [(field, wordlist)], config, input_document, session
+    )
+    return valid_args[field]
+
+
+def probe_valid_args(
+    field: str, wordlist: List[str], config: graphql.Config, input_document: str
 ) -> Set[str]:
-    valid_args = set()
+    return run_sync(
+        async_probe_valid_args, config, field, wordlist, config, input_document
+    )
+
+
+async def async_probe_fields_args(
+    fields: List[str],
+    wordlist: List[str],
+    config: graphql.Config,
+    input_document: str,
+    session: graphql.Session,
+) -> Dict[str, Set[str]]:
+    if config.adaptive_buckets:
+        # Each group of fields walks the wordlist on its own, with the bucket
+        # size shared by all of them
+        sizer = session.sizer("args")
+
+        async def probe_group(group: List[str]) -> List[Dict[str, Set[str]]]:
+            async def probe(bucket: List[str]):
+                units = [(field, bucket) for field in group]
+                return await async_probe_pack(units, config, input_document, session)
+
+            return await async_probe_buckets(wordlist, sizer, probe, config.concurrency)
+
+        groups = [
+            fields[i : i + config.pack_fields]
+            for i in range(0, len(fields), config.pack_fields)
+        ]
+        results = await asyncio.gather(*[probe_group(group) for group in groups])
+        results = [result for group in results for result in group]
+    else:
+        # Every field gets every bucket; consecutive units share a bucket, so a
+        # document carries the same words for up to config.pack_fields fields
+        units = (
+            (field, wordlist[i : i + config.bucket_size])
+            for i in range(0, len(wordlist), config.bucket_size)
+            for field in fields
+        )
+        packs = iter(lambda: list(itertools.islice(units, config.pack_fields)), [])
 
-    for i in range(0, len(wordlist), config.bucket_size):
-        bucket = wordlist[i : i + config.bucket_size]
-        valid_args |= probe_valid_args(field, bucket, config, input_document)
+        async def probe(pack: List[Tuple[str, List[str]]]) -> Dict[str, Set[str]]:
+            return await async_probe_packed_args(pack, config, input_document, session)
+
+        results = await async_probe_each(packs, probe, config.concurrency)
+
+    valid_args = {field: set() for field in fields}
+    for result in results:
+        for field, args in result.items():
+            valid_args[field] |= args
 
     return valid_args
 
 
-def get_valid_args(error_message: str) -> Set[str]:
-    valid_args = set()
+def probe_fields_args(
+    fields: List[str], wordlist: List[str], config: graphql.Config, input_document: str
+) -> Dict[str, Set[str]]:
+    return run_sync(
+        async_probe_fields_args, config, fields, wordlist, config, input_document
+    )
 
-    skip_regexes = [
-        'Unknown argument "[_A-Za-z][_0-9A-Za-z]*" on field "[_A-Za-z][_0-9A-Za-z]*" of type "[_A-Za-z][_0-9A-Za-z]*".',
-        'Field "[_A-Za-z][_0-9A-Za-z]*" of type "[_A-Za-z\[\]!][a-zA-Z\[\]!]*" must have a selection of subfields. Did you mean "[_A-Za-z][_0-9A-Za-z]* \{ ... \}"\?',
-        'Field "[_A-Za-z][_0-9A-Za-z]*" argument "[_A-Za-z][_0-9A-Za-z]*" of type "[_A-Za-z\[\]!][_0-9a-zA-Z\[\]!]*" is required, but it was not provided.',
-        'Unknown argument "[_A-Za-z][_0-9A-Za-z]*" on field "[_A-Za-z][_0-9A-Za-z.]*"\.',
-    ]
 
-    single_suggestion_regexes = [
-        'Unknown argument "[_0-9a-zA-Z\[\]!]*" on field "[_0-9a-zA-Z\[\]!]*" of type "[_0-9a-zA-Z\[\]!]*". Did you mean "(?P<arg>[_0-9a-zA-Z\[\]!]*)"\?'
-    ]
+async def async_discover(
+    probe: Callable[[List[str]], Awaitable[Dict[str, Set[str]]]],
+    wordlist: List[str],
+    seeds: Set[str],
+    config: graphql.Config,
+    max_rounds: int = 10,
+) -> Dict[str, Set[str]]:
+    # Sends names found elsewhere in the run and the head of the wordlist
+    # first, then variants of every name found until they stop turning up new
+    # ones, for at most max_rounds. Suggestions do most of the work: a wrong
+    # variant is answered with the real names spelled like it
+    found = {}
+    probed = set()
+
+    async def sweep(words: List[str]) -> None:
+        words = [w for w in words if w not in probed]
+        probed.update(words)
+        if words:
+            for key, names in (await probe(words)).items():
+                found.setdefault(key, set()).update(names)
+
+    await sweep(sorted(seeds) + list(wordlist[: config.discover_words]))
+    words = candidates.generate(set().union(*found.values()), probed)
+    for _ in range(max_rounds):
+        if not words:
+            break
+        await sweep(words)
+        words = candidates.generate(set().union(*found.values()), probed)
+    if words:
+        logging.warning(
+            f"Stopped discovering after {max_rounds} rounds with {len(words)} variants left untried"
+        )
+
+    logging.debug(f"Discovered {len(set().union(*found.values()))} names with {len(probed)} words")
+    return found
+
+
+async def async_discover_fields(
+    wordlist: List[str],
+    config: graphql.Config,
+    input_document: str,
+    session: graphql.Session,
+) -> Set[str]:
+    async def probe(words: List[str]) -> Dict[str, Set[str]]:
+        return {"": await async_probe_valid_fields(words, config, input_document, session)}
+
+    seeds = session.names.setdefault("fields", set())
+    found = await async_discover(probe, wordlist, seeds, config)
+    valid_fields = found.get("", set())
+    seeds |= valid_fields
+    return valid_fields
+
+
+async def async_discover_args(
+    fields: List[str],
+    wordlist: List[str],
+    config: graphql.Config,
+    input_document: str,
+    session: graphql.Session,
+) -> Dict[str, Set[str]]:
+    async def probe(words: List[str]) -> Dict[str, Set[str]]:
+        return await async_probe_fields_args(fields, words, config, input_document, session)
+
+    seeds = session.names.setdefault("args", set())
+    found = await async_discover(probe, wordlist, seeds, config)
+    valid_args = {field: found.get(field, set()) for field in fields}
+    seeds.update(*valid_args.values())
+    return valid_args
 
-    double_suggestion_regexes = [
-        'Unknown argument "[_0-9a-zA-Z\[\]!]*" on field "[_0-9a-zA-Z\[\]!]*" of type "[_A-Za-z\[\]!][_0-9a-zA-Z\[\]!]*". Did you mean "(?P<first>[_0-9a-zA-Z\[\]!]*)" or "(?P<second>[_0-9a-zA-Z\[\]!]*)"\?'
+
+async def async_confirm_args(
+    fields: List[graphql.Field],
+    config: graphql.Config,
+    input_document: str,
+    session: graphql.Session,
+) -> Dict[str, Set[str]]:
+    # A field named like an earlier one, or returning the same type, likely
+    # takes the same arguments. When it accepts exactly those, it is assumed
+    # to have no others, which saves sweeping the wordlist for it. Only sets
+    # of arguments several fields took are worth a request, and every other
+    # argument name found so far goes along to catch fields taking more
+    known = set().union(*session.signatures)
+    signatures = {}
+    for field in fields:
+        alike = [
+            session.field_args.get(field.name),
+            session.type_args.get(field.type.name),
+        ]
+        signatures[field.name] = [
+            s for s in alike if s and session.signatures[s] >= config.reuse_args_min
+        ]
+    units = []
+    for name, sets in signatures.items():
+        if sets:
+            words = set().union(*sets)
+            extra = sorted(known - words)[: max(config.bucket_size - len(words), 0)]
+            units.append((name, sorted(words) + extra))
+    if not units:
+        return {}
+
+    packs = [
+        units[i : i + config.pack_fields]
+        for i in range(0, len(units), config.pack_fields)
     ]
+    results = await asyncio.gather(
+        *[async_probe_packed_args(pack, config, input_document, session) for pack in packs]
+    )
+
+    confirmed = {}
+    for result in results:
+        for name, args in result.items():
+            if frozenset(args) in signatures[name]:
+                logging.debug(f"Arguments of {name} match an earlier field: {args}")
+                confirmed[name] = args
+            else:
+                logging.debug(f"Arguments of {name} match no earlier field: {args}")
+
+    session.metrics.count("args", "confirmed", len(confirmed))
+    session.metrics.count("args", "unconfirmed", len(units) - len(confirmed))
+    logging.info(
+        f"Skipped argument sweep of {len(confirmed)} of {len(units)} fields"
+        + f" at the cost of {len(packs)} requests"
+    )
+    return confirmed
+
+
+async def async_probe_args(
+    field: str,
+    wordlist: List[str],
+    config: graphql.Config,
+    input_document: str,
+    session: graphql.Session,
+) -> Set[str]:
+    valid_args = await async_probe_fields_args(
+        [field], wordlist, config, input_document, session
+    )
+    return valid_args[field]
+
 
-    for regex in skip_regexes:
-        if re.fullmatch(regex, error_message):
-            return set()
+def probe_args(
+    field: str, wordlist: List[str], config: graphql.Config, input_document: str
+) -> Set[str]:
+    return run_sync(async_probe_args, config, field, wordlist, config, input_document)
 
-    for regex in single_suggestion_regexes:
-        if re.fullmatch(regex, error_message):
-            match = re.fullmatch(regex, error_message)
-            valid_args.add(match.group("arg"))
 
-    for regex in double_suggestion_regexes:
-        match = re.fullmatch(regex, error_message)
-        if match:
-            valid_args.add(match.group("first"))
-            valid_args.add(match.group("second"))
+def get_valid_args(error_message: str) -> Set[str]:
+    message = messages.classify(error_message)
 
-    if not valid_args:
+    if message.kind == messages.UNKNOWN_ARGUMENT:
+        return set(message.suggestions)
+    if message.kind not in [messages.SUBFIELDS_REQUIRED, messages.REQUIRED_ARGUMENT]:
         logging.warning(f"Unknown error message: {error_message}")
 
-    return valid_args
+    return set()
 
 
 def get_valid_input_fields(error_message: str) -> Set:
-    valid_fields = set()
+    message = messages.classify(error_message)
 
-    single_suggestion_re = "Field [_0-9a-zA-Z\[\]!]*.(?P<field>[_0-9a-zA-Z\[\]!]*) of required type [_A-Za-z\[\]!][_0-9a-zA-Z\[\]!]* was not provided."
+    if message.kind == messages.REQUIRED_INPUT_FIELD:
+        return {message.field}
 
-    if re.fullmatch(single_suggestion_re, error_message):
-        match = re.fullmatch(single_suggestion_re, error_message)
-        if match.group("field"):
-            valid_fields.add(match.group("field"))
-        else:
-            logging.warning(f"Unknown error message: '{error_message}'")
-
-    return valid_fields
+    return set()
 
 
-def probe_input_fields(
-    field: str, argument: str, wordlist: Set, config: graphql.Config
+async def async_probe_input_fields(
+    field: str,
+    argument: str,
+    wordlist: List[str],
+    config: graphql.Config,
+    session: graphql.Session,
 ) -> Set[str]:
     valid_input_fields = set(wordlist)
 
     document = f"mutation {{ {field}({argument}: {{ {', '.join([w + ': 7' for w in wordlist])} }}) }}"
 
-    with graphql.new_client(
-            http2=config.http2,
-            verify=config.verify,
-            proxies=config.proxy,
-            timeout=config.timeout,
-            ) as client:
-        try:
-            response = graphql.request(
-                client=client,
-                command=config.command,
-                url=config.url,
-                headers=config.headers,
-                params=config.params,
-                json={"query": document},
-            )
-        except ReadTimeout:
-            logging.warning('Timeout on function probe_input_fields with value '
-                + f'{document=}. Try increasing timeout with option "-t". Skipping request.')
-            return set()
-        else:
-            errors = response.json().get("errors", [])
+    try:
+        response = await session.send(document, "input_fields")
+    except ReadTimeout:
+        logging.warning('Timeout on function probe_input_fields with value '
+            + f'{document=}. Try increasing timeout with option "-t" or retries with "--retries". Skipping request.')
+        return set()
+    else:
+        errors = response.json().get("errors", [])
+        session.metrics.count("input_fields", "errors", len(errors))
 
     for error in errors:
-        error_message = error["message"]
+        message = messages.classify(error["message"])
 
         # First remove field if it produced an error
-        match = re.search(
-            'Field "(?P<invalid_field>[_0-9a-zA-Z\[\]!]*)" is not defined by type [_0-9a-zA-Z\[\]!]*.',
-            error_message,
-        )
-        if match:
-            valid_input_fields.discard(match.group("invalid_field"))
+        if message.kind == messages.UNDEFINED_INPUT_FIELD:
+            valid_input_fields.discard(message.field)
 
         # Second obtain field suggestions from error message
-        valid_input_fields |= get_valid_input_fields(error_message)
+        if message.kind == messages.REQUIRED_INPUT_FIELD:
+            valid_input_fields.add(message.field)
 
     return valid_input_fields
 
 
-def get_typeref(error_message: str, context: str) -> Optional[graphql.TypeRef]:
-    typeref = None
+def probe_input_fields(
+    field: str, argument: str, wordlist: List[str], config: graphql.Config
+) -> Set[str]:
+    return run_sync(
+        async_probe_input_fields, config, field, argument, wordlist, config
+    )
 
-    field_regexes = [
-        'Field "[_0-9a-zA-Z\[\]!]*" of type "(?P<typeref>[_A-Za-z\[\]!][_0-9a-zA-Z\[\]!]*)" must have a selection of subfields. Did you mean "[_0-9a-zA-Z\[\]!]* \{ ... \}"\?',
-        'Field "[_0-9a-zA-Z\[\]!]*" must not have a selection since type "(?P<typeref>[_A-Za-z\[\]!][_0-9a-zA-Z\[\]!]*)" has no subfields.',
-        'Cannot query field "[_0-9a-zA-Z\[\]!]*" on type "(?P<typeref>[_A-Za-z\[\]!][_0-9a-zA-Z\[\]!]*)".',
-    ]
-    arg_regexes = [
-        'Field "[_0-9a-zA-Z\[\]!]*" argument "[_0-9a-zA-Z\[\]!]*" of type "(?P<typeref>[_A-Za-z\[\]!][_0-9a-zA-Z\[\]!]*)" is required, but it was not provided.',
-        "Expected type (?P<typeref>[_A-Za-z\[\]!][_0-9a-zA-Z\[\]!]*), found .+\.",
-    ]
-    arg_skip_regexes = [
-        'Field "[_0-9a-zA-Z\[\]!]*" of type "[_A-Za-z\[\]!][_0-9a-zA-Z\[\]!]*" must have a selection of subfields\. Did you mean "[_0-9a-zA-Z\[\]!]* \{ \.\.\. \}"\?'
-    ]
 
-    match = None
+def parse_typeref(tk: str) -> graphql.TypeRef:
+    name = tk.replace("!", "").replace("[", "").replace("]", "")
+    kind = ""
+    if name.endswith("Input"):
+        kind = "INPUT_OBJECT"
+    elif name in ["Int", "Float", "String", "Boolean", "ID"]:
+        kind = "SCALAR"
+    else:
+        kind = "OBJECT"
+    is_list = True if "[" and "]" in tk else False
+    non_null_item = True if is_list and "!]" in tk else False
+    non_null = True if tk.endswith("!") else False
+
+    return graphql.TypeRef(
+        name=name,
+        kind=kind,
+        is_list=is_list,
+        non_null_item=non_null_item,
+        non_null=non_null,
+    )
+
 
+def get_typeref(
+    error_message: str, context: str, argument: str = None
+) -> Optional[graphql.TypeRef]:
+    # With argument, errors about other required arguments are passed over
+    message = messages.classify(error_message)
+
+    tk = None
     if context == "Field":
-        for regex in field_regexes:
-            if re.fullmatch(regex, error_message):
-                match = re.fullmatch(regex, error_message)
-                break
+        if message.kind in [messages.SUBFIELDS_REQUIRED, messages.NO_SUBFIELDS]:
+            tk = message.typeref
+        elif message.kind == messages.INVALID_FIELD and not message.suggestions:
+            tk = message.type
     elif context == "InputValue":
-        for regex in arg_skip_regexes:
-            if re.fullmatch(regex, error_message):
-                return None
+        if message.kind == messages.SUBFIELDS_REQUIRED:
+            return None
+        if (
+            message.kind == messages.REQUIRED_ARGUMENT
+            and argument is not None
+            and message.argument != argument
+        ):
+            return None
+        if message.kind in [messages.REQUIRED_ARGUMENT, messages.EXPECTED_TYPE]:
+            tk = message.typeref
 
-        for regex in arg_regexes:
-            if re.fullmatch(regex, error_message):
-                match = re.fullmatch(regex, error_message)
-                break
+    if not tk:
+        logging.warning(f"Unknown error message: '{error_message}'")
+        return None
 
-    if match:
-        tk = match.group("typeref")
+    return parse_typeref(tk)
 
-        name = tk.replace("!", "").replace("[", "").replace("]", "")
-        kind = ""
-        if name.endswith("Input"):
-            kind = "INPUT_OBJECT"
-        elif name in ["Int", "Float", "String", "Boolean", "ID"]:
-            kind = "SCALAR"
-        else:
-            kind = "OBJECT"
-        is_list = True if "[" and "]" in tk else False
-        non_null_item = True if is_list and "!]" in tk else False
-        non_null = True if tk.endswith("!") else False
-
-        typeref = graphql.TypeRef(
-            name=name,
-            kind=kind,
-            is_list=is_list,
-            non_null_item=non_null_item,
-            non_null=non_null,
-        )
-    else:
-        logging.warning(f"Unknown error message: '{error_message}'")
 
-    return typeref
+def get_field_typeref(error_message: str) -> Optional[Tuple[str, graphql.TypeRef]]:
+    # Only the messages that name the offending field can be mapped back to it
+    # when many fields share one document
+    message = messages.classify(error_message)
 
+    if message.kind in [messages.SUBFIELDS_REQUIRED, messages.NO_SUBFIELDS]:
+        return message.field, parse_typeref(message.typeref)
 
-def probe_typeref(
-    documents: List[str], context: str, config: graphql.Config
+    return None
+
+
+async def async_probe_typeref(
+    documents: List[str],
+    context: str,
+    config: graphql.Config,
+    session: graphql.Session,
+    argument: str = None,
 ) -> Optional[graphql.TypeRef]:
     typeref = None
 
-    with graphql.new_client(
-            http2=config.http2,
-            verify=config.verify,
-            proxies=config.proxy,
-            timeout=config.timeout,
-            ) as client:
-        for document in documents:
-            try:
-                response = graphql.request(
-                    client=client,
-                    command=config.command,
-                    url=config.url,
-                    headers=config.headers,
-                    params=config.params,
-                    json={"query": document},
-                )
-            except ReadTimeout:
-                logging.warning('Timeout on function probe_typeref with value '
-                    + f'{document=}. Try increasing timeout with option "-t". Skipping request')
-                return None
-            else:
-                errors = response.json().get("errors", [])
+    # Documents are fallbacks for each other, so they are sent one by one
+    for document in documents:
+        try:
+            response = await session.send(document, "typeref")
+        except ReadTimeout:
+            logging.warning('Timeout on function probe_typeref with value '
+                + f'{document=}. Try increasing timeout with option "-t" or retries with "--retries". Skipping request')
+            return None
+        else:
+            errors = response.json().get("errors", [])
+            session.metrics.count("typeref", "errors", len(errors))
 
-            for error in errors:
-                typeref = get_typeref(error["message"], context)
-                if typeref:
-                    return typeref
+        for error in errors:
+            typeref = get_typeref(error["message"], context, argument)
+            if typeref:
+                return typeref
 
     if not typeref:
         #raise Exception(f"Unable to get TypeRef for {documents}")
@@ -392,84 +772,300 @@ def probe_typeref(
     return None
 
 
-def probe_field_type(
-    field: str, config: graphql.Config, input_document: str
+def probe_typeref(
+    documents: List[str], context: str, config: graphql.Config
+) -> Optional[graphql.TypeRef]:
+    return run_sync(async_probe_typeref, config, documents, context, config)
+
+
+async def async_probe_field_type(
+    field: str,
+    config: graphql.Config,
+    input_document: str,
+    session: graphql.Session,
 ) -> graphql.TypeRef:
+    known = session.evidence.field_typeref(input_document, field)
+    if known:
+        session.evidence.save()
+        return parse_typeref(known)
+
     documents = [
         input_document.replace("FUZZ", f"{field}"),
         input_document.replace("FUZZ", f"{field} {{ lol }}"),
     ]
 
-    typeref = probe_typeref(documents, "Field", config)
+    typeref = await async_probe_typeref(documents, "Field", config, session)
     return typeref
 
 
-def probe_arg_typeref(
-    field: str, arg: str, config: graphql.Config, input_document: str
+def probe_field_type(
+    field: str, config: graphql.Config, input_document: str
+) -> graphql.TypeRef:
+    return run_sync(async_probe_field_type, config, field, config, input_document)
+
+
+async def async_probe_field_types(
+    fields: List[str],
+    config: graphql.Config,
+    input_document: str,
+    session: graphql.Session,
+) -> Dict[str, graphql.TypeRef]:
+    # Same two documents as probe_field_type, but for a whole bucket of fields
+    # at once. Object fields are named by the first document, leaf fields by
+    # the second one. Fields that are still unresolved are left to the caller
+    sent = 0
+    # Fields the first document of their bucket named
+    named = set()
+
+    async def probe_bucket(bucket: List[str]) -> Dict[str, graphql.TypeRef]:
+        nonlocal sent
+        typerefs = {}
+        pending = bucket
+
+        for selection in ["", " { lol }"]:
+            document = input_document.replace(
+                "FUZZ", " ".join([f + selection for f in pending])
+            )
+
+            sent += 1
+            try:
+                response = await session.send(document, "field_types")
+            except ReadTimeout:
+                logging.warning('Timeout on function probe_field_types with value '
+                    + f'{document=}. Try increasing timeout with option "-t" or retries with "--retries". Skipping request')
+                break
+
+            try:
+                errors = response.json().get("errors", [])
+            except JSONDecodeError:
+                logging.warning(f'Invalid response for request with {document=}')
+                break
+            session.metrics.count("field_types", "errors", len(errors))
+
+            for error in errors:
+                result = get_field_typeref(error["message"])
+                if result and result[0] in pending and result[1]:
+                    typerefs[result[0]] = result[1]
+            if not selection:
+                named.update(typerefs)
+
+            pending = [f for f in pending if f not in typerefs]
+            if not pending:
+                break
+
+        return typerefs
+
+    typerefs = {}
+    for field in fields:
+        known = session.evidence.field_typeref(input_document, field)
+        if known:
+            typerefs[field] = parse_typeref(known)
+    # Known object types would have been named by the first document too
+    named.update(f for f, typeref in typerefs.items() if typeref.kind != "SCALAR")
+
+    # Buckets are cut as if no type was known, so that the requests saved can
+    # be told afterwards: a bucket costs one document when the first one names
+    # all its fields, and two otherwise
+    chunks = [
+        fields[i : i + config.bucket_size]
+        for i in range(0, len(fields), config.bucket_size)
+    ]
+    buckets = [[f for f in chunk if f not in typerefs] for chunk in chunks]
+    results = await asyncio.gather(*[probe_bucket(b) for b in buckets if b])
+
+    for result in results:
+        typerefs.update(result)
+    session.evidence.save(
+        sum(1 if named.issuperset(chunk) else 2 for chunk in chunks) - sent
+    )
+
+    logging.debug(f"Resolved {len(typerefs)} of {len(fields)} field types in bulk")
+
+    return typerefs
+
+
+def probe_field_types(
+    fields: List[str], config: graphql.Config, input_document: str
+) -> Dict[str, graphql.TypeRef]:
+    return run_sync(async_probe_field_types, config, fields, config, input_document)
+
+
+async def async_probe_arg_typeref(
+    field: str,
+    arg: str,
+    config: graphql.Config,
+    input_document: str,
+    session: graphql.Session,
 ) -> graphql.TypeRef:
+    known = session.evidence.arg_typeref(input_document, field, arg)
+    if known:
+        session.evidence.save()
+        return parse_typeref(known)
+
     documents = [
         input_document.replace("FUZZ", f"{field}({arg}: 7)"),
         input_document.replace("FUZZ", f"{field}({arg}: {{}})"),
         input_document.replace("FUZZ", f"{field}({arg[:-1]}: 7)"),
     ]
 
-    typeref = probe_typeref(documents, "InputValue", config)
+    typeref = await async_probe_typeref(
+        documents, "InputValue", config, session, argument=arg
+    )
     return typeref
 
 
-def probe_typename(input_document: str, config: graphql.Config) -> str:
-    typename = ""
-    wrong_field = "imwrongfield"
-    document = input_document.replace("FUZZ", wrong_field)
+def probe_arg_typeref(
+    field: str, arg: str, config: graphql.Config, input_document: str
+) -> graphql.TypeRef:
+    return run_sync(
+        async_probe_arg_typeref, config, field, arg, config, input_document
+    )
+
+
+async def async_probe_arg_typerefs(
+    field: str,
+    args: List[str],
+    config: graphql.Config,
+    input_document: str,
+    session: graphql.Session,
+) -> Dict[str, graphql.TypeRef]:
+    typerefs = {}
+    for arg in args:
+        known = session.evidence.arg_typeref(input_document, field, arg)
+        if known:
+            typerefs[arg] = parse_typeref(known)
+
+    # Leaving every argument out names each required one with its full type.
+    # Then every remaining argument gets a value no other argument uses, so the
+    # "found ..." part of an error tells which argument it belongs to. Integers
+    # are rejected by most types, objects by the ones accepting integers
+    rounds = [
+        lambda i: None,
+        lambda i: f"{7000 + i}",
+        lambda i: f"{{p{7000 + i}: 7}}",
+    ]
+
+    for sent, value_of in enumerate(rounds):
+        pending = [a for a in args if a not in typerefs]
+        if not pending:
+            if typerefs and sent == 0:
+                session.evidence.save()
+            break
+
+        values = {}
+        for i, arg in enumerate(pending):
+            if value_of(i) is not None:
+                values[value_of(i)] = arg
+
+        if values:
+            arguments = ", ".join([f"{arg}: {value}" for value, arg in values.items()])
+            document = input_document.replace("FUZZ", f"{field}({arguments})")
+        else:
+            document = input_document.replace("FUZZ", field)
 
-    with graphql.new_client(
-            http2=config.http2,
-            verify=config.verify,
-            proxies=config.proxy,
-            timeout=config.timeout,
-            ) as client:
         try:
-            response = graphql.request(
-                client=client,
-                command=config.command,
-                url=config.url,
-                headers=config.headers,
-                params=config.params,
-                json={"query": document},
-            )
+            response = await session.send(document, "arg_types")
         except ReadTimeout:
-            logging.warning('Timeout on function probe_typename with value '
-                + f'{document=}. Try increasing timeout with option "-t". Skipping request')
-            return None
-        else:
+            logging.warning('Timeout on function probe_arg_typerefs with value '
+                + f'{document=}. Try increasing timeout with option "-t" or retries with "--retries". Skipping request')
+            break
+
+        try:
             errors = response.json().get("errors", [])
+        except JSONDecodeError:
+            logging.warning(f'Invalid response for request with {document=}')
+            break
+        session.metrics.count("arg_types", "errors", len(errors))
 
-    wrong_field_regexes = [
-        f'Cannot query field "{wrong_field}" on type "(?P<typename>[_0-9a-zA-Z\[\]!]*)".',
-        f'Field "[_0-9a-zA-Z\[\]!]*" must not have a selection since type "(?P<typename>[_A-Za-z\[\]!][_0-9a-zA-Z\[\]!]*)" has no subfields.',
-    ]
+        for error in errors:
+            message = messages.classify(error["message"])
+
+            arg = None
+            if message.kind == messages.REQUIRED_ARGUMENT and message.field == field:
+                arg = message.argument
+            elif message.kind == messages.EXPECTED_TYPE:
+                arg = values.get(message.value)
+
+            if arg in pending and arg not in typerefs:
+                typerefs[arg] = parse_typeref(message.typeref)
+
+    # Whatever could not be told apart is probed one argument at a time
+    pending = [a for a in args if a not in typerefs]
+    if pending:
+        logging.debug(f"Falling back to probe_arg_typeref() for {field}({pending})")
+        results = await asyncio.gather(
+            *[
+                async_probe_arg_typeref(field, arg, config, input_document, session)
+                for arg in pending
+            ]
+        )
+        for arg, typeref in zip(pending, results):
+            if typeref:
+                typerefs[arg] = typeref
 
-    match = None
+    return typerefs
 
-    for regex in wrong_field_regexes:
-        for error in errors:
-            match = re.fullmatch(regex, error["message"])
-            if match:
-                break
-        if match:
+
+def probe_arg_typerefs(
+    field: str, args: List[str], config: graphql.Config, input_document: str
+) -> Dict[str, graphql.TypeRef]:
+    return run_sync(
+        async_probe_arg_typerefs, config, field, args, config, input_document
+    )
+
+
+async def async_probe_typename(
+    input_document: str,
+    config: graphql.Config,
+    session: graphql.Session,
+) -> str:
+    typename = session.evidence.typename(input_document)
+    if typename:
+        session.evidence.save()
+        return typename
+
+    wrong_field = "imwrongfield"
+    document = input_document.replace("FUZZ", wrong_field)
+
+    try:
+        response = await session.send(document, "typename")
+    except ReadTimeout:
+        logging.warning('Timeout on function probe_typename with value '
+            + f'{document=}. Try increasing timeout with option "-t" or retries with "--retries". Skipping request')
+        return None
+    else:
+        errors = response.json().get("errors", [])
+        session.metrics.count("typename", "errors", len(errors))
+
+    classified = [messages.classify(error["message"]) for error in errors]
+
+    typeref = None
+    for message in classified:
+        if message.kind == messages.INVALID_FIELD and message.field == wrong_field:
+            typeref = message.type
             break
+    else:
+        for message in classified:
+            if message.kind == messages.NO_SUBFIELDS:
+                typeref = message.typeref
+                break
 
-    if not match:
-        raise Exception(f"Expected '{errors}' to match any of '{wrong_field_regexes}'.")
+    if not typeref:
+        raise Exception(f"Expected '{errors}' to name the type of '{wrong_field}'.")
 
-    typename = (
-        match.group("typename").replace("[", "").replace("]", "").replace("!", "")
-    )
+    typename = typeref.replace("[", "").replace("]", "").replace("!", "")
 
     return typename
 
 
-def fetch_root_typenames(config: graphql.Config) -> Dict[str, Optional[str]]:
+def probe_typename(input_document: str, config: graphql.Config) -> str:
+    return run_sync(async_probe_typename, config, input_document, config)
+
+
+async def async_fetch_root_typenames(
+    config: graphql.Config,
+    session: graphql.Session,
+) -> Dict[str, Optional[str]]:
     documents = {
         "queryType": "query { __typename }",
         "mutationType": "mutation { __typename }",
@@ -481,86 +1077,234 @@ def fetch_root_typenames(config: graphql.Config) -> Dict[str, Optional[str]]:
         "subscriptionType": None,
     }
 
-    with graphql.new_client(
-            http2=config.http2,
-            verify=config.verify,
-            proxies=config.proxy,
-            timeout=config.timeout,
-            ) as client:
-        for name, document in documents.items():
-            try:
-                response = graphql.request(
-                    client=client,
-                    command=config.command,
-                    url=config.url,
-                    headers=config.headers,
-                    params=config.params,
-                    json={"query": document},
-                )
-            except ReadTimeout:
-                logging.warning('Timeout on function fetch_root_typenames with values '
-                    + f'{name=} and {document=}')
-                raise
-            try:
-                data = response.json().get("data", {})
-            except JSONDecodeError:
-                logging.error(f'Caught exception JSONDecodeError for request using values {name=} and {document=}')
-            else:
-                if data:
-                    typenames[name] = data["__typename"]
+    async def fetch(name: str, document: str) -> None:
+        try:
+            response = await session.send(document, "roots")
+        except ReadTimeout:
+            logging.warning('Timeout on function fetch_root_typenames with values '
+                + f'{name=} and {document=}')
+            raise
+        try:
+            data = response.json().get("data", {})
+        except JSONDecodeError:
+            logging.error(f'Caught exception JSONDecodeError for request using values {name=} and {document=}')
+        else:
+            if data:
+                typenames[name] = data["__typename"]
+
+    await asyncio.gather(*[fetch(n, d) for n, d in documents.items()])
 
     logging.debug(f"Root typenames are: {typenames}")
 
     return typenames
 
 
-def clairvoyance(
-    wordlist: List[str],
-    config: graphql.Config,
-    input_schema: Dict[str, Any] = None,
-    input_document: str = None,
-) -> Dict[str, Any]:
-    if not input_schema:
-        root_typenames = fetch_root_typenames(config)
-        schema = graphql.Schema(
-            queryType=root_typenames["queryType"],
-            mutationType=root_typenames["mutationType"],
-            subscriptionType=root_typenames["subscriptionType"],
-        )
-    else:
-        schema = graphql.Schema(schema=input_schema)
+def fetch_root_typenames(config: graphql.Config) -> Dict[str, Optional[str]]:
+    return run_sync(async_fetch_root_typenames, config, config)
 
-    typename = probe_typename(input_document, config)
-    logging.debug(f"__typename = {typename}")
 
-    valid_mutation_fields = probe_valid_fields(wordlist, config, input_document)
-    logging.debug(f"{typename}.fields = {valid_mutation_fields}")
+async def async_probe_fields(
+    field_names: List[str],
+    wordlist: List[str],
+    config: graphql.Config,
+    input_document: str,
+    session: graphql.Session,
+    typerefs: Dict[str, graphql.TypeRef] = None,
+) -> List[graphql.Field]:
+    typerefs = dict(typerefs or {})
+
+    # Types the bulk probe left over, one field at a time
+    missing = [f for f in field_names if f not in typerefs]
+    if missing:
+        with session.profiler.span("type_inference"):
+            results = await asyncio.gather(
+                *[
+                    async_probe_field_type(field_name, config, input_document, session)
+                    for field_name in missing
+                ]
+            )
+        typerefs.update(zip(missing, results))
 
-    for field_name in valid_mutation_fields:
-        typeref = probe_field_type(field_name, config, input_document)
-        if typeref is None:
-            continue 
-        field = graphql.Field(field_name, typeref)
+    fields = [graphql.Field(f, typerefs[f]) for f in field_names if typerefs[f]]
 
+    objects = []
+    for field in fields:
         if field.type.name not in ["Int", "Float", "String", "Boolean", "ID"]:
-            arg_names = probe_args(field.name, wordlist, config, input_document)
-            logging.debug(f"{typename}.{field_name}.args = {arg_names}")
-            for arg_name in arg_names:
-                arg_typeref = probe_arg_typeref(
-                    field.name, arg_name, config, input_document
-                )
-                if arg_typeref is None:
-                    continue 
-                arg = graphql.InputValue(arg_name, arg_typeref)
-
-                field.args.append(arg)
-                schema.add_type(arg.type.name, "INPUT_OBJECT")
+            objects.append(field)
         else:
             logging.debug(
                 f"Skip probe_args() for '{field.name}' of type '{field.type.name}'"
             )
 
-        schema.types[typename].fields.append(field)
+    sweep = objects
+    confirmed = {}
+    with session.profiler.span("arg_sweep"):
+        # Confirming costs a request per pack, which only pays off when the
+        # sweep takes several buckets
+        size = session.sizer("args").size if config.adaptive_buckets else config.bucket_size
+        if config.reuse_args and len(wordlist) > size:
+            confirmed = await async_confirm_args(objects, config, input_document, session)
+            sweep = [f for f in objects if f.name not in confirmed]
+
+        probe_args = async_discover_args if config.discover else async_probe_fields_args
+        valid_args = await probe_args(
+            [f.name for f in sweep], wordlist, config, input_document, session
+        )
+    valid_args.update(confirmed)
+    for field in objects:
+        if valid_args[field.name]:
+            signature = frozenset(valid_args[field.name])
+            session.signatures[signature] += 1
+            session.field_args.setdefault(field.name, signature)
+            session.type_args.setdefault(field.type.name, signature)
+
+    async def probe_args_types(field: graphql.Field) -> None:
+        arg_names = sorted(valid_args[field.name])
+
+        if config.bulk_types:
+            arg_typerefs = await async_probe_arg_typerefs(
+                field.name, arg_names, config, input_document, session
+            )
+        else:
+            results = await asyncio.gather(
+                *[
+                    async_probe_arg_typeref(
+                        field.name, arg_name, config, input_document, session
+                    )
+                    for arg_name in arg_names
+                ]
+            )
+            arg_typerefs = dict(zip(arg_names, results))
+
+        for arg_name in arg_names:
+            if arg_typerefs.get(arg_name) is None:
+                continue
+            field.args.append(graphql.InputValue(arg_name, arg_typerefs[arg_name]))
+
+    with session.profiler.span("arg_typing"):
+        await asyncio.gather(*[probe_args_types(f) for f in objects])
+
+    return fields
+
+
+def probe_fields(
+    field_names: List[str],
+    wordlist: List[str],
+    config: graphql.Config,
+    input_document: str,
+) -> List[graphql.Field]:
+    return run_sync(
+        async_probe_fields, config, field_names, wordlist, config, input_document
+    )
+
+
+async def async_new_schema(
+    config: graphql.Config, session: graphql.Session = None
+) -> graphql.Schema:
+    with session.profiler.span("roots"):
+        root_typenames = await async_fetch_root_typenames(config, session)
+    return graphql.Schema(
+        queryType=root_typenames["queryType"],
+        mutationType=root_typenames["mutationType"],
+        subscriptionType=root_typenames["subscriptionType"],
+    )
+
+
+async def async_probe_type(
+    wordlist: List[str],
+    config: graphql.Config,
+    input_document: str,
+    session: graphql.Session = None,
+) -> Tuple[str, List[graphql.Field]]:
+    # Name and fields of the type selected by input_document
+    # The errors of the fields probe almost always name the type, so the
+    # typename probe waits for them instead of running alongside
+    probe_fields = async_discover_fields if config.discover else async_probe_valid_fields
+    with session.profiler.span("field_sweep"):
+        valid_mutation_fields = await probe_fields(wordlist, config, input_document, session)
+    with session.profiler.span("typename"):
+        typename = await async_probe_typename(input_document, config, session)
+    logging.debug(f"__typename = {typename}")
+    logging.debug(f"{typename}.fields = {valid_mutation_fields}")
+
+    field_names = sorted(valid_mutation_fields)
+
+    typerefs = {}
+    if config.bulk_types:
+        with session.profiler.span("type_inference"):
+            typerefs = await async_probe_field_types(
+                field_names, config, input_document, session
+            )
+
+    # Groups of fields don't depend on each other, so each one runs its own
+    # pipeline (type, then args packed into shared documents, then arg types)
+    # while the others are in flight. Results are assembled in name order to
+    # keep the output deterministic
+    groups = [
+        field_names[i : i + config.pack_fields]
+        for i in range(0, len(field_names), config.pack_fields)
+    ]
+    results = await asyncio.gather(
+        *[
+            async_probe_fields(
+                group, wordlist, config, input_document, session, typerefs=typerefs
+            )
+            for group in groups
+        ]
+    )
+
+    return typename, [f for fields in results for f in fields]
+
+
+def add_fields(
+    schema: graphql.Schema, typename: str, fields: List[graphql.Field]
+) -> None:
+    for field in fields:
+        logging.debug(f"{typename}.{field.name}.args = {[a.name for a in field.args]}")
+        for arg in field.args:
+            schema.add_type(arg.type.name, "INPUT_OBJECT")
+
+        schema.add_field(typename, field)
         schema.add_type(field.type.name, "OBJECT")
 
-    return schema.to_json()
+
+async def async_explore_type(
+    schema: graphql.Schema,
+    wordlist: List[str],
+    config: graphql.Config,
+    input_document: str,
+    session: graphql.Session = None,
+) -> List[graphql.Field]:
+    # Adds the fields of the type selected by input_document to schema
+    typename, fields = await async_probe_type(wordlist, config, input_document, session)
+    add_fields(schema, typename, fields)
+    return fields
+
+
+async def async_clairvoyance(
+    wordlist: List[str],
+    config: graphql.Config,
+    input_schema: Dict[str, Any] = None,
+    input_document: str = None,
+    session: graphql.Session = None,
+) -> str:
+    if not input_schema:
+        schema = await async_new_schema(config, session)
+    else:
+        schema = graphql.Schema(schema=input_schema)
+
+    await async_explore_type(schema, wordlist, config, input_document, session)
+
+    with session.profiler.span("serialization"):
+        return schema.to_json()
+
+
+def clairvoyance(
+    wordlist: List[str],
+    config: graphql.Config,
+    input_schema: Dict[str, Any] = None,
+    input_document: str = None,
+) -> str:
+    return run_sync(
+        async_clairvoyance, config, wordlist, config, input_schema, input_document
+    )
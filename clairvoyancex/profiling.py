@@ -0,0 +1,128 @@
+import os
+import json
+import time
+import cProfile
+import contextlib
+import contextvars
+import collections
+import tracemalloc
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import Optional
+
+PHASES = {
+    "roots": "Fetching the root typenames",
+    "field_sweep": "Sweeping the wordlist for fields",
+    "typename": "Probing the name of the explored type",
+    "type_inference": "Inferring the types of fields",
+    "arg_sweep": "Sweeping the wordlist for arguments",
+    "arg_typing": "Inferring the types of arguments",
+    "serialization": "Turning the schema into JSON",
+}
+
+
+class Profiler:
+    """Time spent in each phase of a run, and optional cProfile and tracemalloc dumps.
+
+    Probes run concurrently, so spans of a phase overlap. Each phase reports
+    the summed duration of its spans and its busy time, the wall time during
+    which at least one of its spans was open. Busy times of different phases
+    overlap too, and are what tells where a run waits. A span opened inside
+    one of the same phase, in the same task or one it started, is part of it
+    and not counted again.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.cpu_started = time.process_time()
+        self.spans = collections.Counter()
+        self.total = collections.Counter()
+        self.busy = collections.Counter()
+        self.longest = collections.Counter()
+        self.open = collections.Counter()
+        self.since = {}
+        # Phases open in the current task, inherited by the tasks it starts
+        self.inside = contextvars.ContextVar(f"profiler-{id(self)}", default=frozenset())
+        self.cpu_path = None
+        self.memory_path = None
+        self.cprofile = None
+        # Current and peak traced bytes, kept once tracing stops
+        self.memory = None
+
+    @contextlib.contextmanager
+    def span(self, phase: str) -> Iterator[None]:
+        inside = self.inside.get()
+        if phase in inside:
+            yield
+            return
+
+        token = self.inside.set(inside | {phase})
+        start = time.monotonic()
+        if not self.open[phase]:
+            self.since[phase] = start
+        self.open[phase] += 1
+        try:
+            yield
+        finally:
+            self.inside.reset(token)
+            end = time.monotonic()
+            self.open[phase] -= 1
+            if not self.open[phase]:
+                self.busy[phase] += end - self.since.pop(phase)
+            self.spans[phase] += 1
+            self.total[phase] += end - start
+            self.longest[phase] = max(self.longest[phase], end - start)
+
+    def start(self, cpu_path: Optional[str] = None, memory_path: Optional[str] = None) -> None:
+        # cProfile follows every coroutine since the whole run is one thread
+        self.cpu_path = cpu_path
+        self.memory_path = memory_path
+        if cpu_path:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        if memory_path:
+            tracemalloc.start(16)
+
+    def stop(self) -> None:
+        if self.cprofile:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.cpu_path)
+            self.cprofile = None
+        if self.memory_path and tracemalloc.is_tracing():
+            tracemalloc.take_snapshot().dump(self.memory_path)
+            self.memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    def report(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        phases = {}
+        for phase in list(PHASES) + sorted(set(self.spans) - set(PHASES)):
+            busy = self.busy[phase]
+            if self.open[phase]:
+                busy += now - self.since[phase]
+            phases[phase] = {
+                "spans": self.spans[phase],
+                "total": round(self.total[phase], 6),
+                "busy": round(busy, 6),
+                "max": round(self.longest[phase], 6),
+            }
+
+        report = {
+            "elapsed": round(now - self.started, 3),
+            "cpu": round(time.process_time() - self.cpu_started, 3),
+            "phases": phases,
+        }
+        memory = self.memory
+        if self.memory_path and tracemalloc.is_tracing():
+            memory = tracemalloc.get_traced_memory()
+        if memory:
+            report["memory"] = {"current": memory[0], "peak": memory[1]}
+        return report
+
+    def write(self, path: Optional[str]) -> None:
+        # Written whole and then renamed, as metrics are
+        if path:
+            with open(path + ".tmp", "w") as f:
+                f.write(json.dumps(self.report(), indent=4))
+            os.replace(path + ".tmp", path)
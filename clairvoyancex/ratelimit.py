@@ -0,0 +1,165 @@
+import time
+import asyncio
+import logging
+import datetime
+import collections
+import email.utils
+from typing import Dict
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    # Either a number of seconds or an HTTP date
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return max(0.0, (date - now).total_seconds())
+
+
+class Throttled(Exception):
+    """Raised when a host keeps throttling a request after every retry."""
+
+
+class TokenBucket:
+    """Lets through at most ``rate`` requests per second, ``burst`` at once.
+
+    A rate of None lets everything through. The bucket can also be paused,
+    which holds back every request until the given time.
+    """
+
+    def __init__(self, rate: Optional[float], burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def delay(self) -> float:
+        # Takes a token and returns 0, or returns how long to wait for one
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+
+        if self.rate is None:
+            return 0.0
+
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self) -> None:
+        while True:
+            delay = self.delay()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class RateLimiter:
+    """Global and per-host request rates, adapted to throttling answers.
+
+    ``rate`` caps the requests sent to all hosts and never changes. Each host
+    starts at ``host_rate`` (unlimited when None). When a host answers 429 or
+    503, its rate is halved and it is paused for as long as its Retry-After
+    asks. Every request that gets through afterwards adds back a little, about
+    ``increase`` requests per second each second, up to ``host_rate``.
+    """
+
+    throttled = [429, 503]
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        host_rate: Optional[float] = None,
+        burst: float = 1,
+        min_rate: float = 0.5,
+        increase: float = 1.0,
+        backoff: float = 1.0,
+    ):
+        self.global_bucket = TokenBucket(rate, burst)
+        self.host_rate = host_rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.increase = increase
+        self.backoff = backoff
+        self.hosts = {}  # type: Dict[str, TokenBucket]
+        # Recent request times per host, to know how fast an unlimited host
+        # was going when it started throttling
+        self.history = {}  # type: Dict[str, collections.deque]
+
+    def host(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        if host not in self.hosts:
+            self.hosts[host] = TokenBucket(self.host_rate, self.burst)
+            self.history[host] = collections.deque(maxlen=256)
+        return self.hosts[host]
+
+    async def acquire(self, url: str) -> None:
+        bucket = self.host(url)
+        await bucket.acquire()
+        await self.global_bucket.acquire()
+        self.history[urlsplit(url).netloc].append(time.monotonic())
+
+    def observed_rate(self, url: str) -> float:
+        history = self.history[urlsplit(url).netloc]
+        now = time.monotonic()
+        recent = [t for t in history if now - t <= 1.0]
+        return float(len(recent))
+
+    def record(self, url: str, response: httpx.Response) -> bool:
+        """Adapts the rate of the host of ``url`` after ``response``.
+
+        Returns True when the request was throttled and should be sent again.
+        """
+        bucket = self.host(url)
+
+        if response.status_code in self.throttled:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if response.status_code == 503 and retry_after is None:
+                # A plain 503 is a failure of the server, not throttling
+                return False
+
+            current = bucket.rate or self.observed_rate(url)
+            bucket.rate = max(self.min_rate, current / 2)
+            bucket.tokens = min(bucket.tokens, 1)
+            bucket.pause(self.backoff if retry_after is None else retry_after)
+            logging.warning(
+                f"Throttled by {urlsplit(url).netloc} ({response.status_code}),"
+                + f" slowing down to {bucket.rate:.1f} requests per second"
+            )
+            return True
+
+        if bucket.rate is not None:
+            bucket.rate += self.increase / bucket.rate
+            if self.host_rate is None:
+                # Back to unlimited once well past where the trouble started
+                if bucket.rate > 2 * max(self.observed_rate(url), self.min_rate) + 1:
+                    logging.debug(f"Lifting rate limit of {urlsplit(url).netloc}")
+                    bucket.rate = None
+            else:
+                bucket.rate = min(bucket.rate, self.host_rate)
+
+        return False
@@ -0,0 +1,36 @@
+import random
+import collections
+from typing import Optional
+
+
+class RetryPolicy:
+    """Capped exponential backoff with full jitter between attempts."""
+
+    def __init__(self, retries: int = 3, backoff: float = 0.5, max_backoff: float = 10.0):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def delay(self, attempt: int) -> float:
+        # Spreading the whole range keeps requests that failed together from
+        # coming back together
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+
+class LatencyTracker:
+    """Recent request latencies, to tell when a request is running late."""
+
+    def __init__(self, size: int = 256, min_samples: int = 20):
+        self.samples = collections.deque(maxlen=size)
+        self.min_samples = min_samples
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if len(self.samples) < self.min_samples:
+            return None
+
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(len(ordered) * p / 100))
+        return ordered[index]
@@ -0,0 +1,120 @@
+import re
+import array
+import itertools
+import logging
+from typing import Set
+from typing import Union
+from typing import BinaryIO
+from typing import Iterable
+from typing import Iterator
+from typing import Sequence
+
+NAME = re.compile(rb"[_A-Za-z][_0-9A-Za-z]*")
+# Stripped lines joined back together, all of them names
+BLOCK = re.compile(rb"[_A-Za-z][_0-9A-Za-z]*(?:\n[_A-Za-z][_0-9A-Za-z]*)*")
+
+
+class Wordlist(Sequence):
+    """Names to probe, packed one after the other into a single buffer.
+
+    Each name is kept once, as ASCII bytes ended by a newline, and found
+    through an array of offsets. Lines that aren't GraphQL names can never be
+    valid fields or arguments, so they are dropped while loading. Slices share
+    the buffer, so buckets cost a few bytes whatever their size.
+    """
+
+    def __init__(self, names: Iterable[Union[str, bytes]] = ()):
+        self.data = bytearray()
+        self.offsets = array.array("q", [0])
+        self.skipped = 0
+        self.duplicates = 0
+
+        # Lines are taken a block at a time so that stripping, checking and
+        # deduplicating them run in C rather than name by name. Names kept
+        # from earlier blocks are only remembered by their hashes, dropped once
+        # loaded, rather than in a set holding every name a second time. Two
+        # names sharing a 64 bit hash in a wordlist of millions are unlikely
+        # enough for the later one to be taken for a duplicate
+        data, offsets = self.data, self.offsets
+        seen: Set[int] = set()
+        names = iter(names)
+        while True:
+            block = [
+                n.encode("utf-8", "replace").strip() if isinstance(n, str) else n.strip()
+                for n in itertools.islice(names, 65536)
+            ]
+            if not block:
+                break
+            lines = b"\n".join(block)
+            if lines.count(b"\n") == len(block) - 1 and BLOCK.fullmatch(lines):
+                valid = block
+            else:
+                valid = [n for n in block if NAME.fullmatch(n)]
+            self.skipped += len(block) - block.count(b"") - len(valid)
+
+            add = seen.add
+            fresh = [n for n in valid if not (hash(n) in seen or add(hash(n)))]
+            self.duplicates += len(valid) - len(fresh)
+            if not fresh:
+                continue
+
+            lengths = [len(n) + 1 for n in fresh]
+            lengths[0] += len(data)
+            data += b"\n".join(fresh)
+            data += b"\n"
+            offsets.extend(itertools.accumulate(lengths))
+
+        # The buffer is kept as it was filled, not copied into bytes
+        self.view = memoryview(self.offsets)
+
+    @classmethod
+    def load(cls, f: BinaryIO) -> "Wordlist":
+        # Lines are read as they come, the file is never held in memory
+        wordlist = cls(f)
+        logging.debug(
+            f"Loaded {len(wordlist)} words, skipped {wordlist.skipped} invalid names"
+            + f" and {wordlist.duplicates} duplicates"
+        )
+        return wordlist
+
+    @classmethod
+    def _slice(cls, data: bytes, view: memoryview) -> "Wordlist":
+        wordlist = cls.__new__(cls)
+        wordlist.data = data
+        wordlist.offsets = None
+        wordlist.view = view
+        wordlist.skipped = wordlist.duplicates = 0
+        return wordlist
+
+    def __len__(self) -> int:
+        return len(self.view) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return self._slice(self.data, self.view[start : max(start, stop) + 1])
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("wordlist index out of range")
+
+        return self.data[self.view[index] : self.view[index + 1] - 1].decode("ascii")
+
+    def __iter__(self) -> Iterator[str]:
+        # Decoded a chunk at a time rather than name by name
+        for i in range(0, len(self), 4096):
+            end = min(i + 4096, len(self))
+            chunk = self.data[self.view[i] : self.view[end] - 1]
+            yield from chunk.decode("ascii").split("\n")
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"Wordlist({len(self)} words)"
+
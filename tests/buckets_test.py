@@ -0,0 +1,132 @@
+import asyncio
+import datetime
+import unittest
+
+import httpx
+
+from clairvoyance import buckets
+from clairvoyance import oracle
+
+
+def response(status=200, seconds=0.1, content=b"{}"):
+    r = httpx.Response(status, content=content)
+    r.elapsed = datetime.timedelta(seconds=seconds)
+    return r
+
+
+class TestBucketSizer(unittest.TestCase):
+    def setUp(self):
+        self.sizer = buckets.BucketSizer("fields", 1024, target_latency=1.0)
+
+    def test_grows_when_fast(self):
+        self.assertTrue(self.sizer.record(1024, response(seconds=0.1)))
+        self.assertEqual(self.sizer.size, 2048)
+
+        # Answers to buckets sent before the change don't grow it again
+        self.assertTrue(self.sizer.record(1024, response(seconds=0.1)))
+        self.assertEqual(self.sizer.size, 2048)
+
+    def test_shrinks_when_slow(self):
+        self.assertTrue(self.sizer.record(1024, response(seconds=2)))
+        self.assertEqual(self.sizer.size, 512)
+
+    def test_too_large_sets_ceiling(self):
+        self.assertFalse(self.sizer.record(1024, response(status=413)))
+        self.assertEqual(self.sizer.size, 512)
+        self.assertEqual(self.sizer.ceiling, 1024)
+
+        self.sizer.record(512, response(seconds=0.1))
+        self.sizer.record(1023, response(seconds=0.1))
+        self.assertEqual(self.sizer.size, 1023)
+
+    def test_timeout(self):
+        self.assertFalse(self.sizer.record(1024, None))
+        self.assertEqual(self.sizer.size, 512)
+        self.assertIsNone(self.sizer.ceiling)
+
+    def test_minimum(self):
+        for _ in range(20):
+            self.sizer.record(self.sizer.size, response(status=503))
+        self.assertEqual(self.sizer.size, self.sizer.minimum)
+
+    def test_truncated(self):
+        sent = [f"w{i}" for i in range(100)]
+        self.assertFalse(self.sizer.truncated(sent, set(sent[:90]), 90))
+        self.assertFalse(self.sizer.truncated(sent, set(sent[10:]), 90))
+        self.assertTrue(self.sizer.truncated(sent, set(sent[:50]), 50))
+
+        # The cap is known from now on, even with few words left unanswered
+        self.assertTrue(self.sizer.truncated(sent[:60], set(sent[:50]), 50))
+
+    def test_capped(self):
+        sent = [f"w{i}" for i in range(100)]
+        self.assertTrue(self.sizer.truncated(sent, set(sent[:10]), 10, capped=True))
+        self.assertEqual(self.sizer.error_cap, 10)
+        self.assertEqual(self.sizer.size, 16)
+
+        self.sizer.record(16, response(seconds=0.1))
+        self.assertEqual(self.sizer.size, 16)
+
+    def test_capped_without_errors(self):
+        sent = [f"w{i}" for i in range(100)]
+        self.assertTrue(self.sizer.truncated(sent, set(), 0, capped=True))
+        self.assertEqual(self.sizer.error_cap, 1)
+
+    def test_unsettled(self):
+        sent = [f"w{i}" for i in range(10)]
+        self.assertEqual(self.sizer.unsettled(sent, {"w0", "w4"}), sent[5:])
+        self.assertEqual(self.sizer.unsettled(sent, set()), sent)
+
+        self.assertEqual(self.sizer.pieces(sent[5:]), [sent[5:8], sent[8:]])
+        self.sizer.error_cap = 2
+        self.assertEqual(self.sizer.pieces(sent[5:]), [sent[5:7], sent[7:9], sent[9:]])
+
+    def test_json_roundtrip(self):
+        self.sizer.record(1024, response(status=414))
+        other = buckets.BucketSizer("fields", 4096)
+        other.load(self.sizer.to_json())
+        self.assertEqual(other.to_json(), self.sizer.to_json())
+
+
+class TestByteBudget(unittest.TestCase):
+    def test_bisects(self):
+        budget = buckets.ByteBudget("GET")
+        self.assertIsNone(budget.limit)
+
+        self.assertTrue(budget.record(5000, response()))
+        self.assertFalse(budget.record(20000, response(status=414)))
+        self.assertEqual(budget.limit, 12500)
+
+        self.assertFalse(budget.record(12500, response(status=414)))
+        self.assertTrue(budget.record(8000, response()))
+        self.assertEqual(budget.limit, 10250)
+
+        budget.record(12000, response(status=414))
+        budget.record(11000, response())
+        self.assertEqual(budget.limit, 11000)
+
+    def test_json_roundtrip(self):
+        budget = buckets.ByteBudget("POST")
+        budget.record(1000, response(status=413))
+        other = buckets.ByteBudget("POST")
+        other.load(budget.to_json())
+        self.assertEqual(other.limit, budget.limit)
+
+
+class TestProbeBuckets(unittest.TestCase):
+    def test_splits_rejected_buckets(self):
+        wordlist = [f"w{i}" for i in range(100)]
+        sizer = buckets.BucketSizer("fields", 64, minimum=4)
+        sent = []
+
+        async def probe(bucket):
+            sent.append(len(bucket))
+            if len(bucket) > 20:
+                return response(status=413), None, False
+            return response(seconds=0.6), bucket, False
+
+        results = asyncio.run(oracle.async_probe_buckets(wordlist, sizer, probe, 2))
+
+        self.assertEqual([w for result in results for w in result], wordlist)
+        self.assertLessEqual(sizer.size, 20)
+        self.assertIn(64, sent)
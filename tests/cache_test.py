@@ -0,0 +1,70 @@
+import shutil
+import tempfile
+import unittest
+
+import httpx
+
+from clairvoyance import cache
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = cache.ResponseCache(self.directory, max_size=1024)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.directory)
+
+    def key(self, document, headers=None):
+        return cache.ResponseCache.key(
+            "POST", "http://localhost", headers or {}, {}, document
+        )
+
+    def test_roundtrip(self):
+        errors = {"errors": [{"message": 'Cannot query field "a" on type "Query".'}]}
+        self.cache.put(self.key("{ a }"), httpx.Response(200, json=errors))
+
+        got = self.cache.get(self.key("{ a }"))
+        self.assertEqual(got.json(), errors)
+        self.assertIsNone(self.cache.get(self.key("{ b }")))
+
+    def test_persists_across_instances(self):
+        data = {"data": {"__typename": "Query"}}
+        self.cache.put(self.key("{ __typename }"), httpx.Response(200, json=data))
+        self.cache.close()
+
+        self.cache = cache.ResponseCache(self.directory, max_size=1024)
+        self.assertEqual(self.cache.get(self.key("{ __typename }")).json(), data)
+
+    def test_key_depends_on_headers(self):
+        self.assertNotEqual(
+            self.key("{ a }", {"Authorization": "a"}),
+            self.key("{ a }", {"Authorization": "b"}),
+        )
+
+    def test_skips_server_errors(self):
+        self.cache.put(self.key("{ a }"), httpx.Response(503, json={"errors": []}))
+        self.assertIsNone(self.cache.get(self.key("{ a }")))
+
+    def test_keeps_rejected_documents(self):
+        self.cache.put(self.key("{ a }"), httpx.Response(413, text="<html>Too large</html>"))
+        self.cache.put(self.key("{ b }"), httpx.Response(200, text="<html>Hello</html>"))
+
+        self.assertEqual(self.cache.get(self.key("{ a }")).status_code, 413)
+        self.assertIsNone(self.cache.get(self.key("{ b }")))
+
+    def test_evicts_least_recently_used(self):
+        payload = {"errors": [{"message": "x" * 300}]}
+        for document in ["{ a }", "{ b }", "{ c }"]:
+            self.cache.put(self.key(document), httpx.Response(200, json=payload))
+        self.cache.get(self.key("{ a }"))
+        self.cache.put(self.key("{ d }"), httpx.Response(200, json=payload))
+
+        self.assertIsNotNone(self.cache.get(self.key("{ a }")))
+        self.assertIsNone(self.cache.get(self.key("{ b }")))
+        self.assertLessEqual(self.cache.size, 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()
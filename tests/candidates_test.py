@@ -0,0 +1,52 @@
+import unittest
+
+from clairvoyance import candidates
+
+
+class TestVariants(unittest.TestCase):
+    def test_split(self):
+        self.assertEqual(candidates.split("createUser"), ["create", "user"])
+        self.assertEqual(candidates.split("user_id"), ["user", "id"])
+        self.assertEqual(candidates.split("URLPath"), ["url", "path"])
+
+    def test_case_styles(self):
+        self.assertIn("create_user", candidates.variants("createUser"))
+        self.assertIn("userId", candidates.variants("user_id"))
+
+    def test_plurals(self):
+        self.assertIn("users", candidates.variants("user"))
+        self.assertIn("user", candidates.variants("users"))
+        self.assertIn("categories", candidates.variants("category"))
+
+    def test_prefixes_and_suffixes(self):
+        got = candidates.variants("createUser")
+        self.assertIn("updateUser", got)
+        self.assertIn("deleteUser", got)
+        self.assertIn("user", got)
+        self.assertIn("createUserId", got)
+
+        got = candidates.variants("homeId")
+        self.assertIn("home", got)
+        self.assertIn("getHomeId", got)
+
+    def test_words(self):
+        got = candidates.variants("homeMembership")
+        self.assertIn("home", got)
+        self.assertIn("membership", got)
+
+    def test_near_spelling(self):
+        self.assertIn("home", candidates.variants("homes"))
+        self.assertIn("homeI", candidates.variants("homeId"))
+
+    def test_valid_names_only(self):
+        for name in ["id", "_private", "x", "createUser", "a_b_c"]:
+            for variant in candidates.variants(name):
+                self.assertRegex(variant, "^[_A-Za-z][_0-9A-Za-z]*$")
+                self.assertNotEqual(variant, name)
+
+    def test_generate(self):
+        got = candidates.generate(["users", "user"], exclude=["getUser"])
+        self.assertEqual(len(got), len(set(got)))
+        self.assertNotIn("getUser", got)
+        self.assertNotIn("user", candidates.generate(["users"], exclude=["user"]))
+        self.assertEqual(got, candidates.generate(["user", "users"], exclude=["getUser"]))
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import httpx
+
+from clairvoyance import checkpoint
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_resume_replays_responses(self):
+        errors = {"errors": [{"message": 'Cannot query field "a" on type "Query".'}]}
+        c = checkpoint.Checkpoint(self.directory)
+        c.put("a", httpx.Response(200, json=errors))
+        c.close()
+
+        c = checkpoint.Checkpoint(self.directory, resume=True)
+        self.assertEqual(c.get("a").json(), errors)
+        self.assertIsNone(c.get("b"))
+        c.close()
+
+    def test_journals_what_the_cache_keeps(self):
+        c = checkpoint.Checkpoint(self.directory)
+        c.put("throttled", httpx.Response(429, json={"errors": []}))
+        c.put("rejected", httpx.Response(413, text="<html>Too large</html>"))
+        c.close()
+
+        c = checkpoint.Checkpoint(self.directory, resume=True)
+        self.assertIsNone(c.get("throttled"))
+        self.assertEqual(c.get("rejected").status_code, 413)
+        c.close()
+
+    def test_fresh_run_discards_journal(self):
+        c = checkpoint.Checkpoint(self.directory)
+        c.put("a", httpx.Response(200, json={"data": None}))
+        c.save_state({"pass": 1})
+        c.close()
+
+        c = checkpoint.Checkpoint(self.directory)
+        self.assertIsNone(c.get("a"))
+        self.assertIsNone(c.load_state())
+        c.close()
+
+    def test_drops_interrupted_entry(self):
+        c = checkpoint.Checkpoint(self.directory)
+        c.put("a", httpx.Response(200, json={"data": None}))
+        c.close()
+        with open(os.path.join(self.directory, "journal.jsonl"), "ab") as f:
+            f.write(b'{"key": "b", "status": 200, "pay')
+
+        c = checkpoint.Checkpoint(self.directory, resume=True)
+        self.assertIsNone(c.get("b"))
+        c.put("c", httpx.Response(200, json={"data": None}))
+        c.close()
+
+        c = checkpoint.Checkpoint(self.directory, resume=True)
+        self.assertIsNotNone(c.get("a"))
+        self.assertIsNotNone(c.get("c"))
+        c.close()
+
+    def test_state_roundtrip(self):
+        state = {"pass": 3, "ignore": ["ID", "Query"], "done": False}
+        c = checkpoint.Checkpoint(self.directory)
+        c.save_state(state)
+        c.close()
+
+        c = checkpoint.Checkpoint(self.directory, resume=True)
+        self.assertEqual(c.load_state(), state)
+        c.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import json
+import time
+import unittest
+import subprocess
+import urllib.error
+import urllib.request
+
+from tests.server import emulator
+
+
+class TestValidator(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.schema = emulator.Schema.load("tests/data/apollo.graphql")
+
+    def errors(self, query: str, **options):
+        status, body = emulator.Emulator(self.schema, **options).answer(query)
+        return [e["message"] for e in body.get("errors", [])]
+
+    def test_suggestions(self):
+        self.assertEqual(
+            self.errors("query { launchs }"),
+            ['Cannot query field "launchs" on type "Query". Did you mean "launches" or "launch"?'],
+        )
+
+    def test_selection_of_subfields(self):
+        self.assertEqual(
+            self.errors("query { me }"),
+            ['Field "me" of type "User" must have a selection of subfields. Did you mean "me { ... }"?'],
+        )
+        self.assertEqual(
+            self.errors("mutation { login { token } }"),
+            ['Field "login" must not have a selection since type "String" has no subfields.'],
+        )
+
+    def test_arguments(self):
+        self.assertEqual(
+            self.errors("query { launch(idd: 1) { id } }"),
+            [
+                'Unknown argument "idd" on field "launch" of type "Query". Did you mean "id"?',
+                'Field "launch" argument "id" of type "ID!" is required, but it was not provided.',
+            ],
+        )
+        self.assertEqual(
+            self.errors("query { launch(id: 1) { mission { missionPatch(size: SMAL) } } }"),
+            ["Expected type PatchSize, found SMAL. Did you mean the enum value SMALL?"],
+        )
+
+    def test_max_errors(self):
+        self.assertEqual(len(self.errors("query { a b c d }", max_errors=2)), 2)
+        self.assertEqual(
+            self.errors("query { a b c d }", max_errors=2, too_many_errors=True)[-1],
+            emulator.TOO_MANY_ERRORS,
+        )
+
+    def test_valid_document(self):
+        status, body = emulator.Emulator(self.schema).answer("query { __typename }")
+        self.assertEqual(status, 200)
+        self.assertEqual(body, {"data": {"__typename": "Query"}})
+
+    def test_introspection_schema(self):
+        schema = emulator.Schema.load("tests/data/schema.json")
+        self.assertEqual(schema.roots["mutation"].name, "Mutation")
+
+
+class TestEmulator(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._emulator = subprocess.Popen(
+            ["python3", "tests/server/emulator.py", "--port", "8002", "--max-body", "100"]
+        )
+        time.sleep(1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._emulator.terminate()
+        cls._emulator.wait()
+
+    def post(self, query: str):
+        request = urllib.request.Request(
+            "http://localhost:8002",
+            data=json.dumps({"query": query}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.load(response)
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def test_answers(self):
+        status, body = self.post("query { __typename }")
+        self.assertEqual(status, 200)
+        self.assertEqual(body["data"]["__typename"], "Query")
+
+    def test_max_body(self):
+        status, _ = self.post("query { " + "a " * 100 + "}")
+        self.assertEqual(status, 413)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+from clairvoyance import evidence
+from clairvoyance import messages
+
+
+DOCUMENT = "query { FUZZ }"
+
+
+def classify(*errors):
+    return [messages.classify(e) for e in errors]
+
+
+class TestEvidence(unittest.TestCase):
+    def setUp(self):
+        self.evidence = evidence.Evidence()
+
+    def test_fields(self):
+        self.evidence.add_fields(
+            DOCUMENT,
+            classify(
+                'Cannot query field "imwrong" on type "Query".',
+                'Field "homes" of type "[Home!]!" must have a selection of subfields. Did you mean "homes { ... }"?',
+            ),
+        )
+
+        self.assertEqual(self.evidence.typename(DOCUMENT), "Query")
+        self.assertEqual(self.evidence.field_typeref(DOCUMENT, "homes"), "[Home!]!")
+        self.assertIsNone(self.evidence.field_typeref(DOCUMENT, "imwrong"))
+        self.assertIsNone(self.evidence.typename("query { homes { FUZZ } }"))
+
+    def test_args(self):
+        self.evidence.add_args(
+            DOCUMENT,
+            classify(
+                'Unknown argument "x" on field "home" of type "Query".',
+                'Field "home" argument "id" of type "ID!" is required, but it was not provided.',
+            ),
+        )
+
+        self.assertEqual(self.evidence.typename(DOCUMENT), "Query")
+        self.assertEqual(self.evidence.arg_typeref(DOCUMENT, "home", "id"), "ID!")
+        self.assertIsNone(self.evidence.arg_typeref(DOCUMENT, "homes", "id"))
+
+    def test_first_typename_wins(self):
+        self.evidence.add_fields(
+            DOCUMENT, classify('Cannot query field "a" on type "Query".')
+        )
+        self.evidence.add_fields(
+            DOCUMENT, classify('Cannot query field "b" on type "Other".')
+        )
+        self.assertEqual(self.evidence.typename(DOCUMENT), "Query")
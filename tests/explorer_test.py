@@ -0,0 +1,90 @@
+import json
+import asyncio
+import unittest
+
+from clairvoyance import graphql
+from clairvoyance import explorer
+from tests.helpers import EmulatedSession
+
+
+def field(name, typename, kind="OBJECT"):
+    return graphql.Field(name, graphql.TypeRef(typename, kind))
+
+
+class TestExplorer(unittest.TestCase):
+    def setUp(self):
+        config = graphql.Config()
+        self.session = graphql.Session(config)
+        self.schema = graphql.Schema(queryType="Query", mutationType="Mutation")
+        self.explorer = explorer.Explorer([], config, self.session, self.schema)
+
+    def add(self, parent, f):
+        self.schema.add_type(f.type.name, "OBJECT")
+        self.schema.add_field(parent, f)
+        self.explorer.enqueue([f.type.name])
+
+    def test_worklist_order(self):
+        self.add("Query", field("user", "User"))
+        self.add("Query", field("name", "String", "SCALAR"))
+        self.add("Query", field("post", "Post"))
+
+        self.assertEqual(self.explorer.next_document(), "mutation { FUZZ }")
+        self.assertEqual(self.explorer.next_document(), "query { user { FUZZ } }")
+        self.assertEqual(self.explorer.next_document(), "query { post { FUZZ } }")
+        self.assertIsNone(self.explorer.next_document())
+        self.assertIn("User", self.explorer.ignore)
+
+    def test_skips_unreachable_and_known_types(self):
+        self.add("Query", field("user", "User"))
+        self.schema.add_type("Orphan", "OBJECT")
+        self.explorer.enqueue(["Orphan"])
+        self.schema.add_field("Mutation", field("ok", "Boolean", "SCALAR"))
+
+        self.assertEqual(self.explorer.next_document(), "query { user { FUZZ } }")
+        self.assertIsNone(self.explorer.next_document())
+
+    def test_state_roundtrip(self):
+        self.add("Query", field("user", "User"))
+        self.explorer.documents.append(self.explorer.next_document())
+        state = json.loads(json.dumps(self.explorer.state()))
+
+        resumed = explorer.Explorer.from_state(state, [], graphql.Config(), self.session)
+
+        self.assertEqual(resumed.schema.to_json(), self.schema.to_json())
+        self.assertEqual(list(resumed.documents), ["mutation { FUZZ }"])
+        self.assertEqual(resumed.next_document(), "query { user { FUZZ } }")
+
+    def test_serializing_keeps_schema(self):
+        self.schema.to_json()
+        self.assertEqual(self.schema.to_json(), self.schema.to_json())
+        self.assertEqual(self.schema.types["Mutation"].fields, [])
+
+
+class TestConcurrentExploration(unittest.TestCase):
+    def setUp(self):
+        with open("tests/data/apollo.graphql") as f:
+            self.sdl = f.read()
+        with open("tests/data/wordlist-for-apollo-server.txt") as f:
+            self.wordlist = [line.strip() for line in f if line.strip()]
+
+    def explore(self, concurrency, parallel_types, seed):
+        config = graphql.Config()
+        config.concurrency = concurrency
+        config.parallel_types = parallel_types
+        # Small buckets and packs, so that many requests are in flight
+        config.bucket_size = 8
+        config.pack_fields = 2
+        session = EmulatedSession(config, self.sdl, seed=seed)
+
+        e = explorer.Explorer(self.wordlist, config, session)
+        asyncio.run(e.run())
+        return json.loads(e.schema.to_json())
+
+    def test_same_schema_as_sequential(self):
+        sequential = self.explore(1, 1, seed=0)
+        types = {t["name"] for t in sequential["data"]["__schema"]["types"]}
+        self.assertTrue({"Query", "Mutation", "Launch", "Mission", "User"} <= types)
+
+        # Answers come back in other orders with other seeds
+        for seed in range(1, 4):
+            self.assertEqual(self.explore(8, 4, seed), sequential)
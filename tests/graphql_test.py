@@ -2,6 +2,7 @@ import unittest
 import logging
 import json
 import time
+import asyncio
 import subprocess
 
 logging.basicConfig(level=logging.ERROR)
@@ -47,6 +48,51 @@ class TestSchema(unittest.TestCase):
         self.assertEqual(got, want)
 
 
+class TestPathFromRoot(unittest.TestCase):
+    def setUp(self):
+        self.schema = graphql.Schema(queryType="Query")
+
+    def add(self, parent, name, typename):
+        self.schema.add_type(typename, "OBJECT")
+        field = graphql.Field(name, graphql.TypeRef(typename, "OBJECT"))
+        self.schema.add_field(parent, field)
+
+    def test_shortest_path(self):
+        self.add("Query", "a", "A")
+        self.add("A", "b", "B")
+        self.add("B", "c", "C")
+        self.add("Query", "c", "C")
+
+        self.assertEqual(self.schema.get_path_from_root("C"), ["Query", "c"])
+        self.assertEqual(self.schema.get_path_from_root("Query"), ["Query"])
+
+    def test_cycle_and_unreachable(self):
+        self.add("Query", "a", "A")
+        self.add("A", "self", "A")
+        self.add("Orphan", "orphan", "Orphan")
+
+        self.assertEqual(self.schema.get_path_from_root("A"), ["Query", "a"])
+        with self.assertRaises(Exception):
+            self.schema.get_path_from_root("Orphan")
+
+    def test_cache_follows_schema(self):
+        self.add("Query", "a", "A")
+        self.add("A", "b", "B")
+        self.schema.get_path_from_root("B").pop()
+        self.assertEqual(self.schema.get_path_from_root("B"), ["Query", "a", "b"])
+
+        self.add("Query", "b", "B")
+        self.assertEqual(self.schema.get_path_from_root("B"), ["Query", "b"])
+
+    def test_deep_schema(self):
+        for i in range(5000):
+            self.add("Query" if i == 0 else f"T{i - 1}", f"f{i}", f"T{i}")
+
+        path = self.schema.get_path_from_root("T4999")
+        self.assertEqual(len(path), 5001)
+        self.assertEqual(path[-1], "f4999")
+
+
 class TestPost(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -62,6 +108,64 @@ class TestPost(unittest.TestCase):
         response = graphql.post("http://localhost:8000")
         self.assertEqual(response.status_code, 200)
 
+    def test_session_retries_on_500(self):
+        config = graphql.Config()
+        config.url = "http://localhost:8000"
+        config.retry_backoff = 0
+
+        async def send():
+            async with graphql.Session(config) as session:
+                return [await session.send("{ a }") for _ in range(3)]
+
+        for response in asyncio.run(send()):
+            self.assertEqual(response.status_code, 200)
+
+
+class TestHedging(unittest.TestCase):
+    def test_second_copy_wins(self):
+        config = graphql.Config()
+        config.hedge_percentile = 95
+        session = graphql.Session(config)
+        for _ in range(20):
+            session.latencies.add(0.01)
+
+        delays = [1, 0]
+
+        async def attempt(document, probe, sent=None):
+            if sent:
+                sent.set()
+            delay = delays.pop(0)
+            await asyncio.sleep(delay)
+            return delay
+
+        session.attempt = attempt
+
+        start = time.monotonic()
+        self.assertEqual(asyncio.run(session.hedged("{ a }")), 0)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_queueing_is_not_hedged(self):
+        config = graphql.Config()
+        config.hedge_percentile = 95
+        session = graphql.Session(config)
+        for _ in range(20):
+            session.latencies.add(0.01)
+
+        attempts = []
+
+        async def attempt(document, probe, sent=None):
+            attempts.append(document)
+            # Waits its turn well past the threshold, then answers quickly
+            await asyncio.sleep(0.2)
+            sent.set()
+            await asyncio.sleep(0.005)
+            return "answer"
+
+        session.attempt = attempt
+
+        self.assertEqual(asyncio.run(session.hedged("{ a }")), "answer")
+        self.assertEqual(len(attempts), 1)
+
 
 class TestToJson(unittest.TestCase):
     def test_typeref_to_json(self):
@@ -0,0 +1,83 @@
+import random
+import asyncio
+import datetime
+
+import httpx
+
+from clairvoyance import graphql
+from clairvoyance import buckets
+from clairvoyance import metrics
+from clairvoyance import evidence
+from tests.server import emulator
+
+
+class LimitedSession:
+    # Answers like a server reporting at most cap validation errors and
+    # rejecting requests larger than max_bytes
+    sizer = graphql.Session.sizer
+    fit = graphql.Session.fit
+    request_size = graphql.Session.request_size
+
+    def __init__(self, config, valid, cap=10**9, too_many=False, max_bytes=None):
+        self.config = config
+        self.valid = valid
+        self.cap = cap
+        self.too_many = too_many
+        self.max_bytes = max_bytes
+        self.sizers = {}
+        self.budget = buckets.ByteBudget(config.command)
+        self.metrics = metrics.Metrics()
+        self.evidence = evidence.Evidence()
+        self.requests = 0
+
+    async def send(self, document, probe="other"):
+        self.requests += 1
+        size = self.request_size(document)
+        if self.max_bytes and size > self.max_bytes:
+            response = httpx.Response(413 if self.config.command == "POST" else 414)
+            self.budget.record(size, response)
+            return response
+
+        words = document[len("query { ") : -len(" }")].split()
+        errors = [
+            {"message": f'Cannot query field "{w}" on type "Query".'}
+            for w in words
+            if w not in self.valid
+        ]
+        if len(errors) > self.cap:
+            errors = errors[: self.cap]
+            if self.too_many:
+                errors.append(
+                    {"message": "Too many validation errors, error limit reached. Validation aborted."}
+                )
+
+        response = httpx.Response(200, json={"errors": errors})
+        response.elapsed = datetime.timedelta(seconds=0.1)
+        self.budget.record(size, response)
+        return response
+
+
+class EmulatedSession(graphql.Session):
+    # A real session, answered by tests/server/emulator.py instead of the
+    # network. Answers come back after a short random delay, so that
+    # concurrent probes finish in another order than they started
+    def __init__(self, config, sdl, reverse_errors=False, seed=0):
+        super().__init__(config)
+        self.emulator = emulator.Emulator(emulator.Schema.from_sdl(sdl))
+        self.reverse_errors = reverse_errors
+        self.random = random.Random(seed)
+        self.documents = []
+
+    async def fetch(self, document, probe="other"):
+        self.documents.append(document)
+        await asyncio.sleep(self.random.random() / 1000)
+        status, body = self.emulator.answer(document)
+        if self.reverse_errors and "errors" in body:
+            body["errors"].reverse()
+        response = httpx.Response(status, json=body)
+        response.elapsed = datetime.timedelta(seconds=0.01)
+        return response
+
+
+def typeref(name, kind="OBJECT"):
+    return graphql.TypeRef(name, kind)
@@ -0,0 +1,99 @@
+import unittest
+
+from clairvoyance import messages
+
+
+class TestClassify(unittest.TestCase):
+    def test_invalid_field(self):
+        got = messages.classify('Cannot query field "home" on type "Query".')
+        self.assertEqual(got.kind, messages.INVALID_FIELD)
+        self.assertEqual(got.field, "home")
+        self.assertEqual(got.type, "Query")
+        self.assertEqual(got.suggestions, [])
+
+    def test_invalid_field_suggestions(self):
+        got = messages.classify(
+            'Cannot query field "home" on type "Home". Did you mean "homeId", "name", or "role"?'
+        )
+        self.assertEqual(got.kind, messages.INVALID_FIELD)
+        self.assertEqual(got.field, "home")
+        self.assertEqual(got.suggestions, ["homeId", "name", "role"])
+
+    def test_invalid_field_inline_fragment(self):
+        got = messages.classify(
+            'Cannot query field "foo" on type "Character". Did you mean to use an inline fragment on "Human" or "Droid"?'
+        )
+        self.assertEqual(got.kind, messages.INVALID_FIELD)
+        self.assertEqual(got.field, "foo")
+        self.assertEqual(got.type, "Character")
+        self.assertEqual(got.suggestions, [])
+
+    def test_subfields_required(self):
+        got = messages.classify(
+            'Field "launches" of type "[Launch]!" must have a selection of subfields. Did you mean "launches { ... }"?'
+        )
+        self.assertEqual(got.kind, messages.SUBFIELDS_REQUIRED)
+        self.assertEqual(got.field, "launches")
+        self.assertEqual(got.typeref, "[Launch]!")
+
+    def test_no_subfields(self):
+        got = messages.classify(
+            'Field "isMfaEnabled" must not have a selection since type "Boolean!" has no subfields.'
+        )
+        self.assertEqual(got.kind, messages.NO_SUBFIELDS)
+        self.assertEqual(got.field, "isMfaEnabled")
+        self.assertEqual(got.typeref, "Boolean!")
+
+    def test_unknown_argument(self):
+        got = messages.classify(
+            'Unknown argument "fasten" on field "filmConnection" of type "Vehicle". Did you mean "after" or "last"?'
+        )
+        self.assertEqual(got.kind, messages.UNKNOWN_ARGUMENT)
+        self.assertEqual(got.argument, "fasten")
+        self.assertEqual(got.field, "filmConnection")
+        self.assertEqual(got.type, "Vehicle")
+        self.assertEqual(got.suggestions, ["after", "last"])
+
+    def test_unknown_argument_qualified_field(self):
+        got = messages.classify('Unknown argument "x" on field "Query.launch".')
+        self.assertEqual(got.kind, messages.UNKNOWN_ARGUMENT)
+        self.assertEqual(got.field, "launch")
+        self.assertEqual(got.type, "Query")
+
+    def test_required_argument(self):
+        got = messages.classify(
+            'Field "bookTrips" argument "launchIds" of type "[ID]!" is required, but it was not provided.'
+        )
+        self.assertEqual(got.kind, messages.REQUIRED_ARGUMENT)
+        self.assertEqual(got.field, "bookTrips")
+        self.assertEqual(got.argument, "launchIds")
+        self.assertEqual(got.typeref, "[ID]!")
+
+    def test_expected_type(self):
+        got = messages.classify("Expected type Int, found {p7001: 7}; bad value.")
+        self.assertEqual(got.kind, messages.EXPECTED_TYPE)
+        self.assertEqual(got.typeref, "Int")
+        self.assertEqual(got.value, "{p7001: 7}")
+
+    def test_input_fields(self):
+        got = messages.classify('Field "nam" is not defined by type SetNameForHomeInput.')
+        self.assertEqual(got.kind, messages.UNDEFINED_INPUT_FIELD)
+        self.assertEqual(got.field, "nam")
+
+        got = messages.classify(
+            "Field SetNameForHomeInput.name of required type String! was not provided."
+        )
+        self.assertEqual(got.kind, messages.REQUIRED_INPUT_FIELD)
+        self.assertEqual(got.type, "SetNameForHomeInput")
+        self.assertEqual(got.field, "name")
+        self.assertEqual(got.typeref, "String!")
+
+    def test_too_many_errors(self):
+        got = messages.classify(
+            "Too many validation errors, error limit reached. Validation aborted."
+        )
+        self.assertEqual(got.kind, messages.TOO_MANY_ERRORS)
+
+    def test_unknown(self):
+        got = messages.classify("Syntax Error: Unexpected Name \"lol\".")
+        self.assertEqual(got.kind, messages.UNKNOWN)
@@ -0,0 +1,56 @@
+import os
+import json
+import tempfile
+import unittest
+
+from clairvoyance import metrics
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = metrics.Metrics()
+        for i in range(100):
+            self.metrics.request("fields", 1000, 200, (i + 1) / 100)
+        self.metrics.request("typename", 50, 100, 0.02)
+        self.metrics.count("fields", "errors", 4000)
+        self.metrics.count("fields", "retries")
+        self.metrics.fields = 20
+
+    def test_report(self):
+        report = self.metrics.report()
+
+        self.assertEqual(report["requests"], 101)
+        self.assertEqual(report["bytes_sent"], 100050)
+        self.assertEqual(report["retries"], 1)
+        self.assertEqual(report["requests_per_field"], 5.05)
+
+        fields = report["probes"]["fields"]
+        self.assertEqual(fields["errors"], 4000)
+        self.assertEqual(fields["latency"]["p50"], 0.51)
+        self.assertEqual(fields["latency"]["p95"], 0.96)
+        self.assertEqual(fields["latency"]["p99"], 1.0)
+        self.assertEqual(report["probes"]["typename"]["latency"]["max"], 0.02)
+
+    def test_prometheus(self):
+        text = self.metrics.prometheus()
+
+        self.assertIn('clairvoyance_requests_total{probe="fields"} 100', text)
+        self.assertIn("# TYPE clairvoyance_request_duration_seconds histogram", text)
+        self.assertIn(
+            'clairvoyance_request_duration_seconds_bucket{probe="fields",le="0.25"} 25', text
+        )
+        self.assertIn(
+            'clairvoyance_request_duration_seconds_bucket{probe="fields",le="+Inf"} 100', text
+        )
+        self.assertIn("clairvoyance_fields 20", text)
+
+    def test_write(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics.json")
+            prometheus = os.path.join(directory, "metrics.prom")
+            self.metrics.write(path, prometheus)
+
+            with open(path) as f:
+                self.assertEqual(json.load(f)["requests"], 101)
+            self.assertTrue(os.path.exists(prometheus))
+            self.assertEqual(sorted(os.listdir(directory)), ["metrics.json", "metrics.prom"])
@@ -1,10 +1,23 @@
 import time
+import asyncio
 import logging
 import unittest
+import tempfile
 import subprocess
 
+import httpx
+
 from clairvoyance import graphql
 from clairvoyance import oracle
+from clairvoyance import metrics
+from clairvoyance import evidence
+from clairvoyance import checkpoint
+from clairvoyance import ratelimit
+from clairvoyance.cache import ResponseCache
+from tests.server import emulator
+from tests.helpers import LimitedSession
+from tests.helpers import EmulatedSession
+from tests.helpers import typeref
 
 
 class TestGetValidFields(unittest.TestCase):
@@ -156,6 +169,31 @@ class TestGetTypeRef(unittest.TestCase):
         self.assertCountEqual(["WARNING:root:Dummy warning"], cm.output)
 
 
+class TestGetFieldTypeRef(unittest.TestCase):
+    def test_object_field(self):
+        want = (
+            "homes",
+            graphql.TypeRef(name="Home", kind="OBJECT", is_list=True, non_null=True),
+        )
+        got = oracle.get_field_typeref(
+            'Field "homes" of type "[Home]!" must have a selection of subfields. Did you mean "homes { ... }"?'
+        )
+        self.assertEqual(got, want)
+
+    def test_leaf_field(self):
+        want = ("isMfaEnabled", graphql.TypeRef(name="Boolean", kind="SCALAR"))
+        got = oracle.get_field_typeref(
+            'Field "isMfaEnabled" must not have a selection since type "Boolean" has no subfields.'
+        )
+        self.assertEqual(got, want)
+
+    def test_unnamed_field(self):
+        got = oracle.get_field_typeref(
+            'Cannot query field "lol" on type "HomeSettings".'
+        )
+        self.assertIsNone(got)
+
+
 class TestTypeRef(unittest.TestCase):
     def test_to_json(self):
         name = "TestObject"
@@ -230,6 +268,459 @@ class TestProbeTypename(unittest.TestCase):
         typename = oracle.probe_typename("123", config)
         self.assertEqual(typename, "Mutation")
 
+    def test_async_probe_typename(self):
+        config = graphql.Config()
+        config.url = "http://localhost:8001"
+        config.command = "POST"
+
+        async def probe():
+            async with graphql.Session(config) as session:
+                return await asyncio.gather(
+                    *[
+                        oracle.async_probe_typename("query { FUZZ }", config, session)
+                        for _ in range(4)
+                    ]
+                )
+
+        self.assertEqual(asyncio.run(probe()), ["Mutation"] * 4)
+
+
+class TestConfirmArgs(unittest.TestCase):
+    sdl = """
+        type Query {
+            user(id: ID, name: String): Node
+            account(id: ID, name: String): Node
+            profile(id: ID, name: String, locale: String): Node
+            search(text: String): Node
+        }
+        type Node { id: ID }
+    """
+
+    def setUp(self):
+        self.config = graphql.Config()
+        self.session = EmulatedSession(self.config, self.sdl)
+        signature = frozenset(["id", "name"])
+        self.session.type_args["Node"] = signature
+        self.session.signatures[signature] = 2
+        # Known from another field, but not a set of arguments to confirm
+        self.session.signatures[frozenset(["locale"])] = 1
+
+    def confirm(self, *names):
+        fields = [graphql.Field(name, typeref("Node")) for name in names]
+        return asyncio.run(
+            oracle.async_confirm_args(fields, self.config, "query { FUZZ }", self.session)
+        )
+
+    def test_match(self):
+        self.assertEqual(self.confirm("user", "account"), {"user": {"id", "name"}, "account": {"id", "name"}})
+        self.assertEqual(len(self.session.documents), 1)
+        self.assertEqual(self.session.metrics.counters["args"]["confirmed"], 2)
+
+    def test_superset(self):
+        # profile takes one more argument, found since it was seen elsewhere
+        self.assertEqual(self.confirm("profile"), {})
+        self.assertEqual(self.session.metrics.counters["args"]["unconfirmed"], 1)
+
+    def test_mismatch(self):
+        self.assertEqual(self.confirm("user", "search"), {"user": {"id", "name"}})
+        self.assertEqual(self.session.metrics.counters["args"]["unconfirmed"], 1)
+
+    def test_rarely_seen(self):
+        self.session.signatures[frozenset(["id", "name"])] = 1
+        self.assertEqual(self.confirm("user"), {})
+        self.assertEqual(self.session.documents, [])
+
+
+class TestPackedArgs(unittest.TestCase):
+    sdl = """
+        type Query {
+            user(id: ID, name: String): Node
+            account(id: ID, number: Int): Node
+            ping: Boolean
+            viewer: Node
+        }
+        type Node { id: ID }
+    """
+
+    def probe(self, units, reverse_errors=False):
+        config = graphql.Config()
+        session = EmulatedSession(config, self.sdl, reverse_errors)
+        valid_args = asyncio.run(
+            oracle.async_probe_packed_args(units, config, "query { FUZZ }", session)
+        )
+        self.assertEqual(len(session.documents), 1)
+        return valid_args
+
+    def test_errors_out_of_order(self):
+        # Errors name fields, not aliases, so their order doesn't matter
+        words = ["id", "name", "number", "nope"]
+        units = [("user", words), ("account", words)]
+        want = {"user": {"id", "name"}, "account": {"id", "number"}}
+
+        self.assertEqual(self.probe(units), want)
+        self.assertEqual(self.probe(units, reverse_errors=True), want)
+
+    def test_fields_without_arguments(self):
+        words = ["id", "name"]
+        units = [("ping", words), ("user", words), ("viewer", words)]
+
+        self.assertEqual(
+            self.probe(units, reverse_errors=True),
+            {"ping": set(), "user": {"id", "name"}, "viewer": set()},
+        )
+
+
+class TestProbeFieldTypes(unittest.TestCase):
+    sdl = """
+        type Query {
+            a: Node
+            b: [Node!]
+            c: Int!
+            d: String
+        }
+        type Node { id: ID }
+    """
+
+    def setUp(self):
+        self.config = graphql.Config()
+        self.session = EmulatedSession(self.config, self.sdl)
+
+    def probe(self):
+        return asyncio.run(
+            oracle.async_probe_field_types(
+                ["a", "b", "c", "d"], self.config, "query { FUZZ }", self.session
+            )
+        )
+
+    def sdl_types(self, typerefs):
+        return {f: emulator.typeref_from_json(t.to_json()) for f, t in typerefs.items()}
+
+    def test_documents(self):
+        # Objects are named by the first document, leaves by the second one
+        self.assertEqual(
+            self.sdl_types(self.probe()), {"a": "Node", "b": "[Node!]", "c": "Int!", "d": "String"}
+        )
+        self.assertEqual(
+            self.session.documents,
+            ["query { a b c d }", "query { c { lol } d { lol } }"],
+        )
+
+    def test_fallback(self):
+        # A server reporting a single error leaves the rest to the per-field
+        # probe of async_probe_fields
+        answer = self.session.emulator.answer
+
+        def capped(document):
+            status, body = answer(document)
+            if "errors" in body:
+                body["errors"] = body["errors"][:1]
+            return status, body
+
+        self.session.emulator.answer = capped
+        typerefs = self.probe()
+        self.assertEqual(self.sdl_types(typerefs), {"a": "Node"})
+
+        fields = asyncio.run(
+            oracle.async_probe_fields(
+                ["a", "b", "c", "d"], [], self.config, "query { FUZZ }", self.session, typerefs
+            )
+        )
+        self.assertEqual(
+            {f.name: emulator.typeref_from_json(f.type.to_json()) for f in fields},
+            {"a": "Node", "b": "[Node!]", "c": "Int!", "d": "String"},
+        )
+        self.assertIn("query { b }", self.session.documents)
+        self.assertIn("query { d { lol } }", self.session.documents)
+
+    def test_evidence(self):
+        # The bucket of the leaves c and d would have taken two documents
+        self.config.bucket_size = 2
+        self.session.evidence.fields[("query { FUZZ }", "c")] = "Int!"
+        self.session.evidence.fields[("query { FUZZ }", "d")] = "String"
+
+        self.assertEqual(len(self.probe()), 4)
+        self.assertEqual(self.session.documents, ["query { a b }"])
+        self.assertEqual(self.session.evidence.saved, 2)
+
+
+class TestDiscover(unittest.TestCase):
+    def setUp(self):
+        self.config = graphql.Config()
+        self.config.discover_words = 2
+        self.sent = []
+
+    def discover(self, answer, wordlist, seeds, max_rounds=10):
+        async def probe(words):
+            self.sent.append(words)
+            return {"": answer(words)}
+
+        return asyncio.run(
+            oracle.async_discover(probe, wordlist, seeds, self.config, max_rounds)
+        )
+
+    def test_variants(self):
+        valid = {"user", "users", "userId", "alpha", "getAlpha"}
+        found = self.discover(lambda words: valid & set(words), ["alpha", "beta", "gamma"], {"user"})
+
+        self.assertEqual(found, {"": valid})
+        self.assertEqual(self.sent[0], ["user", "alpha", "beta"])
+        self.assertNotIn("gamma", set().union(*self.sent))
+
+    def test_endless_variants(self):
+        # Every sweep turns up a name never seen before
+        def answer(words):
+            return {f"name{len(self.sent)}"}
+
+        with self.assertLogs(level=logging.WARNING):
+            found = self.discover(answer, ["alpha"], set(), max_rounds=3)
+
+        self.assertEqual(len(self.sent), 4)
+        self.assertIn("alpha", self.sent[0])
+        self.assertEqual(found[""], {"name1", "name2", "name3", "name4"})
+
+
+class TestFieldsArgs(unittest.TestCase):
+    sdl = """
+        type Query {
+            user(id: ID, name: String): Node
+            account(id: ID, number: Int): Node
+            ping: Boolean
+        }
+        type Node { id: ID }
+    """
+
+    def test_bounded_documents(self):
+        # Packs are rendered as workers get to them, not all up front
+        config = graphql.Config()
+        config.concurrency = 4
+        config.bucket_size = 10
+        session = EmulatedSession(config, self.sdl)
+        pending = []
+        most = 0
+
+        async def send(document, probe="other"):
+            nonlocal most
+            pending.append(document)
+            most = max(most, len(pending))
+            try:
+                return await graphql.Session.send(session, document, probe)
+            finally:
+                pending.remove(document)
+
+        session.send = send
+        wordlist = [f"w{i}" for i in range(500)] + ["id", "name", "number"]
+        valid_args = asyncio.run(
+            oracle.async_probe_fields_args(
+                ["user", "account", "ping"], wordlist, config, "query { FUZZ }", session
+            )
+        )
+
+        self.assertEqual(
+            valid_args, {"user": {"id", "name"}, "account": {"id", "number"}, "ping": set()}
+        )
+        self.assertLessEqual(most, config.concurrency)
+
+    def test_fields_overlap(self):
+        # The args of a field are probed while another field is still typed
+        config = graphql.Config()
+        config.bulk_types = False
+        config.pack_fields = 1
+        session = EmulatedSession(config, self.sdl)
+        sent = []
+
+        async def send(document, probe="other"):
+            if probe == "typeref" and "ping" in document:
+                await asyncio.sleep(0.05)
+            sent.append((probe, document))
+            return await graphql.Session.send(session, document, probe)
+
+        session.send = send
+        wordlist = ["user", "account", "ping", "id", "name", "number"]
+        typename, fields = asyncio.run(
+            oracle.async_probe_type(wordlist, config, "query { FUZZ }", session)
+        )
+
+        # user and account are typed by the errors of the field sweep, ping
+        # takes its own requests
+        args = min(i for i, (p, d) in enumerate(sent) if p == "args")
+        ping = max(i for i, (p, d) in enumerate(sent) if p == "typeref" and "ping" in d)
+        self.assertLess(args, ping)
+        self.assertEqual(
+            [(f.name, sorted(a.name for a in f.args)) for f in fields],
+            [("account", ["id", "number"]), ("ping", []), ("user", ["id", "name"])],
+        )
+
+
+class TestProbeArgTyperefs(unittest.TestCase):
+    sdl = """
+        scalar JSON
+        input FilterInput { term: String }
+        type Query {
+            search(id: ID!, limit: Int, filter: FilterInput, tags: [String!], meta: JSON, ids: [ID]!): Node
+        }
+        type Node { id: ID }
+    """
+
+    def setUp(self):
+        self.config = graphql.Config()
+        self.session = EmulatedSession(self.config, self.sdl)
+
+    def probe(self, args):
+        typerefs = asyncio.run(
+            oracle.async_probe_arg_typerefs(
+                "search", args, self.config, "query { FUZZ }", self.session
+            )
+        )
+        return {arg: emulator.typeref_from_json(t.to_json()) for arg, t in typerefs.items()}
+
+    def test_kinds(self):
+        self.assertEqual(
+            self.probe(["limit", "filter", "tags"]),
+            {"limit": "Int", "filter": "FilterInput", "tags": "[String!]"},
+        )
+        # Integers tell filter and tags apart, and an object limit
+        self.assertEqual(len(self.session.documents), 3)
+
+    def test_wrappers(self):
+        self.assertEqual(self.probe(["id", "ids"]), {"id": "ID!", "ids": "[ID]!"})
+        self.assertEqual(self.session.documents, ["query { search }"])
+
+    def test_never_mentioned(self):
+        # A custom scalar takes any value, so no error ever names meta. The
+        # required id must not be taken for it
+        self.assertEqual(self.probe(["id", "limit", "meta"]), {"id": "ID!", "limit": "Int"})
+
+
+class TestTruncatedErrors(unittest.TestCase):
+    def setUp(self):
+        self.wordlist = [f"w{i}" for i in range(1000)]
+        self.valid = {"w3", "w500", "w998"}
+        self.config = graphql.Config()
+        self.config.bucket_size = 1000
+
+    def probe(self, session):
+        return asyncio.run(
+            oracle.async_probe_valid_fields(
+                self.wordlist, self.config, "query { FUZZ }", session
+            )
+        )
+
+    def test_silent_cap(self):
+        session = LimitedSession(self.config, self.valid, 100)
+        self.assertEqual(self.probe(session), self.valid)
+        self.assertEqual(session.sizer("fields").error_cap, 100)
+
+    def test_reported_cap(self):
+        session = LimitedSession(self.config, self.valid, 100, too_many=True)
+        self.assertEqual(self.probe(session), self.valid)
+        # The first answer settles its first 100 words, the rest goes in
+        # pieces of the cap
+        self.assertLessEqual(session.requests, 1 + 1000 // 100 + 2)
+
+    def test_adaptive(self):
+        self.config.adaptive_buckets = True
+        session = LimitedSession(self.config, self.valid, 100, too_many=True)
+        self.assertEqual(self.probe(session), self.valid)
+        self.assertEqual(session.sizer("fields").size, 100)
+
+    def test_not_json(self):
+        # A page from a proxy instead of errors is no cap of 0 errors
+        session = LimitedSession(self.config, self.valid)
+
+        async def send(document, probe="other"):
+            return httpx.Response(200, text="<html>Bad gateway</html>")
+
+        session.send = send
+        self.probe(session)
+        self.assertIsNone(session.sizer("fields").error_cap)
+        self.assertEqual(session.sizer("fields").size, 1000)
+
+
+class TestThrottled(unittest.TestCase):
+    def test_persistent_429(self):
+        # Words of a bucket answered 429 are not taken for valid fields
+        config = graphql.Config()
+        config.url = "http://localhost/graphql"
+        config.throttle_retries = 2
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(429, headers={"Retry-After": "0"})
+
+        async def probe():
+            async with graphql.Session(config) as session:
+                await session.client.aclose()
+                session.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+                session.limiter.min_rate = 100
+                return await oracle.async_probe_valid_fields(
+                    ["user", "nope"], config, "query { FUZZ }", session
+                )
+
+        with self.assertRaises(ratelimit.Throttled):
+            asyncio.run(probe())
+        self.assertEqual(len(requests), 3)
+
+
+class TestByteBudget(unittest.TestCase):
+    def setUp(self):
+        self.wordlist = [f"w{i}" for i in range(1000)]
+        self.valid = {"w3", "w500", "w998"}
+        self.config = graphql.Config()
+        self.config.url = "http://localhost/graphql"
+        self.config.bucket_size = 1000
+
+    def probe(self, session):
+        return asyncio.run(
+            oracle.async_probe_valid_fields(
+                self.wordlist, self.config, "query { FUZZ }", session
+            )
+        )
+
+    def test_post(self):
+        session = LimitedSession(self.config, self.valid, max_bytes=1000)
+        self.assertEqual(self.probe(session), self.valid)
+        self.assertLess(session.budget.limit, 1000)
+        self.assertLessEqual(session.requests, 16)
+
+    def test_get(self):
+        self.config.command = "GET"
+        session = LimitedSession(self.config, self.valid, max_bytes=2000)
+        self.assertEqual(self.probe(session), self.valid)
+        self.assertLess(session.budget.limit, 2000)
+
+    def test_adaptive(self):
+        self.config.adaptive_buckets = True
+        session = LimitedSession(self.config, self.valid, max_bytes=1000)
+        self.assertEqual(self.probe(session), self.valid)
+
+    def test_journaled_rejection(self):
+        # A resumed run replays the 413 its first bucket got, and still has to
+        # cut the bucket instead of asking the journal again and again
+        limited = LimitedSession(self.config, self.valid)
+
+        with tempfile.TemporaryDirectory() as directory:
+            document = "query { " + " ".join(self.wordlist) + " }"
+            key = ResponseCache.key("POST", self.config.url, {}, {}, document)
+            journal = checkpoint.Checkpoint(directory)
+            journal.put(key, httpx.Response(413, json={"errors": [{"message": "Payload Too Large"}]}))
+            journal.close()
+
+            session = graphql.Session(self.config)
+            session.checkpoint = checkpoint.Checkpoint(directory, resume=True)
+
+            async def fetch(document, probe="other"):
+                return await limited.send(document, probe)
+
+            session.fetch = fetch
+            try:
+                self.assertEqual(self.probe(session), self.valid)
+            finally:
+                session.checkpoint.close()
+
+        self.assertIsNotNone(session.budget.limit)
+        self.assertEqual(session.checkpoint.replayed, 1)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,103 @@
+import os
+import json
+import pstats
+import asyncio
+import tempfile
+import unittest
+import tracemalloc
+
+from clairvoyance import graphql
+from clairvoyance import oracle
+from clairvoyance import profiling
+from tests.helpers import EmulatedSession
+
+
+class TestProfiler(unittest.TestCase):
+    def test_spans(self):
+        profiler = profiling.Profiler()
+
+        async def probe(seconds: float) -> None:
+            with profiler.span("field_sweep"):
+                await asyncio.sleep(seconds)
+
+        async def run() -> None:
+            await asyncio.gather(probe(0.1), probe(0.1), probe(0.05))
+
+        asyncio.run(run())
+        phase = profiler.report()["phases"]["field_sweep"]
+
+        self.assertEqual(phase["spans"], 3)
+        self.assertAlmostEqual(phase["total"], 0.25, delta=0.05)
+        self.assertAlmostEqual(phase["busy"], 0.1, delta=0.05)
+        self.assertAlmostEqual(phase["max"], 0.1, delta=0.05)
+        self.assertEqual(profiler.report()["phases"]["arg_sweep"]["spans"], 0)
+
+    def test_nested_spans(self):
+        profiler = profiling.Profiler()
+
+        async def probe() -> None:
+            with profiler.span("type_inference"):
+                await asyncio.sleep(0.05)
+
+        async def run() -> None:
+            with profiler.span("type_inference"):
+                await asyncio.gather(probe(), probe())
+            await probe()
+
+        asyncio.run(run())
+        phase = profiler.report()["phases"]["type_inference"]
+
+        # Only the outer span and the one opened after it count
+        self.assertEqual(phase["spans"], 2)
+        self.assertAlmostEqual(phase["total"], 0.1, delta=0.03)
+        self.assertAlmostEqual(phase["busy"], 0.1, delta=0.03)
+
+    def test_span_on_error(self):
+        profiler = profiling.Profiler()
+        with self.assertRaises(ValueError):
+            with profiler.span("roots"):
+                raise ValueError()
+
+        self.assertEqual(profiler.report()["phases"]["roots"]["spans"], 1)
+        self.assertFalse(profiler.open["roots"])
+
+    def test_dumps(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cpu = os.path.join(directory, "cpu.prof")
+            memory = os.path.join(directory, "memory.snapshot")
+            report = os.path.join(directory, "profile.json")
+
+            profiler = profiling.Profiler()
+            profiler.start(cpu, memory)
+            with profiler.span("serialization"):
+                json.dumps([list(range(100)) for _ in range(100)])
+            profiler.stop()
+            profiler.write(report)
+
+            self.assertFalse(tracemalloc.is_tracing())
+            self.assertTrue(pstats.Stats(cpu).total_calls)
+            self.assertTrue(tracemalloc.Snapshot.load(memory).traces)
+            with open(report) as f:
+                self.assertIn("peak", json.load(f)["memory"])
+            self.assertEqual(sorted(os.listdir(directory)), ["cpu.prof", "memory.snapshot", "profile.json"])
+
+    def test_probe_type_phases(self):
+        with open("tests/data/apollo.graphql") as f:
+            sdl = f.read()
+        # The bulk probe types every field in one span, without it each field
+        # is typed in the pipeline of its group
+        for bulk_types, spans in [(True, 1), (False, 3)]:
+            config = graphql.Config()
+            config.bulk_types = bulk_types
+            config.pack_fields = 1
+            session = EmulatedSession(config, sdl)
+            asyncio.run(
+                oracle.async_probe_type(
+                    ["launch", "launches", "me", "nope"], config, "query { FUZZ }", session
+                )
+            )
+            phases = session.profiler.report()["phases"]
+
+            self.assertEqual(phases["type_inference"]["spans"], spans)
+            self.assertEqual(phases["field_sweep"]["spans"], 1)
+            self.assertGreaterEqual(phases["arg_sweep"]["spans"], 1)
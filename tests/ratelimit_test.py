@@ -0,0 +1,90 @@
+import time
+import asyncio
+import unittest
+import email.utils
+
+import httpx
+
+from clairvoyance import ratelimit
+
+
+URL = "http://localhost:8001/graphql"
+
+
+class TestParseRetryAfter(unittest.TestCase):
+    def test_seconds(self):
+        self.assertEqual(ratelimit.parse_retry_after("3"), 3.0)
+        self.assertEqual(ratelimit.parse_retry_after("-1"), 0.0)
+
+    def test_http_date(self):
+        date = email.utils.formatdate(time.time() + 30, usegmt=True)
+        got = ratelimit.parse_retry_after(date)
+        self.assertTrue(25 <= got <= 30)
+
+    def test_invalid(self):
+        self.assertIsNone(ratelimit.parse_retry_after(None))
+        self.assertIsNone(ratelimit.parse_retry_after("soon"))
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_unlimited(self):
+        bucket = ratelimit.TokenBucket(None, 1)
+        self.assertEqual([bucket.delay() for _ in range(100)], [0.0] * 100)
+
+    def test_burst_then_rate(self):
+        bucket = ratelimit.TokenBucket(10, 2)
+        self.assertEqual(bucket.delay(), 0.0)
+        self.assertEqual(bucket.delay(), 0.0)
+        self.assertAlmostEqual(bucket.delay(), 0.1, places=2)
+
+    def test_pause(self):
+        bucket = ratelimit.TokenBucket(None, 1)
+        bucket.pause(5)
+        self.assertGreater(bucket.delay(), 4)
+
+    def test_acquire_waits(self):
+        bucket = ratelimit.TokenBucket(20, 1)
+
+        async def acquire_all():
+            for _ in range(5):
+                await bucket.acquire()
+
+        start = time.monotonic()
+        asyncio.run(acquire_all())
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_throttled_halves_rate(self):
+        limiter = ratelimit.RateLimiter(host_rate=8)
+        response = httpx.Response(429, headers={"Retry-After": "0"})
+
+        self.assertTrue(limiter.record(URL, response))
+        self.assertEqual(limiter.host(URL).rate, 4)
+
+    def test_retry_after_pauses_host(self):
+        limiter = ratelimit.RateLimiter(host_rate=8)
+        limiter.record(URL, httpx.Response(429, headers={"Retry-After": "10"}))
+
+        self.assertGreater(limiter.host(URL).delay(), 9)
+        self.assertEqual(limiter.host("http://other/graphql").delay(), 0.0)
+
+    def test_plain_503_is_not_throttling(self):
+        limiter = ratelimit.RateLimiter(host_rate=8)
+        self.assertFalse(limiter.record(URL, httpx.Response(503)))
+        self.assertEqual(limiter.host(URL).rate, 8)
+
+    def test_recovers_up_to_host_rate(self):
+        limiter = ratelimit.RateLimiter(host_rate=8)
+        limiter.record(URL, httpx.Response(429, headers={"Retry-After": "0"}))
+
+        for _ in range(200):
+            self.assertFalse(limiter.record(URL, httpx.Response(200)))
+        self.assertEqual(limiter.host(URL).rate, 8)
+
+    def test_unlimited_host_gets_limited(self):
+        limiter = ratelimit.RateLimiter()
+        self.assertIsNone(limiter.host(URL).rate)
+
+        limiter.record(URL, httpx.Response(429))
+        self.assertEqual(limiter.host(URL).rate, limiter.min_rate)
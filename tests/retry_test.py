@@ -0,0 +1,36 @@
+import unittest
+
+from clairvoyance import retry
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_delay_is_capped_and_jittered(self):
+        policy = retry.RetryPolicy(retries=10, backoff=0.5, max_backoff=4)
+
+        for attempt in range(10):
+            delays = [policy.delay(attempt) for _ in range(50)]
+            self.assertTrue(all(0 <= d <= min(4, 0.5 * 2**attempt) for d in delays))
+            self.assertGreater(len(set(delays)), 1)
+
+
+class TestLatencyTracker(unittest.TestCase):
+    def test_needs_samples(self):
+        tracker = retry.LatencyTracker(min_samples=10)
+        for _ in range(9):
+            tracker.add(1.0)
+        self.assertIsNone(tracker.percentile(95))
+
+    def test_percentile(self):
+        tracker = retry.LatencyTracker(min_samples=10)
+        for i in range(100):
+            tracker.add(i / 100)
+        self.assertEqual(tracker.percentile(95), 0.95)
+        self.assertEqual(tracker.percentile(100), 0.99)
+
+    def test_keeps_recent_samples(self):
+        tracker = retry.LatencyTracker(size=10, min_samples=1)
+        for _ in range(10):
+            tracker.add(5.0)
+        for _ in range(10):
+            tracker.add(0.1)
+        self.assertEqual(tracker.percentile(99), 0.1)
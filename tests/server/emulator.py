@@ -0,0 +1,1052 @@
+"""A GraphQL server answering from a schema, for tests and benchmarks.
+
+The schema is read from SDL or from an introspection result, and documents
+are validated the way graphql-js 14 (and so Apollo Server 2) does: the same
+rules, in the same order, with the same messages and suggestions. Nothing is
+resolved, valid documents get null for every field but __typename.
+
+Latency, error caps, rate limits, failures and size limits are set from the
+command line, so that slow or strict targets can be played locally:
+
+    python3 tests/server/emulator.py tests/data/apollo.graphql --port 4000 \\
+        --latency 0.05 --jitter 0.02 --max-errors 100 --rate 50
+"""
+import re
+import json
+import time
+import random
+import argparse
+import threading
+import collections
+import http.server
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from urllib.parse import parse_qs
+from urllib.parse import urlparse
+
+SCALARS = ["Int", "Float", "String", "Boolean", "ID"]
+LEAVES = {"SCALAR", "ENUM"}
+COMPOSITES = {"OBJECT", "INTERFACE", "UNION"}
+ROOTS = {"query": "Query", "mutation": "Mutation", "subscription": "Subscription"}
+
+TOO_MANY_ERRORS = "Too many validation errors, error limit reached. Validation aborted."
+NO_INTROSPECTION = (
+    "GraphQL introspection is not allowed by Apollo Server, but the query contained"
+    + " __schema or __type. To enable introspection, pass introspection: true to"
+    + " ApolloServer in production"
+)
+
+TOKENS = re.compile(
+    r"""
+    (?P<ignored>[\s,\ufeff]+|\#[^\n\r]*)
+    |(?P<spread>\.\.\.)
+    |(?P<block>\"\"\"(?:\\\"\"\"|[^"]|"(?!""))*\"\"\")
+    |(?P<string>"(?:\\.|[^"\\\n\r])*")
+    |(?P<number>-?(?:0|[1-9][0-9]*)(?P<fraction>\.[0-9]+)?(?P<exponent>[eE][+-]?[0-9]+)?)
+    |(?P<name>[_A-Za-z][_0-9A-Za-z]*)
+    |(?P<punct>[!$&()\:=@\[\]{|}])
+    """,
+    re.VERBOSE,
+)
+
+# A value is a (kind, raw) pair, raw being the source text for scalars, a list
+# of values for lists and a list of (name, value) pairs for objects
+Value = Tuple[str, Any]
+
+
+class GraphQLSyntaxError(Exception):
+    pass
+
+
+class Abort(Exception):
+    pass
+
+
+class Field:
+    """A field, an argument or an input field, with its type as written in SDL."""
+
+    def __init__(self, name: str, typeref: str, args: Dict[str, "Field"] = None, default: bool = False):
+        self.name = name
+        self.type = typeref
+        self.args = args or {}
+        self.default = default
+
+
+class Type:
+    def __init__(self, name: str, kind: str):
+        self.name = name
+        self.kind = kind
+        self.fields = {}
+        self.values = []
+        self.interfaces = []
+        self.possible = []
+
+
+META = {
+    "__typename": Field("__typename", "String!"),
+    "__schema": Field("__schema", "__Schema!"),
+    "__type": Field("__type", "__Type", {"name": Field("name", "String!")}),
+}
+
+
+def named(typeref: str) -> str:
+    return typeref.strip("[]!")
+
+
+def tokenize(source: str) -> List[Tuple[str, str]]:
+    tokens = []
+    position = 0
+    while position < len(source):
+        match = TOKENS.match(source, position)
+        if not match:
+            raise GraphQLSyntaxError(f'Syntax Error: Cannot parse the unexpected character "{source[position]}".')
+        position = match.end()
+
+        kind = match.lastgroup
+        if kind == "ignored":
+            continue
+        if kind == "number":
+            kind = "float" if match.group("fraction") or match.group("exponent") else "int"
+        elif kind == "block":
+            kind = "string"
+        tokens.append((kind, match.group(0)))
+
+    tokens.append(("<EOF>", ""))
+    return tokens
+
+
+def describe(token: Tuple[str, str]) -> str:
+    kind, text = token
+    if kind in ("punct", "spread"):
+        return text
+    if kind == "<EOF>":
+        return kind
+    return {"name": "Name", "int": "Int", "float": "Float", "string": "String"}[kind] + f' "{text}"'
+
+
+class Parser:
+    """Recursive descent over the tokens of a document or of SDL."""
+
+    def __init__(self, source: str):
+        self.tokens = tokenize(source)
+        self.i = 0
+
+    @property
+    def token(self) -> Tuple[str, str]:
+        return self.tokens[self.i]
+
+    def peek(self, text: str) -> bool:
+        return self.token[1] == text and self.token[0] in ("punct", "spread", "name")
+
+    def skip(self, text: str) -> bool:
+        if self.peek(text):
+            self.i += 1
+            return True
+        return False
+
+    def expect(self, text: str) -> None:
+        if not self.skip(text):
+            raise GraphQLSyntaxError(f"Syntax Error: Expected {text}, found {describe(self.token)}.")
+
+    def name(self) -> str:
+        kind, text = self.token
+        if kind != "name":
+            raise GraphQLSyntaxError(f"Syntax Error: Expected Name, found {describe(self.token)}.")
+        self.i += 1
+        return text
+
+    def unexpected(self) -> GraphQLSyntaxError:
+        return GraphQLSyntaxError(f"Syntax Error: Unexpected {describe(self.token)}.")
+
+    def eof(self) -> bool:
+        return self.token[0] == "<EOF>"
+
+    def typeref(self) -> str:
+        if self.skip("["):
+            typeref = f"[{self.typeref()}]"
+            self.expect("]")
+        else:
+            typeref = self.name()
+        return typeref + "!" if self.skip("!") else typeref
+
+    def value(self, const: bool = False) -> Value:
+        kind, text = self.token
+        if kind in ("int", "float", "string"):
+            self.i += 1
+            return (kind, text)
+        if kind == "name":
+            self.i += 1
+            if text in ("true", "false"):
+                return ("boolean", text)
+            return ("null", text) if text == "null" else ("enum", text)
+        if self.skip("$") and not const:
+            return ("variable", self.name())
+        if self.skip("["):
+            items = []
+            while not self.skip("]"):
+                items.append(self.value(const))
+            return ("list", items)
+        if self.skip("{"):
+            fields = []
+            while not self.skip("}"):
+                name = self.name()
+                self.expect(":")
+                fields.append((name, self.value(const)))
+            return ("object", fields)
+        raise self.unexpected()
+
+    def arguments(self, const: bool = False) -> List[Tuple[str, Value]]:
+        args = []
+        if self.skip("("):
+            while not self.skip(")"):
+                name = self.name()
+                self.expect(":")
+                args.append((name, self.value(const)))
+        return args
+
+    def directives(self, const: bool = False) -> None:
+        while self.skip("@"):
+            self.name()
+            self.arguments(const)
+
+    def description(self) -> None:
+        if self.token[0] == "string":
+            self.i += 1
+
+
+class Selection:
+    def __init__(self, kind: str, name: str = None, args=None, selections=None, alias: str = None):
+        # kind is "field", "fragment" for an inline fragment, with the type
+        # condition as name, or "spread"
+        self.kind = kind
+        self.name = name
+        self.args = args or []
+        self.selections = selections
+        self.alias = alias or name
+
+
+class Operation:
+    def __init__(self, operation: str, selections: List[Selection], type_condition: str = None, name: str = None):
+        # A fragment definition is an operation of kind "fragment"
+        self.operation = operation
+        self.selections = selections
+        self.type_condition = type_condition
+        self.name = name
+
+
+class DocumentParser(Parser):
+    def document(self) -> List[Operation]:
+        definitions = []
+        while True:
+            definitions.append(self.definition())
+            if self.eof():
+                return definitions
+
+    def definition(self) -> Operation:
+        if self.peek("{"):
+            return Operation("query", self.selection_set())
+
+        kind, text = self.token
+        if kind != "name":
+            raise self.unexpected()
+
+        if text == "fragment":
+            self.i += 1
+            name = self.name()
+            self.expect("on")
+            type_condition = self.name()
+            self.directives()
+            return Operation("fragment", self.selection_set(), type_condition, name)
+
+        if text not in ROOTS:
+            raise self.unexpected()
+        self.i += 1
+
+        name = self.name() if self.token[0] == "name" else None
+        if self.skip("("):
+            while not self.skip(")"):
+                self.expect("$")
+                self.name()
+                self.expect(":")
+                self.typeref()
+                if self.skip("="):
+                    self.value(const=True)
+                self.directives(const=True)
+        self.directives()
+        return Operation(text, self.selection_set(), name=name)
+
+    def selection_set(self) -> List[Selection]:
+        self.expect("{")
+        selections = []
+        while not self.skip("}"):
+            selections.append(self.selection())
+        return selections
+
+    def selection(self) -> Selection:
+        if self.skip("..."):
+            if self.token[0] == "name" and not self.peek("on"):
+                name = self.name()
+                self.directives()
+                return Selection("spread", name)
+
+            type_condition = self.name() if self.skip("on") else None
+            self.directives()
+            return Selection("fragment", type_condition, selections=self.selection_set())
+
+        alias = None
+        name = self.name()
+        if self.skip(":"):
+            alias, name = name, self.name()
+        args = self.arguments()
+        self.directives()
+        selections = self.selection_set() if self.peek("{") else None
+        return Selection("field", name, args, selections, alias)
+
+
+class SDLParser(Parser):
+    def schema(self) -> Tuple[Dict[str, Type], Dict[str, str]]:
+        types = {name: Type(name, "SCALAR") for name in SCALARS}
+        roots = {}
+
+        while not self.eof():
+            self.description()
+            keyword = self.name()
+            if keyword == "extend":
+                keyword = self.name()
+
+            if keyword == "schema":
+                self.directives(const=True)
+                if self.skip("{"):
+                    while not self.skip("}"):
+                        operation = self.name()
+                        self.expect(":")
+                        roots[operation] = self.name()
+                continue
+
+            if keyword == "directive":
+                self.expect("@")
+                self.name()
+                self.input_values("(", ")")
+                self.skip("repeatable")
+                self.expect("on")
+                self.skip("|")
+                self.name()
+                while self.skip("|"):
+                    self.name()
+                continue
+
+            kinds = {
+                "scalar": "SCALAR",
+                "type": "OBJECT",
+                "interface": "INTERFACE",
+                "union": "UNION",
+                "enum": "ENUM",
+                "input": "INPUT_OBJECT",
+            }
+            if keyword not in kinds:
+                raise GraphQLSyntaxError(f'Syntax Error: Unexpected Name "{keyword}".')
+
+            name = self.name()
+            typ = types.setdefault(name, Type(name, kinds[keyword]))
+
+            if self.skip("implements"):
+                self.skip("&")
+                typ.interfaces.append(self.name())
+                while self.skip("&"):
+                    typ.interfaces.append(self.name())
+            self.directives(const=True)
+
+            if keyword in ("type", "interface"):
+                typ.fields.update(self.fields())
+            elif keyword == "input":
+                typ.fields.update(self.input_values("{", "}"))
+            elif keyword == "union" and self.skip("="):
+                self.skip("|")
+                typ.possible.append(self.name())
+                while self.skip("|"):
+                    typ.possible.append(self.name())
+            elif keyword == "enum" and self.skip("{"):
+                while not self.skip("}"):
+                    self.description()
+                    typ.values.append(self.name())
+                    self.directives(const=True)
+
+        return types, roots
+
+    def fields(self) -> Dict[str, Field]:
+        fields = {}
+        if self.skip("{"):
+            while not self.skip("}"):
+                self.description()
+                name = self.name()
+                args = self.input_values("(", ")")
+                self.expect(":")
+                fields[name] = Field(name, self.typeref(), args)
+                self.directives(const=True)
+        return fields
+
+    def input_values(self, opening: str, closing: str) -> Dict[str, Field]:
+        values = {}
+        if self.skip(opening):
+            while not self.skip(closing):
+                self.description()
+                name = self.name()
+                self.expect(":")
+                typeref = self.typeref()
+                default = self.skip("=")
+                if default:
+                    self.value(const=True)
+                values[name] = Field(name, typeref, default=default)
+                self.directives(const=True)
+        return values
+
+
+def typeref_from_json(jso: Dict[str, Any]) -> str:
+    if jso["kind"] == "NON_NULL":
+        return typeref_from_json(jso["ofType"]) + "!"
+    if jso["kind"] == "LIST":
+        return f"[{typeref_from_json(jso['ofType'])}]"
+    return jso["name"]
+
+
+class Schema:
+    def __init__(self, types: Dict[str, Type], roots: Dict[str, str] = None):
+        self.types = types
+        if not roots:
+            roots = {op: name for op, name in ROOTS.items() if name in types}
+        self.roots = {op: types[name] for op, name in roots.items() if name in types}
+
+        for typ in types.values():
+            for interface in typ.interfaces:
+                if interface in types:
+                    types[interface].possible.append(typ.name)
+
+    @classmethod
+    def from_sdl(cls, sdl: str) -> "Schema":
+        return cls(*SDLParser(sdl).schema())
+
+    @classmethod
+    def from_introspection(cls, jso: Dict[str, Any]) -> "Schema":
+        schema = jso.get("data", jso)["__schema"]
+
+        types = {name: Type(name, "SCALAR") for name in SCALARS}
+        for t in schema["types"]:
+            if t["name"].startswith("__"):
+                continue
+            typ = types[t["name"]] = Type(t["name"], t["kind"])
+            for f in t.get("fields") or []:
+                args = {
+                    a["name"]: Field(a["name"], typeref_from_json(a["type"]), default=a.get("defaultValue") is not None)
+                    for a in f.get("args") or []
+                }
+                typ.fields[f["name"]] = Field(f["name"], typeref_from_json(f["type"]), args)
+            for f in t.get("inputFields") or []:
+                typ.fields[f["name"]] = Field(
+                    f["name"], typeref_from_json(f["type"]), default=f.get("defaultValue") is not None
+                )
+            typ.values = [v["name"] for v in t.get("enumValues") or []]
+            typ.interfaces = [i["name"] for i in t.get("interfaces") or []]
+            if t["kind"] == "UNION":
+                typ.possible = [p["name"] for p in t.get("possibleTypes") or []]
+
+        roots = {}
+        for op in ROOTS:
+            if schema.get(f"{op}Type"):
+                roots[op] = schema[f"{op}Type"]["name"]
+        return cls(types, roots)
+
+    @classmethod
+    def load(cls, path: str) -> "Schema":
+        with open(path) as f:
+            text = f.read()
+        if path.endswith(".json"):
+            return cls.from_introspection(json.loads(text))
+        return cls.from_sdl(text)
+
+    def is_leaf(self, typeref: str) -> bool:
+        typ = self.types.get(named(typeref))
+        return typ is not None and typ.kind in LEAVES
+
+    def composite(self, typeref: str) -> Optional[Type]:
+        typ = self.types.get(named(typeref))
+        return typ if typ is not None and typ.kind in COMPOSITES else None
+
+
+def possible_types(typ: Type) -> set:
+    return set(typ.possible) if typ.kind in ("INTERFACE", "UNION") else {typ.name}
+
+
+def spreads(selections: List[Selection]):
+    for selection in selections:
+        if selection.kind == "spread":
+            yield selection.name
+        elif selection.selections:
+            yield from spreads(selection.selections)
+
+
+def lexical_distance(a: str, b: str) -> int:
+    # Damerau-Levenshtein with adjacent swaps, a change of case counting once
+    if a == b:
+        return 0
+    a, b = a.lower(), b.lower()
+    if a == b:
+        return 1
+
+    d = [list(range(len(b) + 1))] + [[i] + [0] * len(b) for i in range(1, len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1, d[i - 1][j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d[i][j] = min(d[i][j], d[i - 2][j - 2] + cost)
+
+    return d[len(a)][len(b)]
+
+
+def suggestion_list(name: str, options) -> List[str]:
+    distances = {}
+    for option in options:
+        distance = lexical_distance(name, option)
+        if distance <= max(len(name) // 2, len(option) // 2, 1):
+            distances[option] = distance
+
+    return sorted(distances, key=distances.get)
+
+
+def or_list(items: List[str]) -> str:
+    items = items[:5]
+    if len(items) < 3:
+        return " or ".join(items)
+    return ", ".join(items[:-1]) + ", or " + items[-1]
+
+
+def did_you_mean(suggestions: List[str], prefix: str = "") -> str:
+    if not suggestions:
+        return ""
+    quoted = ['"' + s + '"' for s in suggestions]
+    return f" Did you mean {prefix}{or_list(quoted)}?"
+
+
+def print_value(value: Value) -> str:
+    kind, raw = value
+    if kind == "list":
+        return "[" + ", ".join(print_value(v) for v in raw) + "]"
+    if kind == "object":
+        return "{" + ", ".join(f"{name}: {print_value(v)}" for name, v in raw) + "}"
+    if kind == "variable":
+        return f"${raw}"
+    return raw
+
+
+def parses_as(scalar: str, value: Value) -> bool:
+    kind, raw = value
+    if scalar == "Int":
+        return kind == "int" and -(2 ** 31) <= int(raw) < 2 ** 31
+    if scalar == "Float":
+        return kind in ("int", "float")
+    if scalar == "String":
+        return kind == "string"
+    if scalar == "Boolean":
+        return kind == "boolean"
+    if scalar == "ID":
+        return kind in ("int", "string")
+    # Custom scalars take any literal
+    return True
+
+
+class Validator:
+    """Errors of a document, in the order graphql-js reports them.
+
+    graphql-js runs its rules side by side in a single walk of the document,
+    so errors come node by node: for a field, the selection rules, then its
+    arguments and their values, then its subfields, and last the required
+    arguments it misses. Apollo's own introspection rule comes after the
+    standard ones.
+    """
+
+    def __init__(self, schema: Schema, max_errors: int = None, too_many_errors: bool = False):
+        self.schema = schema
+        self.max_errors = max_errors
+        self.too_many_errors = too_many_errors
+        self.errors = []
+        self.fragments = {}
+
+    def report(self, message: str) -> None:
+        if self.max_errors is not None and len(self.errors) >= self.max_errors:
+            if self.too_many_errors:
+                self.errors.append(TOO_MANY_ERRORS)
+            raise Abort()
+        self.errors.append(message)
+
+    def validate(self, definitions: List[Operation]) -> List[str]:
+        self.fragments = {d.name: d for d in definitions if d.operation == "fragment"}
+        try:
+            for definition in definitions:
+                if definition.operation == "fragment":
+                    parent = self.type_condition(definition.type_condition, definition.name)
+                    self.known_type(definition.type_condition)
+                    if parent is not None and parent.kind not in COMPOSITES:
+                        parent = None
+                else:
+                    parent = self.schema.roots.get(definition.operation)
+                self.visit_selections(parent, definition.selections)
+
+            used = set()
+            pending = [d for d in definitions if d.operation != "fragment"]
+            while pending:
+                for name in spreads(pending.pop().selections):
+                    if name in self.fragments and name not in used:
+                        used.add(name)
+                        pending.append(self.fragments[name])
+            for name in self.fragments:
+                if name not in used:
+                    self.report(f'Fragment "{name}" is never used.')
+        except Abort:
+            pass
+        return self.errors
+
+    def type_condition(self, name: str, fragment: str = None) -> Optional[Type]:
+        typ = self.schema.types.get(name)
+        if typ is not None and typ.kind not in COMPOSITES:
+            if fragment is None:
+                self.report(f'Fragment cannot condition on non composite type "{name}".')
+            else:
+                self.report(f'Fragment "{fragment}" cannot condition on non composite type "{name}".')
+        return typ
+
+    def known_type(self, name: str) -> None:
+        if name not in self.schema.types:
+            self.report(f'Unknown type "{name}".' + did_you_mean(suggestion_list(name, self.schema.types)))
+
+    def overlap(self, a: Type, b: Type) -> bool:
+        return bool(possible_types(a) & possible_types(b))
+
+    def visit_selections(self, parent: Optional[Type], selections: List[Selection]) -> None:
+        fields = self.collect(parent, selections)
+        for response, group in fields.items():
+            for i, field in enumerate(group):
+                for other in group[i + 1 :]:
+                    reason = self.conflict(field, other, False)
+                    if reason:
+                        self.report(
+                            f'Fields "{response}" conflict because {reason}. Use different'
+                            + " aliases on the fields to fetch both if this was intentional."
+                        )
+
+        for selection in selections:
+            if selection.kind == "field":
+                self.visit_field(parent, selection)
+            elif selection.kind == "spread":
+                fragment = self.fragments.get(selection.name)
+                if fragment is None:
+                    self.report(f'Unknown fragment "{selection.name}".')
+                    continue
+                typ = self.schema.types.get(fragment.type_condition)
+                if typ is not None and typ.kind in COMPOSITES and parent is not None and not self.overlap(typ, parent):
+                    self.report(
+                        f'Fragment "{selection.name}" cannot be spread here as objects of type'
+                        + f' "{parent.name}" can never be of type "{typ.name}".'
+                    )
+            else:
+                typ = parent
+                if selection.name is not None:
+                    typ = self.type_condition(selection.name)
+                    if typ is not None and typ.kind in COMPOSITES and parent is not None and not self.overlap(typ, parent):
+                        self.report(
+                            "Fragment cannot be spread here as objects of type"
+                            + f' "{parent.name}" can never be of type "{typ.name}".'
+                        )
+                    self.known_type(selection.name)
+                self.visit_selections(typ if typ is not None and typ.kind in COMPOSITES else None, selection.selections)
+
+    def collect(self, parent: Optional[Type], selections: List[Selection], fields=None) -> Dict[str, list]:
+        # Fields by response name, with inline fragments flattened
+        fields = {} if fields is None else fields
+        for selection in selections:
+            if selection.kind == "field":
+                definition = None
+                if parent is not None and parent.kind in ("OBJECT", "INTERFACE"):
+                    definition = parent.fields.get(selection.name)
+                fields.setdefault(selection.alias, []).append((parent, selection, definition))
+            elif selection.kind == "fragment":
+                typ = parent if selection.name is None else self.schema.types.get(selection.name)
+                self.collect(typ, selection.selections, fields)
+        return fields
+
+    def conflict(self, field, other, exclusive: bool) -> Optional[str]:
+        # Why two fields of the same response name can't be merged, if so
+        parent1, node1, definition1 = field
+        parent2, node2, definition2 = other
+        exclusive = exclusive or (
+            parent1 is not parent2
+            and parent1 is not None and parent1.kind == "OBJECT"
+            and parent2 is not None and parent2.kind == "OBJECT"
+        )
+
+        if not exclusive:
+            if node1.name != node2.name:
+                return f'"{node1.name}" and "{node2.name}" are different fields'
+            args = dict(node2.args)
+            if len(node1.args) != len(args) or any(
+                name not in args or print_value(value) != print_value(args[name])
+                for name, value in node1.args
+            ):
+                return "they have differing arguments"
+
+        type1 = definition1.type if definition1 is not None else None
+        type2 = definition2.type if definition2 is not None else None
+        if type1 and type2 and self.types_conflict(type1, type2):
+            return f"they return conflicting types {type1} and {type2}"
+
+        if node1.selections is not None and node2.selections is not None:
+            fields1 = self.collect(self.schema.types.get(named(type1)) if type1 else None, node1.selections)
+            fields2 = self.collect(self.schema.types.get(named(type2)) if type2 else None, node2.selections)
+            reasons = []
+            for response, group in fields1.items():
+                for sub1 in group:
+                    for sub2 in fields2.get(response, []):
+                        reason = self.conflict(sub1, sub2, exclusive)
+                        if reason:
+                            reasons.append(f'subfields "{response}" conflict because {reason}')
+            if reasons:
+                return " and ".join(reasons)
+        return None
+
+    def types_conflict(self, type1: str, type2: str) -> bool:
+        if type1.endswith("!") or type2.endswith("!"):
+            if not (type1.endswith("!") and type2.endswith("!")):
+                return True
+            return self.types_conflict(type1[:-1], type2[:-1])
+        if type1.startswith("[") or type2.startswith("["):
+            if not (type1.startswith("[") and type2.startswith("[")):
+                return True
+            return self.types_conflict(type1[1:-1], type2[1:-1])
+        if self.schema.is_leaf(type1) or self.schema.is_leaf(type2):
+            return type1 != type2
+        return False
+
+    def visit_field(self, parent: Optional[Type], field: Selection) -> None:
+        definition = None
+        if parent is not None:
+            if field.name in META and (field.name == "__typename" or parent is self.schema.roots.get("query")):
+                definition = META[field.name]
+            elif parent.kind != "UNION":
+                definition = parent.fields.get(field.name)
+
+        if definition is not None:
+            if self.schema.is_leaf(definition.type):
+                if field.selections is not None:
+                    self.report(
+                        f'Field "{field.name}" must not have a selection since type'
+                        + f' "{definition.type}" has no subfields.'
+                    )
+            elif field.selections is None and named(definition.type) in self.schema.types:
+                self.report(
+                    f'Field "{field.name}" of type "{definition.type}" must have a selection'
+                    + f' of subfields. Did you mean "{field.name} {{ ... }}"?'
+                )
+        elif parent is not None:
+            self.report(self.undefined_field(parent, field.name))
+
+        if field.name in ("__schema", "__type"):
+            self.report(NO_INTROSPECTION)
+
+        seen = set()
+        for name, value in field.args:
+            arg = definition.args.get(name) if definition is not None else None
+            if definition is not None and arg is None:
+                self.report(
+                    f'Unknown argument "{name}" on field "{field.name}" of type'
+                    + f' "{parent.name}".'
+                    + did_you_mean(suggestion_list(name, definition.args))
+                )
+            if name in seen:
+                self.report(f'There can be only one argument named "{name}".')
+            seen.add(name)
+            if arg is not None:
+                self.check_value(value, arg.type)
+            else:
+                self.check_unique(value)
+
+        if field.selections is not None:
+            child = self.schema.composite(definition.type) if definition is not None else None
+            self.visit_selections(child, field.selections)
+
+        if definition is not None:
+            for arg in definition.args.values():
+                if arg.name not in seen and arg.type.endswith("!") and not arg.default:
+                    self.report(
+                        f'Field "{field.name}" argument "{arg.name}" of type "{arg.type}"'
+                        + " is required, but it was not provided."
+                    )
+
+    def undefined_field(self, parent: Type, name: str) -> str:
+        message = f'Cannot query field "{name}" on type "{parent.name}".'
+
+        if parent.kind in ("INTERFACE", "UNION"):
+            # Interfaces most implementations share come first, then the
+            # object types, as graphql-js suggests them
+            objects = []
+            usage = collections.Counter()
+            for possible in parent.possible:
+                typ = self.schema.types.get(possible)
+                if typ is None or name not in typ.fields:
+                    continue
+                objects.append(typ.name)
+                for interface in typ.interfaces:
+                    if name in self.schema.types[interface].fields:
+                        usage[interface] += 1
+            suggested = sorted(usage, key=lambda i: -usage[i]) + objects
+            if suggested:
+                return message + did_you_mean(suggested, "to use an inline fragment on ")
+
+        if parent.kind in ("OBJECT", "INTERFACE"):
+            return message + did_you_mean(suggestion_list(name, parent.fields))
+        return message
+
+    def check_value(self, value: Value, typeref: str) -> None:
+        kind, raw = value
+        if kind == "variable":
+            return
+        if kind == "null":
+            if typeref.endswith("!"):
+                self.report(f"Expected type {typeref}, found null.")
+            return
+
+        nullable = typeref[:-1] if typeref.endswith("!") else typeref
+        if kind == "list":
+            if nullable.startswith("["):
+                for item in raw:
+                    self.check_value(item, nullable[1:-1])
+            else:
+                # The location of a list is its item type, which is the type
+                # itself without its non-null wrapper when it's no list
+                self.check_scalar(value, nullable)
+                self.check_unique(value)
+            return
+
+        typ = self.schema.types.get(named(typeref))
+        if kind == "object" and typ is not None and typ.kind == "INPUT_OBJECT":
+            given = [name for name, _ in raw]
+            for field in typ.fields.values():
+                if field.name not in given and field.type.endswith("!") and not field.default:
+                    self.report(f"Field {typ.name}.{field.name} of required type {field.type} was not provided.")
+            for i, (name, item) in enumerate(raw):
+                field = typ.fields.get(name)
+                if field is None:
+                    suggestions = suggestion_list(name, typ.fields)
+                    self.report(
+                        f'Field "{name}" is not defined by type {typ.name}.'
+                        + (f" Did you mean {or_list(suggestions)}?" if suggestions else "")
+                    )
+                if name in given[:i]:
+                    self.report(f'There can be only one input field named "{name}".')
+                if field is None:
+                    self.check_unique(item)
+                else:
+                    self.check_value(item, field.type)
+            return
+
+        if kind == "enum" and typ is not None and typ.kind == "ENUM":
+            if raw not in typ.values:
+                self.report(
+                    f"Expected type {typ.name}, found {raw}."
+                    + self.enum_hint(typ, raw)
+                )
+            return
+
+        self.check_scalar(value, typeref)
+        self.check_unique(value)
+
+    def check_unique(self, value: Value) -> None:
+        # Input field names are checked apart from types, so also inside
+        # values of unknown arguments or of the wrong type
+        kind, raw = value
+        if kind == "list":
+            for item in raw:
+                self.check_unique(item)
+        elif kind == "object":
+            given = set()
+            for name, item in raw:
+                if name in given:
+                    self.report(f'There can be only one input field named "{name}".')
+                given.add(name)
+                self.check_unique(item)
+
+    def check_scalar(self, value: Value, location: str) -> None:
+        typ = self.schema.types.get(named(location))
+        if typ is None:
+            return
+
+        printed = print_value(value)
+        if typ.kind == "ENUM":
+            self.report(f"Expected type {location}, found {printed}." + self.enum_hint(typ, printed))
+        elif typ.kind != "SCALAR" or not parses_as(typ.name, value):
+            self.report(f"Expected type {location}, found {printed}.")
+
+    def enum_hint(self, typ: Type, printed: str) -> str:
+        suggestions = suggestion_list(printed, typ.values)
+        if not suggestions:
+            return ""
+        return f" Did you mean the enum value {or_list(suggestions)}?"
+
+
+class Emulator:
+    """Answers of the server, with the options that shape them."""
+
+    def __init__(
+        self,
+        schema: Schema,
+        latency: float = 0,
+        jitter: float = 0,
+        max_errors: int = None,
+        too_many_errors: bool = False,
+        rate: float = None,
+        fail_rate: float = 0,
+        max_body: int = None,
+        max_url: int = None,
+        seed: int = None,
+    ):
+        self.schema = schema
+        self.latency = latency
+        self.jitter = jitter
+        self.max_errors = max_errors
+        self.too_many_errors = too_many_errors
+        self.rate = rate
+        self.fail_rate = fail_rate
+        self.max_body = max_body
+        self.max_url = max_url
+        self.random = random.Random(seed)
+
+        self.lock = threading.Lock()
+        self.recent = collections.deque()
+        self.stats = collections.Counter()
+
+    def refuse(self, size: int, limit: Optional[int], status: int) -> Optional[int]:
+        # Status of a request turned away before it reaches GraphQL, if it is
+        with self.lock:
+            self.stats["received"] += 1
+
+            if self.rate:
+                now = time.monotonic()
+                self.recent.append(now)
+                while now - self.recent[0] > 1:
+                    self.recent.popleft()
+                if len(self.recent) > self.rate:
+                    self.stats["throttled"] += 1
+                    return 429
+
+            if limit is not None and size > limit:
+                self.stats["too_large"] += 1
+                return status
+
+            if self.random.random() < self.fail_rate:
+                self.stats["failed"] += 1
+                return 500
+
+            self.stats["requests"] += 1
+            delay = max(0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+        time.sleep(delay)
+        return None
+
+    def answer(self, query: str) -> Tuple[int, Dict[str, Any]]:
+        try:
+            definitions = DocumentParser(query).document()
+        except GraphQLSyntaxError as e:
+            return 400, {"errors": [{"message": str(e), "extensions": {"code": "GRAPHQL_PARSE_FAILED"}}]}
+
+        errors = Validator(self.schema, self.max_errors, self.too_many_errors).validate(definitions)
+        if errors:
+            with self.lock:
+                self.stats["errors"] += len(errors)
+            return 400, {
+                "errors": [
+                    {"message": message, "extensions": {"code": "GRAPHQL_VALIDATION_FAILED"}}
+                    for message in errors
+                ]
+            }
+
+        operation = next(d for d in definitions if d.operation != "fragment")
+        root = self.schema.roots.get(operation.operation)
+        if root is None:
+            return 200, {"errors": [{"message": f"Schema is not configured for {operation.operation}s."}]}
+
+        data = {}
+        for selection in operation.selections:
+            if selection.kind == "field":
+                data[selection.alias] = root.name if selection.name == "__typename" else None
+        return 200, {"data": data}
+
+
+class EmulatorHTTPRequestHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            with self.server.emulator.lock:
+                self.reply(200, dict(self.server.emulator.stats))
+            return
+
+        emulator = self.server.emulator
+        status = emulator.refuse(len(self.path), emulator.max_url, 414)
+        if status:
+            return self.reply(status)
+
+        query = parse_qs(url.query).get("query")
+        if not query:
+            return self.reply(400, {"errors": [{"message": "GET query missing."}]})
+        self.reply(*emulator.answer(query[0]))
+
+    def do_POST(self):
+        emulator = self.server.emulator
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        status = emulator.refuse(len(body), emulator.max_body, 413)
+        if status:
+            return self.reply(status)
+
+        try:
+            query = json.loads(body)["query"]
+        except (ValueError, KeyError, TypeError):
+            return self.reply(400, {"errors": [{"message": "POST body missing."}]})
+        self.reply(*emulator.answer(query))
+
+    def reply(self, status: int, body: Dict[str, Any] = None) -> None:
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        if body is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main(schema: str = "tests/data/apollo.graphql", port: int = 4000, **options):
+    with http.server.ThreadingHTTPServer(("", port), EmulatorHTTPRequestHandler) as httpd:
+        httpd.emulator = Emulator(Schema.load(schema), **options)
+        httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("schema", nargs="?", default="tests/data/apollo.graphql", help="SDL, or introspection JSON ending in .json")
+    parser.add_argument("-p", "--port", type=int, default=4000)
+    parser.add_argument("--latency", type=float, default=0, help="Seconds taken by each answer")
+    parser.add_argument("--jitter", type=float, default=0, help="Seconds the latency varies by, either way")
+    parser.add_argument("--max-errors", type=int, help="Validation errors reported at most")
+    parser.add_argument("--too-many-errors", action="store_true", help="Say when errors were cut, as graphql-js 15 does")
+    parser.add_argument("--rate", type=float, help="Requests per second answered before 429")
+    parser.add_argument("--fail-rate", type=float, default=0, help="Share of requests failing with 500")
+    parser.add_argument("--max-body", type=int, help="Bytes of POST body accepted before 413")
+    parser.add_argument("--max-url", type=int, help="Bytes of GET URL accepted before 414")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    main(**vars(args))
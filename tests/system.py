@@ -11,7 +11,17 @@ from typing import Dict
 class TestClairvoyance(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
-        cls.port = "4000"
+        # Without a SERVER, the stand-in emulator plays the Apollo fullstack
+        # server from its schema
+        cls.server = os.environ.get("SERVER")
+        cls._emulator = None
+        if not cls.server:
+            cls.server = "http://localhost:4000"
+            cls._emulator = subprocess.Popen(
+                ["python3", "tests/server/emulator.py", "tests/data/apollo.graphql", "--port", "4000"]
+            )
+            time.sleep(1)
+
         output_file = "/tmp/t.json"
 
         try:
@@ -28,7 +38,7 @@ class TestClairvoyance(unittest.TestCase):
                 output_file,
                 "-w",
                 "tests/data/wordlist-for-apollo-server.txt",
-                f"http://localhost:{cls.port}",
+                cls.server,
             ],
             capture_output=True,
         )
@@ -144,6 +154,9 @@ class TestClairvoyance(unittest.TestCase):
 
     @classmethod
     def tearDownClass(cls):
+        if cls._emulator:
+            cls._emulator.terminate()
+            cls._emulator.wait()
         if cls.clairvoyance.stdout:
             with open("/tmp/clairvoyance-tests.stdout", "wb") as f:
                 f.write(cls.clairvoyance.stdout)
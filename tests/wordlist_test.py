@@ -0,0 +1,49 @@
+import io
+import unittest
+
+from clairvoyance import wordlist
+
+
+class TestWordlist(unittest.TestCase):
+    def test_load(self):
+        f = io.BytesIO(b"user\n  id \n\nuser\n1abc\nfoo-bar\nh\xc3\xa9llo\n_private\n")
+        got = wordlist.Wordlist.load(f)
+
+        self.assertEqual(list(got), ["user", "id", "_private"])
+        self.assertEqual(got.duplicates, 1)
+        self.assertEqual(got.skipped, 3)
+
+    def test_sequence(self):
+        names = [f"w{i}" for i in range(10000)]
+        got = wordlist.Wordlist(names)
+
+        self.assertEqual(len(got), 10000)
+        self.assertEqual(got[0], "w0")
+        self.assertEqual(got[-1], "w9999")
+        self.assertEqual(list(got), names)
+        self.assertEqual(got, names)
+        with self.assertRaises(IndexError):
+            got[10000]
+
+    def test_slices(self):
+        names = [f"w{i}" for i in range(100)]
+        got = wordlist.Wordlist(names)
+
+        bucket = got[10:20]
+        self.assertIs(bucket.data, got.data)
+        self.assertEqual(list(bucket), names[10:20])
+        self.assertEqual(list(bucket[5:]), names[15:20])
+        self.assertEqual(list(got[90:200]), names[90:])
+        self.assertEqual(len(got[50:10]), 0)
+        self.assertEqual(list(got[50:10]), [])
+        self.assertEqual(got[::10], names[::10])
+        self.assertEqual(" ".join(got[:3]), "w0 w1 w2")
+
+    def test_duplicates_across_blocks(self):
+        # Enough names for duplicates to be found in later blocks of lines
+        names = [f"w{i}" for i in range(70000)]
+        got = wordlist.Wordlist(names + names[::-1] + ["w0", "new", "two\nnames"])
+
+        self.assertEqual(list(got), names + ["new"])
+        self.assertEqual(got.duplicates, 70001)
+        self.assertEqual(got.skipped, 1)